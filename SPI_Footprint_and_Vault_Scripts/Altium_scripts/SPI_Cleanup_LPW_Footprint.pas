@@ -6248,8 +6248,25 @@ begin
    { Note:  Previous code already handled cases where csv file was not previously checked in, etc.
     by not populating the csvOrLogFileOld stringlist.  In such a case, comparing a null stringlist
     to our new stringlist is guaranteed to be different. }
-   rc := DiffStringLists({listA} csvOrLogFileOld,
-                         {listB} csvOrLogFileOut);
+   { In 3d mode, FreeCAD log files start with a fingerprint of the whole model (parms, geometry,
+    and colors).  If both log files have one, comparing the fingerprints is enough. }
+   if ( mode and (csvOrLogFileOld.Count > 0) and (csvOrLogFileOut.Count > 0) and
+        CLF_DoesStringStartWith(csvOrLogFileOld.Strings[0], 'Fingerprint ') and
+        CLF_DoesStringStartWith(csvOrLogFileOut.Strings[0], 'Fingerprint ') ) then
+   begin
+      WriteToDebugFile('Comparing ' + csv + ' file fingerprints "' + csvOrLogFileOld.Strings[0] + '" and "' + csvOrLogFileOut.Strings[0] + '".');
+      if (csvOrLogFileOld.Strings[0] = csvOrLogFileOut.Strings[0]) then
+         rc := 0
+      else
+         rc := 1;
+   end
+
+   { Else compare the files line by line. }
+   else
+   begin
+      rc := DiffStringLists({listA} csvOrLogFileOld,
+                            {listB} csvOrLogFileOut);
+   end;
 
    { If they are the same, then inform user. }
    if (rc = 0) then
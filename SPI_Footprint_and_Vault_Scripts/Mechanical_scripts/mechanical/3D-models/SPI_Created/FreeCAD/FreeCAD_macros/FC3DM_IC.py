@@ -135,86 +135,16 @@ reload(FC3DM_utils)
 from FC3DM_utils import *
 
 
-###################################
-#### Read ini files to get all our parameters.
-###################################
-
-# Clear the parms associative array
-parms = {}
-
-# Workaround needed because otherwise parms doesn't actually get created until
-# after the function call, and then we end up with a reference to a blank parms dict.
-parms["foo"] = "bar"
-
-# Read both the global and component-specific ini files.
-FC3DM_ReadIniFiles(scriptPath, parms)
-
-# Write parms to console window
-print "Back in main(), Parms are:"
-print parms
-
-
 ###################################
 #### Main function
 ###################################
 
-# Open the debug file
-FC3DM_OpenDebugFile(parms)
-
-# Extract relevant parameter values from parms associative array
-# TODO:  Currently no error checking!
-pin1MarkName = parms["pin1MarkName"]
-bodyName = parms["bodyName"]
-docName = parms["docName"]
-
-# Create new document
-App.newDocument(docName)
-App.setActiveDocument(docName)
-App.ActiveDocument=App.getDocument(docName)
-Gui.ActiveDocument=Gui.getDocument(docName)
-
-
-## Start creating the component model.
-
-# Call CreateIcBody() to create the plastic molded IC body
-FC3DM_CreateIcBody(App, Gui,
-                   parms,
-                   docName)
-
-# Create all IC gullwing pins
-pinNames = list()
-FC3DM_CreateIcPins(App, Gui,
-                   parms, pinNames,
-                   docName)
-
-# Describe all objects in this component to a logfile.
-FC3DM_DescribeObjectsToLogFile(App, Gui,
-                               parms, pinNames,
-                               docName)
-
-# Fuse all objects together & retain proper coloring
-objNameList = list(pinNames)
-objNameList.append(bodyName)
-objNameList.append(pin1MarkName)
-fusionName = docName
-FC3DM_FuseSetOfObjects(App, Gui,
-                       parms,
-                       docName, objNameList, fusionName)
-
-# Zoom in
-App.ActiveDocument.recompute()
-Gui.SendMsgToActiveView("ViewFit")
-
-
-## Save file to native format and export to STEP
-objNameList = [fusionName]
-FC3DM_SaveAndExport(App, Gui,
-                    docName,
-                    parms,
-                    objNameList)
-
-# Save and close debug file.
-FC3DM_CloseDebugFile()
+# Read ini files, then create, describe, fuse, save and export the model.
+# Note:  An empty ini file name means "use the iniFileName pointer in FC3DM_global.ini".
+result = {}
+FC3DM_GenerateIcModel(App, Gui,
+                      scriptPath, "",
+                      result)
 
 # Exit with success return code.
 FC3DM_MyExit(0)
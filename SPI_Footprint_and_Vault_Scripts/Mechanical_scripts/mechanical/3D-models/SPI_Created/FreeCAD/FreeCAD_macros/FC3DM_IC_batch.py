@@ -0,0 +1,193 @@
+#================================================================================================
+#
+#	@file			FC3DM_IC_batch.py
+#
+#	@brief			Python script to create the 3D models for a list of IC ini files in one FreeCAD session.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * FC3DM_IC.py builds exactly one 3D model per FreeCAD launch.  When regenerating
+# * a whole library of IC models, the FreeCAD startup time dominates.  This script
+# * builds the models for a whole list of component-specific ini files within a
+# * single FreeCAD (or FreeCADCmd) process.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * This script gets the list of component ini files from the FC3DM_BATCH_INI_FILES
+# * environment variable (separated by os.pathsep), or failing that, from the
+# * batchIniFileNames list in FC3DM_global.ini.  Paths are relative to this script's
+# * directory, just like iniFileName in FC3DM_global.ini.  The list may also name
+# * bundles (.jsonl or .csv files holding one model's parms per record), whose
+# * records are streamed straight into the generator.  For each ini file, it
+# * calls FC3DM_GenerateIcModel() to create, describe, fuse, save, and export the
+# * model, then closes that model's document.  Without a GUI, each model's STEP file
+# * is written from a background thread while the next model is built (unless
+# * backgroundExport = 0).  A failure in one model is recorded
+# * and does not stop the batch.  Per-model status is written to FC3DM_batch.log
+# * and the overall return code (0 if all models succeeded, -1 otherwise) is written
+# * to python.rc.
+# *
+# * When run as one of several workers by FC3DM_parallel.py, the FC3DM_WORK_DIR
+# * environment variable gives this process its own directory for the debug file,
+# * FC3DM_batch.log, and python.rc, and FC3DM_RESULT_FILE names a JSON file to
+# * which the per-model results are written.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script will not write or modify any ini files.
+# ***************************************************************************
+
+###################################
+#### Load external libraries.
+###################################
+import FreeCAD
+import sys
+import os
+
+# FreeCAD only gives us a Gui when we are running inside the full GUI application.
+# Under FreeCADCmd there is none.
+App = FreeCAD
+if (getattr(FreeCAD, "GuiUp", 0)):
+    import FreeCADGui
+    Gui = FreeCADGui
+else:
+    Gui = None
+
+## Get path to this script, so that we can find FC3DM_utils.py and FC3DM_global.ini
+if ("__file__" in globals()):
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+else:
+    scriptPath = os.getcwd()
+print("scriptPath is :" + scriptPath + ":")
+sys.path.append(scriptPath)
+
+# Import our utilities module
+import FC3DM_utils
+
+# Reload utilities module, since this changes often!
+reload(FC3DM_utils)
+
+# Explicitly load all functions within it
+from FC3DM_utils import *
+
+
+###################################
+#### Figure out which models to build.
+###################################
+
+# See if we have been given our own work directory (we are one of several workers)
+workDir = scriptPath
+if ("FC3DM_WORK_DIR" in os.environ):
+    workDir = os.environ["FC3DM_WORK_DIR"]
+    FC3DM_SetWorkDir(workDir)
+
+# See if we were handed a list of ini files in our environment
+iniFileNames = []
+if ("FC3DM_BATCH_INI_FILES" in os.environ):
+
+    for iniFileName in os.environ["FC3DM_BATCH_INI_FILES"].split(os.pathsep):
+        if (iniFileName.strip() != ""):
+            iniFileNames.append(iniFileName.strip())
+
+# Else look for a list in the global ini file.
+else:
+
+    globalParms = {}
+    FC3DM_ReadIniFile(os.path.join(scriptPath, "FC3DM_global.ini"),
+                      globalParms)
+
+    if ("batchIniFileNames" in globalParms):
+        iniFileNames = list(globalParms["batchIniFileNames"])
+
+print("iniFileNames is:")
+print(iniFileNames)
+
+
+###################################
+#### Main function
+###################################
+
+# Create all the models, one after another, in this one process
+results = []
+FC3DM_GenerateIcModelsInBatch(App, Gui,
+                              scriptPath, iniFileNames,
+                              results)
+
+# Write per-model status to the batch report
+numFailed = FC3DM_WriteBatchReport(os.path.join(workDir, "FC3DM_batch.log"),
+                                   results)
+
+# Write per-model results for FC3DM_parallel.py, if asked to
+if ("FC3DM_RESULT_FILE" in os.environ):
+    FC3DM_WriteBatchResults(os.environ["FC3DM_RESULT_FILE"],
+                            results)
+
+# Exit with success return code only if every model was built.
+if (numFailed == 0):
+    FC3DM_MyExit(0)
+else:
+    FC3DM_MyExit(-1)
@@ -0,0 +1,401 @@
+#================================================================================================
+#
+#	@file			FC3DM_benchmark.py
+#
+#	@brief			Python script to benchmark FC3DM model generation against a stored baseline.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * Changes to FC3DM_utils.py that are meant to make model generation faster should be
+# * measured, not guessed.  This script generates a fixed set of models headlessly, several
+# * times each, and compares the results against a stored JSON baseline.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * This script is run with a plain python interpreter (it does not import FreeCAD).
+# * By default it benchmarks every component ini file in the macros directory, plus the
+# * chip resistor ini files in ..\Resistor_chip.  Each run of each model gets a fresh
+# * FreeCADCmd process running FC3DM_IC_batch.py (see FC3DM_parallel.py), so that runs
+# * don't warm up each other's caches and peak memory is per model.
+# * For each model it records the median total and per-stage times, the peak resident
+# * set size, the face count of the finished model, and the size of its STEP file.
+# * These are compared against the baseline.  Times that grew by more than the threshold
+# * (and by more than a minimum number of seconds, to ignore noise in very short stages),
+# * memory or STEP size that grew by more than the threshold, and any change in face
+# * count, are reported as regressions.  The return code is 0 if every model was
+# * generated with no regressions, and 1 otherwise.
+# * If there is no baseline yet, or --update-baseline is given, the results are written
+# * as the new baseline.  Otherwise the time and face count of each model are also listed
+# * side by side with the baseline.
+# * --set overrides a parm for every model (see FC3DM_PARMS in FC3DM_ini.py), so that two
+# * ways of building the same models may be compared, eg. the two IC body or gullwing pin builders.
+# * The model and shape caches are always turned off, so that every run builds its model.
+# * Each run writes its model files to a "models" directory in its own work directory
+# * (under --work-dir), by overriding newModelPathRel.  So benchmarking, even with --set,
+# * never overwrites the shipped models.
+# *
+# * Example:
+# *   python FC3DM_benchmark.py -n 3
+# *   python FC3DM_benchmark.py -n 5 --update-baseline
+# *   python FC3DM_benchmark.py -n 5 --set bodyBuilder='"loft"'
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script will not benchmark tantalum_cap.py, which builds its 36 case sizes from
+# * parameters hard-coded in the script, needs the FreeCAD GUI, and has no ini files.
+# * Nor will it run models in parallel, since they would compete for CPU and memory.
+# ***************************************************************************
+
+###################################
+#### Load external libraries.
+###################################
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# We run our FreeCADCmd workers the same way FC3DM_parallel.py does
+from FC3DM_parallel import FC3DM_FindFreeCadCmd, FC3DM_RunWorker
+
+# Time metrics that we compare, besides the per-stage timings
+timeMetrics = ["seconds"]
+
+# Size metrics that we compare
+sizeMetrics = ["peakRssBytes", "stepBytes"]
+
+
+###################################################################
+# FC3DM_FindBenchmarkIniFiles()
+#	Function to find the default set of ini files to benchmark.
+###################################################################
+def FC3DM_FindBenchmarkIniFiles(scriptPath):
+
+    iniFileNames = []
+    for iniFileName in sorted(glob.glob(os.path.join(scriptPath, "*.ini"))):
+        if (os.path.basename(iniFileName) != "FC3DM_global.ini"):
+            iniFileNames.append(iniFileName)
+
+    iniFileNames.extend(sorted(glob.glob(os.path.join(scriptPath, "..", "Resistor_chip", "*.ini"))))
+
+    return iniFileNames
+
+
+###################################################################
+# FC3DM_GetModelKey()
+#	Function to get the name under which a model is stored in the
+# baseline:  its ini file, relative to the macros directory, with "/"
+# separators so that baselines may be shared between systems.
+###################################################################
+def FC3DM_GetModelKey(scriptPath, iniFileName):
+
+    return os.path.relpath(os.path.abspath(iniFileName), scriptPath).replace("\\", "/")
+
+
+###################################################################
+# FC3DM_Median()
+#	Function to get the median of a list of numbers.
+###################################################################
+def FC3DM_Median(values):
+
+    values = sorted(values)
+    mid = len(values) // 2
+    if (len(values) % 2 == 1):
+        return values[mid]
+
+    return (values[mid - 1] + values[mid]) / 2.0
+
+
+###################################################################
+# FC3DM_BenchmarkModel()
+#	Function to generate one model numRuns times, each in a fresh
+# FreeCADCmd process, and summarize the runs.  overrides are parm
+# overrides (see FC3DM_PARMS in FC3DM_ini.py) for every run.
+###################################################################
+def FC3DM_BenchmarkModel(freeCadCmd, batchScript, scriptPath,
+                         workRoot, iniFileName, numRuns,
+                         overrides):
+
+    modelKey = FC3DM_GetModelKey(scriptPath, iniFileName)
+    runs = []
+    for runNum in range(numRuns):
+
+        workDir = os.path.join(workRoot, os.path.splitext(os.path.basename(iniFileName))[0], "run%02d" % runNum)
+
+        # Write the model into this run's work directory, not over the shipped model.
+        # Our FreeCADCmd worker inherits our environment.
+        modelDir = os.path.join(workDir, "models").replace("\\", "/")
+        os.environ["FC3DM_PARMS"] = ";".join(['newModelPathRel = "' + modelDir + '"'] + overrides)
+        if (not os.path.isdir(modelDir)):
+            os.makedirs(modelDir)
+
+        results = FC3DM_RunWorker(freeCadCmd, batchScript, scriptPath,
+                                  workDir, [iniFileName])
+        result = results[0]
+        print("%4s %8.2f %s %s" % (str(result["rc"]), result["seconds"], modelKey, result["message"]))
+
+        # Give up on this model at its first failure
+        if (result["rc"] != 0):
+            return {"rc" : result["rc"], "message" : result["message"], "workDir" : workDir}
+
+        # Measure the STEP file that we wrote
+        if ("newStepPathNameExt" in result):
+            stepPathNameExt = os.path.normpath(result["newStepPathNameExt"])
+            if (os.path.isfile(stepPathNameExt)):
+                result["stepBytes"] = os.path.getsize(stepPathNameExt)
+
+        runs.append(result)
+
+    # Summarize the runs.  Times are medians, since they are noisy.
+    summary = {"rc" : 0, "runs" : numRuns}
+
+    for metric in timeMetrics:
+        summary[metric] = FC3DM_Median([run[metric] for run in runs])
+
+    summary["timings"] = {}
+    for stageName in runs[0].get("timings", {}).keys():
+        summary["timings"][stageName] = FC3DM_Median([run["timings"].get(stageName, 0.0) for run in runs])
+
+    for metric in sizeMetrics + ["faceCount"]:
+        values = [run[metric] for run in runs if (metric in run)]
+        if (len(values) > 0):
+            summary[metric] = max(values)
+
+    if ("geometryHash" in runs[-1]):
+        summary["geometryHash"] = runs[-1]["geometryHash"]
+
+    return summary
+
+
+###################################################################
+# FC3DM_CompareMetric()
+#	Function to compare one metric of a model against the baseline.
+# Returns a description of the regression, or None if there is none.
+###################################################################
+def FC3DM_CompareMetric(modelKey, metric,
+                        baseValue, value,
+                        threshold, minDelta):
+
+    if ( (baseValue == None) or (value == None) ):
+        return None
+
+    if ( (value > baseValue * (1.0 + threshold)) and (value - baseValue > minDelta) ):
+        return "%s: %s went from %s to %s (%+.1f%%)" % (modelKey, metric, str(baseValue), str(value),
+                                                      100.0 * (value - baseValue) / max(baseValue, 1e-9))
+
+    return None
+
+
+###################################################################
+# FC3DM_CompareToBaseline()
+#	Function to compare benchmark results against a baseline.  Returns
+# the list of regressions found, as text lines.
+###################################################################
+def FC3DM_CompareToBaseline(baseline, models,
+                            threshold, minSeconds):
+
+    regressions = []
+    for modelKey in sorted(models.keys()):
+
+        model = models[modelKey]
+        if ( (model["rc"] != 0) or (modelKey not in baseline["models"]) ):
+            continue
+        base = baseline["models"][modelKey]
+
+        checks = []
+        for metric in timeMetrics:
+            checks.append((metric, base.get(metric), model.get(metric), minSeconds))
+        for stageName in sorted(model.get("timings", {}).keys()):
+            checks.append(("timings." + stageName, base.get("timings", {}).get(stageName), model["timings"][stageName], minSeconds))
+        for metric in sizeMetrics:
+            checks.append((metric, base.get(metric), model.get(metric), 0))
+
+        for (metric, baseValue, value, minDelta) in checks:
+            regression = FC3DM_CompareMetric(modelKey, metric, baseValue, value, threshold, minDelta)
+            if (regression != None):
+                regressions.append(regression)
+
+        # The face count should not change at all, unless we meant it to
+        if ( ("faceCount" in base) and (base["faceCount"] != model.get("faceCount")) ):
+            regressions.append("%s: faceCount went from %s to %s" % (modelKey, str(base["faceCount"]), str(model.get("faceCount"))))
+
+    return regressions
+
+
+###################################################################
+# FC3DM_PrintSideBySide()
+#	Function to list the median time and face count of each model, side
+# by side with those in the baseline.
+###################################################################
+def FC3DM_PrintSideBySide(baseline, models):
+
+    print("%8s %8s %7s %10s %9s %s" % ("base s", "s", "change", "base faces", "faces", "model"))
+    for modelKey in sorted(models.keys()):
+
+        model = models[modelKey]
+        if ( (model["rc"] != 0) or (modelKey not in baseline["models"]) ):
+            continue
+        base = baseline["models"][modelKey]
+
+        print("%8.2f %8.2f %+6.1f%% %10s %9s %s" % (base["seconds"], model["seconds"],
+                                                   100.0 * (model["seconds"] - base["seconds"]) / max(base["seconds"], 1e-9),
+                                                   str(base.get("faceCount", "")), str(model.get("faceCount", "")), modelKey))
+
+    return 0
+
+
+###################################
+#### Main function
+###################################
+if (__name__ == "__main__"):
+
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Benchmark FC3DM 3D model generation against a stored baseline.")
+    parser.add_argument("iniFileNames", nargs="*",
+                        help="component-specific ini files to benchmark (default: all shipped ini files)")
+    parser.add_argument("-n", "--runs", type=int, default=3,
+                        help="number of times to generate each model (default: 3)")
+    parser.add_argument("--baseline", default=os.path.join(scriptPath, "FC3DM_benchmark_baseline.json"),
+                        help="JSON baseline to compare against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative growth of a metric that counts as a regression (default: 0.15)")
+    parser.add_argument("--min-seconds", type=float, default=0.25,
+                        help="smallest growth of a time that counts as a regression (default: 0.25)")
+    parser.add_argument("--freecad-cmd", default=FC3DM_FindFreeCadCmd(),
+                        help="path to FreeCADCmd")
+    parser.add_argument("--work-dir", default=os.path.join(scriptPath, "FC3DM_benchmark"),
+                        help="directory under which each run gets its own work directory")
+    parser.add_argument("--results", default=os.path.join(scriptPath, "FC3DM_benchmark_results.json"),
+                        help="JSON file to which the results of this benchmark are written")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a parm for every model, in ini file syntax (may be repeated)")
+    args = parser.parse_args()
+
+    # Every run should build its model, so turn off the caches, then apply any overrides
+    overrides = ['modelCacheDir = ""', 'shapeCacheDir = ""'] + args.set
+
+    iniFileNames = args.iniFileNames
+    if (len(iniFileNames) == 0):
+        iniFileNames = FC3DM_FindBenchmarkIniFiles(scriptPath)
+    iniFileNames = [os.path.abspath(i) for i in iniFileNames]
+
+    freeCadCmd = args.freecad_cmd
+    if (os.path.isfile(freeCadCmd)):
+        freeCadCmd = os.path.abspath(freeCadCmd)
+
+    # Benchmark all the models, one at a time
+    models = {}
+    for iniFileName in iniFileNames:
+        models[FC3DM_GetModelKey(scriptPath, iniFileName)] = FC3DM_BenchmarkModel(freeCadCmd,
+                                                                                 os.path.join(scriptPath, "FC3DM_IC_batch.py"),
+                                                                                 scriptPath,
+                                                                                 os.path.abspath(args.work_dir),
+                                                                                 iniFileName, max(1, args.runs),
+                                                                                 overrides)
+
+    benchmark = {"date" : time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "freeCadCmd" : freeCadCmd,
+                 "runs" : max(1, args.runs),
+                 "parms" : args.set,
+                 "models" : models}
+
+    fileP = open(args.results, "w")
+    json.dump(benchmark, fileP, indent=1, sort_keys=True)
+    fileP.close()
+
+    numFailed = len([model for model in models.values() if (model["rc"] != 0)])
+
+    # Compare against the baseline, or make this the baseline
+    regressions = []
+    if ( (args.update_baseline) or (not os.path.isfile(args.baseline)) ):
+        print("Writing new baseline " + args.baseline)
+        fileP = open(args.baseline, "w")
+        json.dump(benchmark, fileP, indent=1, sort_keys=True)
+        fileP.close()
+
+    else:
+        fileP = open(args.baseline, "r")
+        baseline = json.load(fileP)
+        fileP.close()
+
+        FC3DM_PrintSideBySide(baseline, models)
+
+        regressions = FC3DM_CompareToBaseline(baseline, models,
+                                              args.threshold, args.min_seconds)
+        for regression in regressions:
+            print("Regression: " + regression)
+
+    print("Benchmarked " + str(len(models) - numFailed) + " of " + str(len(models)) + " models, found " + str(len(regressions)) + " regressions.")
+
+    if ( (numFailed == 0) and (len(regressions) == 0) ):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,632 @@
+#================================================================================================
+#
+#	@file			FC3DM_cache.py
+#
+#	@brief			Python module to cache finished FC3DM models, keyed on their normalized parms,
+#					and the shapes (eg. template pins) that models are built from.
+#
+#	@details		
+#
+#    @version		0.2.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * Regenerating a footprint whose 3D model parameters did not change still runs the whole
+# * FreeCAD build, only for LPW to find afterwards that the log file is unchanged and revert
+# * the new files.  This module keeps a cache of finished models, so that such a build can
+# * simply hand back the files that it made last time.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * Each model is stored under a key, which is a hash of its normalized parm lines (see
+# * FC3DM_GetModelCacheKeyLines()) and a stamp of the generator code.  Parms that only say
+# * where the files go, or how the model is built, are left out, so that the same model gets
+# * the same key from any directory.  Options that change the files, such as instancedPins
+# * or compressStep, are part of the key.  The stamp is a hash of FC3DM_utils.py, FC3DM_graph.py, and
+# * FC3DM_ini.py (with line endings normalized), so changing the generator code invalidates
+# * all entries.  An entry holds the FCStd, STEP, log, and fingerprint files, and an
+# * entry.json that describes them.
+# * A cache hit copies the stored files to where the build would have written them.  Entries
+# * are written to a temporary directory first and then renamed into place, so that several
+# * FreeCAD processes may share one cache.  When the cache grows beyond its size limit, the
+# * least recently used entries are removed.
+# * A second cache, the shape cache, holds shapes that many models have in common, such as
+# * the template pins of a package family, or the body of parts that differ only in their
+# * pinout.  Its entries have the same layout, but hold BREP
+# * files, and are keyed on the kind of shape, the inputs that define it, and the generator
+# * stamp.  Reading and writing the BREP files is left to FC3DM_utils.py.
+# * This module does not import FreeCAD.  It also runs as a command:
+# *   python FC3DM_cache.py list [--shapes]
+# *   python FC3DM_cache.py verify [--remove] [--shapes]
+# *   python FC3DM_cache.py prune [--max-bytes N] [--shapes]
+# * The cache directory comes from modelCacheDir (or shapeCacheDir, with --shapes) in
+# * FC3DM_global.ini, unless --cache-dir is given.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * A cached STEP file is copied as is, so its header still names the file that it was
+# * first exported to.  There is no locking beyond the atomic rename, so an entry that is
+# * pruned by one process while another copies it out may give that process a cache miss.
+# ***************************************************************************
+
+
+###################################
+#### Load external libraries.
+###################################
+import argparse
+import hashlib
+import json
+import numbers
+import os
+import re
+import shutil
+import sys
+import time
+
+from FC3DM_ini import *
+
+# Bump this whenever the layout of cache entries changes
+modelCacheFormat = 2
+
+# Generator code whose contents are part of every cache key
+modelCacheGeneratorFiles = ["FC3DM_utils.py", "FC3DM_graph.py", "FC3DM_ini.py"]
+
+# Default size limit of the cache, in bytes
+modelCacheDefaultMaxBytes = 2 * 1024 * 1024 * 1024
+
+# Default size limit of the shape cache, in bytes
+shapeCacheDefaultMaxBytes = 256 * 1024 * 1024
+
+# Files that make up a cache entry:  (parm holding the path the build writes, name in the entry).
+# The STEP file is stored under its own extension (see FC3DM_GetModelCacheFiles()).
+modelCacheFiles = [("newModelPathNameExt", "model.FCStd"),
+                   ("newStepPathNameExt", "model"),
+                   ("logFilePathNameExt", "model.log"),
+                   ("fingerprintFilePathNameExt", "model.fingerprint")]
+
+# Parms that are left out of the model cache key.  These say where a model and its
+# inputs are (paths are relative to the current directory, or absolute), which caches
+# to use, how fast or how verbosely to build, or are derived from the other parms.
+# Every other parm, including options that change the files written, is in the key.
+modelCacheKeyIgnoredParms = ["iniFileName", "batchIniFileNames", "newModelPath", "newModelPathRel",
+                             "newModelPathNameExt", "newStepPathNameExt", "logFilePathNameExt",
+                             "fingerprintFilePathNameExt", "manifestFilePathNameExt", "debugFilePath",
+                             "docName", "footprintType", "hasEp", "pinTable", "fingerprint",
+                             "modelCacheDir", "modelCacheMaxBytes", "modelCacheKey",
+                             "shapeCacheDir", "shapeCacheMaxBytes",
+                             "inMemoryShapes", "deferredShapes", "graphThreads", "batchBodyCuts",
+                             "backgroundExport", "debugLevel", "debugWriterThread", "trace"]
+
+# Defaults of parms in the model cache key that the ini files may leave out.  Leaving
+# one out builds the same model as giving its default, so it gets the same key.
+modelCacheKeyDefaultParms = {"bodyBuilder" : "cuts", "pinBuilder" : "cuts"}
+
+# Generator stamps that we've already computed, keyed on script path
+generatorStamps = {}
+
+
+###################################################################
+# FC3DM_HashFile()
+#	Function to compute the SHA1 hash of a file's contents.
+###################################################################
+def FC3DM_HashFile(filePath):
+
+    hasher = hashlib.sha1()
+    fileP = open(filePath, "rb")
+    while (True):
+        block = fileP.read(1024 * 1024)
+        if (len(block) == 0):
+            break
+        hasher.update(block)
+    fileP.close()
+
+    return hasher.hexdigest()
+
+
+###################################################################
+# FC3DM_ComputeGeneratorStamp()
+#	Function to compute a stamp of the generator code in scriptPath.
+# Line endings are normalized, so that a CRLF and an LF checkout of the
+# same code get the same stamp.
+###################################################################
+def FC3DM_ComputeGeneratorStamp(scriptPath):
+
+    if (scriptPath in generatorStamps):
+        return generatorStamps[scriptPath]
+
+    hasher = hashlib.sha1()
+    hasher.update(("format %d\n" % modelCacheFormat).encode("utf-8"))
+    for fileName in modelCacheGeneratorFiles:
+        fileP = open(os.path.join(scriptPath, fileName), "rb")
+        hasher.update(fileName.encode("utf-8") + b"\n" + fileP.read().replace(b"\r", b""))
+        fileP.close()
+
+    generatorStamps[scriptPath] = hasher.hexdigest()
+
+    return generatorStamps[scriptPath]
+
+
+###################################################################
+# FC3DM_GetModelCacheKeyLines()
+#	Function to get the normalized "name=value" lines of the parms that
+# are part of the model cache key (see modelCacheKeyIgnoredParms).
+# Numbers are formatted alike, whether the ini file gave them as ints or
+# floats.  As in the features log, the revision digits of stepSuffix are
+# stripped, so that a new rev of the same model gets the same key.
+# Parms that the ini files leave out are taken at their defaults (see
+# modelCacheKeyDefaultParms).
+###################################################################
+def FC3DM_GetModelCacheKeyLines(parms):
+
+    keyParms = dict(modelCacheKeyDefaultParms)
+    keyParms.update(parms)
+
+    lines = []
+    for name in sorted(keyParms.keys()):
+        if (name in modelCacheKeyIgnoredParms):
+            continue
+
+        value = keyParms[name]
+        if ( (isinstance(value, numbers.Real)) and (not isinstance(value, bool)) ):
+            value = "%.9g" % value
+        elif (name == "stepSuffix"):
+            value = re.sub('[0-9]+$', '', value)
+        else:
+            value = FC3DM_FormatParmValue(value)
+
+        lines.append(name + "=" + value)
+
+    return lines
+
+
+###################################################################
+# FC3DM_ComputeModelCacheKey()
+#	Function to compute the cache key of a model, from its parms as
+# read by FC3DM_ParseIniFiles() and the generator code in scriptPath.
+###################################################################
+def FC3DM_ComputeModelCacheKey(scriptPath, parms):
+
+    hasher = hashlib.sha1()
+    hasher.update(("generator " + FC3DM_ComputeGeneratorStamp(scriptPath) + "\n").encode("utf-8"))
+    for line in FC3DM_GetModelCacheKeyLines(parms):
+        hasher.update((line + "\n").encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+###################################################################
+# FC3DM_ComputeShapeCacheKey()
+#	Function to compute the shape cache key of a shape, from the kind of
+# shape that it is (eg. "gullwingPin"), the dict of inputs that define
+# it, and the generator code in scriptPath.  Numbers are formatted alike,
+# whether the ini file gave them as ints or floats.
+###################################################################
+def FC3DM_ComputeShapeCacheKey(scriptPath, kind, inputs):
+
+    hasher = hashlib.sha1()
+    hasher.update(("generator " + FC3DM_ComputeGeneratorStamp(scriptPath) + "\n").encode("utf-8"))
+    hasher.update(("kind " + kind + "\n").encode("utf-8"))
+    for name in sorted(inputs.keys()):
+        value = inputs[name]
+        if (isinstance(value, (int, float))):
+            value = "%.9g" % value
+        hasher.update((name + " = " + str(value) + "\n").encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+###################################################################
+# FC3DM_GetModelCacheDir()
+#	Function to get the model cache directory from parms.  A relative
+# modelCacheDir is relative to scriptPath.  Returns "" if there is no cache.
+###################################################################
+def FC3DM_GetModelCacheDir(scriptPath, parms):
+
+    cacheDir = parms.get("modelCacheDir", "")
+    if (cacheDir == ""):
+        return ""
+
+    return os.path.abspath(os.path.join(scriptPath, cacheDir))
+
+
+###################################################################
+# FC3DM_GetShapeCacheDir()
+#	Function to get the shape cache directory from parms.  A relative
+# shapeCacheDir is relative to scriptPath.  Returns "" if there is no cache.
+###################################################################
+def FC3DM_GetShapeCacheDir(scriptPath, parms):
+
+    cacheDir = parms.get("shapeCacheDir", "")
+    if (cacheDir == ""):
+        return ""
+
+    return os.path.abspath(os.path.join(scriptPath, cacheDir))
+
+
+###################################################################
+# FC3DM_GetModelCacheEntryDir()
+#	Function to get the directory of the cache entry with the given key.
+###################################################################
+def FC3DM_GetModelCacheEntryDir(cacheDir, key):
+
+    return os.path.join(cacheDir, key[0:2], key)
+
+
+###################################################################
+# FC3DM_ReadModelCacheEntry()
+#	Function to read the entry.json of a cache entry.  Returns None if
+# there is no such entry, or it can't be read.
+###################################################################
+def FC3DM_ReadModelCacheEntry(entryDir):
+
+    try:
+        fileP = open(os.path.join(entryDir, "entry.json"), "r")
+        entry = json.load(fileP)
+        fileP.close()
+    except (IOError, OSError, ValueError):
+        return None
+
+    return entry
+
+
+###################################################################
+# FC3DM_LookUpCacheEntry()
+#	Function to look up the entry with the given key, in either cache.
+# Returns (entryDir, entry), if there is such an entry and all its files
+# are there.  Returns None otherwise.
+###################################################################
+def FC3DM_LookUpCacheEntry(cacheDir, key):
+
+    entryDir = FC3DM_GetModelCacheEntryDir(cacheDir, key)
+    entry = FC3DM_ReadModelCacheEntry(entryDir)
+    if (entry == None):
+        return None
+
+    # Make sure that the entry is complete, before anyone reads from it
+    for fileName in entry["files"].keys():
+        if (not os.path.isfile(os.path.join(entryDir, fileName))):
+            return None
+        if (os.path.getsize(os.path.join(entryDir, fileName)) != entry["files"][fileName]["bytes"]):
+            return None
+
+    return (entryDir, entry)
+
+
+###################################################################
+# FC3DM_GetModelCacheFiles()
+#	Function to get the files of a cache entry for the model described
+# by parms, as (parm holding the path, name in the entry) pairs.  The
+# STEP file is named by the extension that parms give it (eg. "model.step"
+# or, with compressStep, "model.stpZ"), so that a plain and a compressed
+# STEP file are never mistaken for each other.
+###################################################################
+def FC3DM_GetModelCacheFiles(parms):
+
+    files = []
+    for (parmName, fileName) in modelCacheFiles:
+        if (parmName == "newStepPathNameExt"):
+            fileName = fileName + os.path.splitext(parms[parmName])[1]
+        files.append((parmName, fileName))
+
+    return files
+
+
+###################################################################
+# FC3DM_FetchFromModelCache()
+#	Function to look up a model in the cache.  On a hit, the stored files
+# are copied to where the build would have written them (the paths in
+# parms), and the entry's stored results (eg. fingerprint) are returned.
+# Returns None on a miss.
+###################################################################
+def FC3DM_FetchFromModelCache(cacheDir, key, parms):
+
+    found = FC3DM_LookUpCacheEntry(cacheDir, key)
+    if (found == None):
+        return None
+    (entryDir, entry) = found
+
+    # An entry without the STEP file that we need is no good to us
+    files = FC3DM_GetModelCacheFiles(parms)
+    if (dict(files)["newStepPathNameExt"] not in entry["files"]):
+        return None
+
+    try:
+        for (parmName, fileName) in files:
+            if (fileName in entry["files"]):
+                shutil.copyfile(os.path.join(entryDir, fileName), parms[parmName])
+
+        # Mark this entry as recently used
+        os.utime(os.path.join(entryDir, "entry.json"), None)
+
+    # The entry was pruned while we were copying it out
+    except (IOError, OSError):
+        return None
+
+    return entry.get("results", {})
+
+
+###################################################################
+# FC3DM_StoreInModelCache()
+#	Function to store a freshly built model in the cache, along with
+# results (eg. fingerprint) to hand back on a hit.  Then prunes the cache
+# down to maxBytes.
+###################################################################
+def FC3DM_StoreInModelCache(cacheDir, key, parms, results,
+                            maxBytes=modelCacheDefaultMaxBytes):
+
+    # Store the files that the build wrote
+    filePaths = []
+    for (parmName, fileName) in FC3DM_GetModelCacheFiles(parms):
+        if ( (parmName in parms) and (os.path.isfile(parms[parmName])) ):
+            filePaths.append((parms[parmName], fileName))
+
+    FC3DM_StoreCacheEntry(cacheDir, key,
+                          {"newModelName" : parms["newModelName"],
+                           "results" : results},
+                          filePaths, maxBytes)
+
+    return 0
+
+
+###################################################################
+# FC3DM_StoreCacheEntry()
+#	Function to store an entry in either cache.  The entry.json holds
+# info (a dict), plus the key, the time, and the size and hash of each
+# file.  filePaths lists (path of file to copy, name in the entry).
+# Then prunes the cache down to maxBytes.
+###################################################################
+def FC3DM_StoreCacheEntry(cacheDir, key, info, filePaths,
+                          maxBytes):
+
+    entryDir = FC3DM_GetModelCacheEntryDir(cacheDir, key)
+    if (os.path.isdir(entryDir)):
+        return 0
+
+    # Build the entry in a temporary directory
+    tempDir = os.path.join(cacheDir, "tmp-%d-%d" % (os.getpid(), int(time.time() * 1000)))
+    os.makedirs(tempDir)
+
+    entry = dict(info)
+    entry["key"] = key
+    entry["created"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    entry["files"] = {}
+    for (filePath, fileName) in filePaths:
+        shutil.copyfile(filePath, os.path.join(tempDir, fileName))
+        entry["files"][fileName] = {"bytes" : os.path.getsize(os.path.join(tempDir, fileName)),
+                                    "sha1" : FC3DM_HashFile(os.path.join(tempDir, fileName))}
+
+    fileP = open(os.path.join(tempDir, "entry.json"), "w")
+    json.dump(entry, fileP, indent=1, sort_keys=True)
+    fileP.close()
+
+    # Move it into place.  If another process beat us to it, keep theirs.
+    try:
+        if (not os.path.isdir(os.path.dirname(entryDir))):
+            os.makedirs(os.path.dirname(entryDir))
+        os.rename(tempDir, entryDir)
+    except OSError:
+        shutil.rmtree(tempDir, True)
+
+    FC3DM_PruneModelCache(cacheDir, maxBytes)
+
+    return 0
+
+
+###################################################################
+# FC3DM_ListModelCache()
+#	Function to list all entries in the cache, least recently used
+# first.  Each is a dict with entryDir, key, bytes, and lastUsed.
+###################################################################
+def FC3DM_ListModelCache(cacheDir):
+
+    entries = []
+    if (not os.path.isdir(cacheDir)):
+        return entries
+
+    for prefix in sorted(os.listdir(cacheDir)):
+        prefixDir = os.path.join(cacheDir, prefix)
+        if ( (len(prefix) != 2) or (not os.path.isdir(prefixDir)) ):
+            continue
+
+        for key in sorted(os.listdir(prefixDir)):
+            entryDir = os.path.join(prefixDir, key)
+            entryFile = os.path.join(entryDir, "entry.json")
+            if (not os.path.isfile(entryFile)):
+                continue
+
+            numBytes = 0
+            for fileName in os.listdir(entryDir):
+                numBytes = numBytes + os.path.getsize(os.path.join(entryDir, fileName))
+
+            entries.append({"entryDir" : entryDir,
+                            "key" : key,
+                            "bytes" : numBytes,
+                            "lastUsed" : os.path.getmtime(entryFile)})
+
+    entries.sort(key=lambda entry: entry["lastUsed"])
+
+    return entries
+
+
+###################################################################
+# FC3DM_PruneModelCache()
+#	Function to remove least recently used entries until the cache is no
+# bigger than maxBytes.  Also removes temporary directories left behind
+# by builds that died part way through storing an entry.
+# Returns the number of entries removed.
+###################################################################
+def FC3DM_PruneModelCache(cacheDir, maxBytes):
+
+    # Remove stale temporary directories, more than an hour old
+    if (os.path.isdir(cacheDir)):
+        for name in os.listdir(cacheDir):
+            tempDir = os.path.join(cacheDir, name)
+            if ( (name.startswith("tmp-")) and (os.path.getmtime(tempDir) < time.time() - 3600) ):
+                shutil.rmtree(tempDir, True)
+
+    entries = FC3DM_ListModelCache(cacheDir)
+    totalBytes = sum([entry["bytes"] for entry in entries])
+
+    numRemoved = 0
+    for entry in entries:
+        if (totalBytes <= maxBytes):
+            break
+
+        shutil.rmtree(entry["entryDir"], True)
+        totalBytes = totalBytes - entry["bytes"]
+        numRemoved = numRemoved + 1
+
+    return numRemoved
+
+
+###################################################################
+# FC3DM_VerifyModelCache()
+#	Function to check every file of every entry against the size and
+# hash recorded when it was stored.  Bad entries are removed if remove
+# is True.  Returns the list of bad entry directories.
+###################################################################
+def FC3DM_VerifyModelCache(cacheDir, remove):
+
+    badEntryDirs = []
+    for listed in FC3DM_ListModelCache(cacheDir):
+
+        entryDir = listed["entryDir"]
+        entry = FC3DM_ReadModelCacheEntry(entryDir)
+        ok = ( (entry != None) and (entry.get("key") == listed["key"]) )
+
+        if (ok):
+            for fileName in entry["files"].keys():
+                filePath = os.path.join(entryDir, fileName)
+                if ( (not os.path.isfile(filePath)) or
+                     (os.path.getsize(filePath) != entry["files"][fileName]["bytes"]) or
+                     (FC3DM_HashFile(filePath) != entry["files"][fileName]["sha1"]) ):
+                    ok = False
+
+        if (not ok):
+            badEntryDirs.append(entryDir)
+            if (remove):
+                shutil.rmtree(entryDir, True)
+
+    return badEntryDirs
+
+
+###################################
+#### Main function
+###################################
+if (__name__ == "__main__"):
+
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="List, verify, or prune the FC3DM model cache (or shape cache).")
+    parser.add_argument("command", choices=["list", "verify", "prune"],
+                        help="what to do")
+    parser.add_argument("--shapes", action="store_true",
+                        help="work on the shape cache, instead of the model cache")
+    parser.add_argument("--cache-dir", default="",
+                        help="cache directory (default: modelCacheDir, or shapeCacheDir, in FC3DM_global.ini)")
+    parser.add_argument("--max-bytes", type=int, default=-1,
+                        help="size to prune the cache down to (default: modelCacheMaxBytes in FC3DM_global.ini, or 2 GB; shapeCacheMaxBytes, or 256 MB)")
+    parser.add_argument("--remove", action="store_true",
+                        help="with verify, remove bad entries")
+    args = parser.parse_args()
+
+    # Get defaults from the global ini file
+    globalParms = {}
+    if (os.path.isfile(os.path.join(scriptPath, "FC3DM_global.ini"))):
+        FC3DM_ReadIniFile(os.path.join(scriptPath, "FC3DM_global.ini"),
+                          globalParms, False)
+
+    cacheDir = args.cache_dir
+    if ( (cacheDir == "") and (args.shapes) ):
+        cacheDir = FC3DM_GetShapeCacheDir(scriptPath, globalParms)
+    elif (cacheDir == ""):
+        cacheDir = FC3DM_GetModelCacheDir(scriptPath, globalParms)
+    if (cacheDir == ""):
+        print("No cache directory.  Set modelCacheDir (or shapeCacheDir) in FC3DM_global.ini, or give --cache-dir.")
+        sys.exit(1)
+
+    maxBytes = args.max_bytes
+    if ( (maxBytes < 0) and (args.shapes) ):
+        maxBytes = globalParms.get("shapeCacheMaxBytes", shapeCacheDefaultMaxBytes)
+    elif (maxBytes < 0):
+        maxBytes = globalParms.get("modelCacheMaxBytes", modelCacheDefaultMaxBytes)
+
+    if (args.command == "list"):
+        entries = FC3DM_ListModelCache(cacheDir)
+        for entry in entries:
+            print("%s %10d %s" % (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["lastUsed"])), entry["bytes"], entry["key"]))
+        print(str(len(entries)) + " entries, " + str(sum([entry["bytes"] for entry in entries])) + " bytes.")
+
+    elif (args.command == "verify"):
+        badEntryDirs = FC3DM_VerifyModelCache(cacheDir, args.remove)
+        for entryDir in badEntryDirs:
+            print("Bad entry: " + entryDir)
+        print(str(len(badEntryDirs)) + " bad entries.")
+        if (len(badEntryDirs) > 0):
+            sys.exit(1)
+
+    else:
+        numRemoved = FC3DM_PruneModelCache(cacheDir, maxBytes)
+        print("Removed " + str(numRemoved) + " entries.")
+
+    sys.exit(0)
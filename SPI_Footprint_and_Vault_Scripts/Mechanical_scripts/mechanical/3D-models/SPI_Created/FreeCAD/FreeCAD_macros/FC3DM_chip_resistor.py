@@ -6,7 +6,7 @@
 #
 #	@details		
 #
-#    @version		0.2.3
+#    @version		0.3.0
 #					   $Rev::                                                                        $:
 #	@date			  $Date::                                                                        $:
 #	@author			$Author::                                                                        $:
@@ -101,161 +101,13 @@ from FC3DM_utils import *
 #### Main function
 ###################################
 
-
-
-###################################
-#### Read ini files to get all our parameters.
-###################################
-
-# Clear the parms associative array
-parms = {}
-
-# Workaround needed because otherwise parms doesn't actually get created until
-# after the function call, and then we end up with a reference to a blank parms dict.
-parms["foo"] = "bar"
-
-# Read both the global and component-specific ini files.
-FC3DM_ReadIniFiles(scriptPath, parms)
-
-# Write parms to console window
-print "Back in main(), Parms are:"
-print parms
-
-
-###################################
-#### Main function
-###################################
-
-# Open the debug file
-FC3DM_OpenDebugFile(parms)
-
-# Write parms to debug file
-FC3DM_WriteToDebugFile("After call to FC3DM_ReadIniFiles(), parms is: " + str(parms))    
-
-
-###################################
-## Prepare for next model
-###################################
-bodyName = parms["bodyName"]
-moldName = parms["moldName"]
-pin1Name = parms["pin1Name"]
-pin2Name = parms["pin2Name"]
-
-docName = parms["docName"]
-
-
-# Create new document
-App.newDocument(docName)
-App.setActiveDocument(docName)
-App.ActiveDocument=App.getDocument(docName)
-Gui.ActiveDocument=Gui.getDocument(docName)
-
-
-# Setup parameters related to the chip component body
-L = parms["L"] 		# Length of chip resistor
-W = parms["W"] 		# Width of chip resistor
-T = parms["T"] 		# Distance from furthest length to end of termination
-H = parms["H"] 		# Height of chip resistor
-K = parms["K"] 		# Should be 0 always
-termThickness = parms["termThickness"]
-
-# Tweak these to reflect only the white substrate
-bodyH = H-(termThickness)
-bodyL = L-(2*termThickness)
-bodyK = termThickness
-
-# Create a box to represent the white substrate of the SMT fuse
-rotDeg = 0
-FC3DM_CreateAndCenterBox(App, Gui,
-                         bodyL, W, bodyH, bodyK,
-                         rotDeg, 
-                         docName,
-                         bodyName)
-
-
-# Create left side chip component termination
-termL = T
-termX = -1*(L/2)
-termY = -1*(W/2)
-FC3DM_CreateBox(App, Gui,
-                termL, W, H, K,
-                termX, termY, rotDeg, 
-                docName,
-                pin1Name)
-    
-# Cut out the part of the termination that overlaps with the body
-FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
-                                   docName, pin1Name, bodyName)
-
-# Fillet the outside edges of this termination
-edges = ["Edge2","Edge4"]
-radius = (termThickness)
-FC3DM_FilletObjectEdges(App, Gui,
-                        docName, pin1Name, edges, radius)
-
-# Copy pin 1 to pin 2
-FC3DM_CopyObject(App, Gui,
-                 0, 0, 180, 
-                 docName,
-                 pin1Name,
-                 pin2Name)
-
-# Create a box to represent the overmold
-moldL = L-(2*T)
-moldH = bodyH + (termThickness)
-moldK = bodyH
-rotDeg = 0
-FC3DM_CreateAndCenterBox(App, Gui,
-                         moldL, W, moldH, moldK,
-                         rotDeg, 
-                         docName,
-                         moldName)
-
-
-## Fillet the outside edges of this overmold
-#edges = ["Edge2","Edge6","Edge10","Edge12"]
-#radius = termThickness
-#FC3DM_FilletObjectEdges(App, Gui,
-#                        docName, moldName, edges, radius)
-
-
-# The FC3DM_FuseSetOfObjects() and FC3DM_DescribeObjectsToLogFile() functions expect a "pin1MarkName",
-# which we don't have.  But we do have a "moldName", so trick it.
-parms["pin1MarkName"] = parms["moldName"]
-
-# Describe all objects in this component to a logfile.
-pinNames = []
-pinNames.append(pin1Name)
-pinNames.append(pin2Name)
-FC3DM_DescribeObjectsToLogFile(App, Gui,
-                               parms, pinNames,
-                               docName)
-
-
-# Fuse all objects together & retain proper coloring
-objNameList = []
-objNameList.append(pin1Name)
-objNameList.append(pin2Name)
-objNameList.append(bodyName)
-objNameList.append(moldName)
-fusionName = docName
-FC3DM_FuseSetOfObjects(App, Gui,
-                       parms,
-                       docName, objNameList, fusionName)
-
-# Zoom in
-App.ActiveDocument.recompute()
-Gui.SendMsgToActiveView("ViewFit")
-
-# Save file to native format and export to STEP
-objNameList = [fusionName]
-FC3DM_SaveAndExport(App, Gui,
-                    docName,
-                    parms,
-                    objNameList)
-
-# Save and close debug file.
-FC3DM_CloseDebugFile()
+# Create the model.  FC3DM_GenerateIcModel() reads our ini files, and builds a chip
+# resistor when they say compType = "chipResistor".  This way the batch runners and
+# benchmark build chip resistors too.
+result = {}
+FC3DM_GenerateIcModel(App, Gui,
+                      scriptPath, "",
+                      result)
 
 # Exit with success return code.
 #FC3DM_MyExit(0)
@@ -0,0 +1,173 @@
+#================================================================================================
+#
+#	@file			FC3DM_client.py
+#
+#	@brief			Python script to send a request to a running FC3DM server.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * This script is the client for FC3DM_server.py.  It is run with a plain python
+# * interpreter (it does not import FreeCAD), so it starts in a fraction of a second.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * This script sends one request to a running FC3DM server and prints the JSON
+# * answer.  For example:
+# *   python FC3DM_client.py generate SOP65P640X120-20N_TI_PW-20_Blk_BLNK_IPC_LPW.ini
+# *   python FC3DM_client.py generate --rc-file python.rc
+# *   python FC3DM_client.py shutdown
+# * With --rc-file, the model's return code is written to that file, just as
+# * FC3DM_MyExit() would.  This lets a caller that waits for python.rc use the
+# * server in place of launching FreeCAD.  The server is found via the same
+# * FC3DM_SERVER_PORT and FC3DM_SERVER_SOCKET environment variables (or the --port
+# * and --socket options).  The exit code is 0 if the request succeeded.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script will not start the server.
+# ***************************************************************************
+
+###################################
+#### Load external libraries.
+###################################
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Default TCP port (must match FC3DM_server.py)
+defaultServerPort = 50731
+
+
+###################################################################
+# FC3DM_SendServerRequest()
+#	Function to send one request to the FC3DM server and return its
+# response dict.
+###################################################################
+def FC3DM_SendServerRequest(request, port, socketPath):
+
+    # Connect to the server
+    if ( (socketPath != "") and hasattr(socket, "AF_UNIX") ):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(socketPath)
+    else:
+        conn = socket.create_connection(("127.0.0.1", port))
+
+    # One JSON request per line, one JSON response per line
+    wfile = conn.makefile("w")
+    rfile = conn.makefile("r")
+    wfile.write(json.dumps(request) + "\n")
+    wfile.flush()
+    line = rfile.readline()
+
+    wfile.close()
+    rfile.close()
+    conn.close()
+
+    if (line == ""):
+        return {"rc" : -1, "message" : "Server closed the connection without answering."}
+
+    return json.loads(line)
+
+
+###################################
+#### Main function
+###################################
+if (__name__ == "__main__"):
+
+    parser = argparse.ArgumentParser(description="Send a request to a running FC3DM server.")
+    parser.add_argument("cmd", choices=["generate", "ping", "reload", "shutdown"])
+    parser.add_argument("iniFileName", nargs="?", default="",
+                        help="component ini file to generate (default: the pointer in FC3DM_global.ini)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FC3DM_SERVER_PORT", defaultServerPort)))
+    parser.add_argument("--socket", default=os.environ.get("FC3DM_SERVER_SOCKET", ""))
+    parser.add_argument("--rc-file", default="",
+                        help="file to which to write the return code, as FC3DM_MyExit() does")
+    args = parser.parse_args()
+
+    request = {"cmd" : args.cmd}
+    if (args.cmd == "generate"):
+        request["iniFileName"] = args.iniFileName
+
+    try:
+        response = FC3DM_SendServerRequest(request, args.port, args.socket)
+    except socket.error as e:
+        response = {"rc" : -1, "message" : "Could not talk to FC3DM server: " + str(e)}
+
+    print(json.dumps(response, indent=1, sort_keys=True))
+
+    # Write return code to rc file, if asked to
+    if (args.rc_file != ""):
+        fileP = open(args.rc_file, "w")
+        fileP.write(str(response["rc"]))
+        fileP.close()
+
+    if (response["rc"] == 0):
+        sys.exit(0)
+    else:
+        sys.exit(1)
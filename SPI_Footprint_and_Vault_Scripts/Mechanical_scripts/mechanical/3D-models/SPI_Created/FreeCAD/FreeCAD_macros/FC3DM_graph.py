@@ -0,0 +1,802 @@
+#================================================================================================
+#
+#	@file			FC3DM_graph.py
+#
+#	@brief			Python module to record FC3DM shape operations as a graph and evaluate them in one pass.
+#
+#	@details		
+#
+#    @version		0.2.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * FC3DM_utils.py builds a model out of a long series of primitive operations
+# * (boxes, cylinders, molded bodies, gullwing pins, placements, cuts, fuses, fillets
+# * and chamfers).  When
+# * FC3DM_utils.py works on in-memory shapes, it records each operation here as a node
+# * in an operation graph, rather than computing it right away.  The graph is then
+# * evaluated in one pass when the shapes are actually needed.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * Each node is identified by a key, which is a hash of its operation, its arguments,
+# * and the keys of its inputs.  Adding an operation that is already in the graph
+# * returns the existing node, so common subexpressions are only computed once.  The
+# * key of a node covers everything needed to compute it, so it may also be used as a
+# * cache key for the resulting shape.
+# * Evaluation walks the graph in order of depth.  Nodes of the same depth do not
+# * depend on each other, so they may be evaluated by several threads at once.
+# * Whether this actually runs faster depends on whether the FreeCAD build releases
+# * the python GIL during OpenCASCADE operations.
+# * The graph may be dumped as text, one node per line, for inspection.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script does not know about FreeCAD documents, object names, or colors.  Those
+# * stay in FC3DM_utils.py.  Shapes computed here are never modified after the fact,
+# * since they may be shared between several objects.
+# ***************************************************************************
+
+
+###################################
+#### Load external libraries.
+###################################
+import FreeCAD
+import Part
+import hashlib
+import math
+import threading
+import uuid
+from FC3DM_trace import FC3DM_CountTraceOp
+
+# How close (in mm) a point must be to count as on an edge, or at a coordinate,
+# when selecting edges by geometry
+edgeSelectorTolerance = 1e-6
+
+
+###################################################################
+# FC3DM_NewGraph()
+#	Function to create a new, empty operation graph.
+#
+# nodes  == list of nodes, indexed by node id.  Each node is a dict with
+#           op, args, inputs (node ids), depth, and key.
+# index  == maps node key to node id
+# values == maps node id to its shape, once evaluated
+# hits   == number of times that an added node was already in the graph
+# faceSources == maps fuse node id to the list, per face of its shape, of
+#           the positions of the inputs that the face came from
+###################################################################
+def FC3DM_NewGraph():
+
+    graph = {}
+    graph["nodes"] = []
+    graph["index"] = {}
+    graph["values"] = {}
+    graph["hits"] = 0
+    graph["faceSources"] = {}
+
+    return graph
+
+
+###################################################################
+# FC3DM_AddGraphNode()
+#	Function to add an operation to the graph, and return its node id.
+# If an identical operation on identical inputs is already in the graph,
+# its node id is returned instead.
+#
+# args must be a tuple of numbers, strings, and tuples of the same,
+# so that repr() of it is stable.
+###################################################################
+def FC3DM_AddGraphNode(graph,
+                       op, args, inputs):
+
+    # Compute the key of this node from its operation, arguments, and inputs
+    hasher = hashlib.sha1()
+    hasher.update((op + repr(args)).encode("utf-8"))
+    for inputId in inputs:
+        hasher.update(graph["nodes"][inputId]["key"].encode("utf-8"))
+    key = hasher.hexdigest()
+
+    # See if we already have this node
+    if (key in graph["index"]):
+        graph["hits"] = graph["hits"] + 1
+        return graph["index"][key]
+
+    # Nodes without inputs are at depth 0.  Others are one deeper than their deepest input.
+    depth = 0
+    for inputId in inputs:
+        depth = max(depth, graph["nodes"][inputId]["depth"] + 1)
+
+    node = {}
+    node["op"] = op
+    node["args"] = args
+    node["inputs"] = tuple(inputs)
+    node["depth"] = depth
+    node["key"] = key
+
+    nodeId = len(graph["nodes"])
+    graph["nodes"].append(node)
+    graph["index"][key] = nodeId
+
+    return nodeId
+
+
+###################################################################
+# FC3DM_AddGraphValue()
+#	Function to add an already computed shape to the graph, as a node
+# of its own.  Such a node can never be shared, since we cannot tell
+# what it was computed from, unless source identifies the shape (eg. a
+# shape cache key).
+###################################################################
+def FC3DM_AddGraphValue(graph,
+                        shape, source=""):
+
+    # Make the key unique, in every graph and every run, unless we know where the shape came from
+    if (source == ""):
+        args = (uuid.uuid4().hex,)
+    else:
+        args = (source,)
+
+    nodeId = FC3DM_AddGraphNode(graph,
+                                "shape", args, [])
+    if (not nodeId in graph["values"]):
+        graph["values"][nodeId] = shape
+
+    return nodeId
+
+
+###################################################################
+# FC3DM_GetGraphKey()
+#	Function to get the key of a node.  Two nodes with the same key
+# compute the same shape, even across graphs and across runs.  (Shapes
+# added by FC3DM_AddGraphValue() without a source get a random key, so
+# they never share a key with any other shape.)
+###################################################################
+def FC3DM_GetGraphKey(graph,
+                      nodeId):
+
+    return graph["nodes"][nodeId]["key"]
+
+
+###################################################################
+# FC3DM_GetGraphInstance()
+#	Function to see whether a node is just another shape put in a new
+# place.  If so, returns (templateNodeId, placement tuple).  Otherwise
+# returns None.
+###################################################################
+def FC3DM_GetGraphInstance(graph,
+                           nodeId):
+
+    node = graph["nodes"][nodeId]
+    if (node["op"] != "placement"):
+        return None
+
+    return (node["inputs"][0], node["args"][0])
+
+
+###################################################################
+# FC3DM_PlacementToTuple()
+#	Function to convert a placement to a tuple (x, y, z, q0, q1, q2, q3),
+# for use as a graph node argument.
+###################################################################
+def FC3DM_PlacementToTuple(placement):
+
+    base = placement.Base
+    q = placement.Rotation.Q
+
+    return (base.x, base.y, base.z, q[0], q[1], q[2], q[3])
+
+
+###################################################################
+# FC3DM_TupleToPlacement()
+#	Function to convert a tuple from FC3DM_PlacementToTuple() back
+# to a placement.
+###################################################################
+def FC3DM_TupleToPlacement(App,
+                           t):
+
+    return App.Placement(App.Vector(t[0], t[1], t[2]), App.Rotation(t[3], t[4], t[5], t[6]))
+
+
+###################################################################
+# FC3DM_EdgeMatchesSelector()
+#	Function to see whether an edge matches a geometric edge selector
+# (see FC3DM_SelectEdges()).
+###################################################################
+def FC3DM_EdgeMatchesSelector(edge, selector):
+
+    if (selector[0] == "all"):
+        return True
+
+    # Every vertex of the edge is at the given x, y, or z
+    if (selector[0] == "at"):
+        for vertex in edge.Vertexes:
+            if (abs(getattr(vertex.Point, selector[1]) - selector[2]) > edgeSelectorTolerance):
+                return False
+        return True
+
+    # The edge is straight, and parallel to the x, y, or z axis
+    if (selector[0] == "along"):
+        if (len(edge.Vertexes) != 2):
+            return False
+        delta = edge.Vertexes[1].Point.sub(edge.Vertexes[0].Point)
+        if (abs(delta.Length - edge.Length) > edgeSelectorTolerance):
+            return False
+        for axis in ["x", "y", "z"]:
+            if ( (axis != selector[1]) and (abs(getattr(delta, axis)) > edgeSelectorTolerance) ):
+                return False
+        return True
+
+    raise ValueError("Unsupported edge selector " + repr(selector))
+
+
+###################################################################
+# FC3DM_SelectEdges()
+#	Function to find the edges of a shape that any of a list of edge
+# selectors select.  Returns their positions in shape.Edges, in order.
+#
+# Selectors are tuples of strings and numbers, so that they may be graph
+# node arguments:
+# "Edge4"                 the edge of that FreeCAD sub-element name, the
+#                         same names that PartDesign fillets and chamfers take
+# ("at", "z", 0.5)        edges with every vertex at z = 0.5 (or x, or y)
+# ("along", "z")          straight edges parallel to the z axis (or x, or y)
+# ("all",)                every edge
+# Geometric selectors work in the coordinates of the shape as placed.
+###################################################################
+def FC3DM_SelectEdges(shape, selectors):
+
+    edges = shape.Edges
+    positions = set()
+    for selector in selectors:
+        if (isinstance(selector, str)):
+            positions.add(int(selector[4:]) - 1)
+        else:
+            for i in range(len(edges)):
+                if (FC3DM_EdgeMatchesSelector(edges[i], selector)):
+                    positions.add(i)
+
+    return sorted(positions)
+
+
+###################################################################
+# FC3DM_FindEdgesAfter()
+#	Function to find the edges of a shape that are what is left of some
+# edges of an earlier version of that shape, after a fillet or chamfer:
+# those whose middle lies on one of the earlier edges.
+###################################################################
+def FC3DM_FindEdgesAfter(oldEdges, shape):
+
+    edges = []
+    for edge in shape.Edges:
+        mid = edge.valueAt((edge.FirstParameter + edge.LastParameter) / 2.0)
+        for oldEdge in oldEdges:
+            if (oldEdge.distToShape(Part.Vertex(mid))[0] <= edgeSelectorTolerance):
+                edges.append(edge)
+                break
+
+    return edges
+
+
+###################################################################
+# FC3DM_MakeEdgeFinish()
+#	Function to fillet or chamfer (op) edges of a shape, directly with
+# the OpenCASCADE makeFillet() and makeChamfer(), without PartDesign.
+# groups is a list of (radius, selectors) pairs (see FC3DM_SelectEdges()),
+# where radius is the chamfer size for a chamfer.
+#
+# All selectors are resolved against the shape as given.  Groups of the
+# same radius are done in one call.  Since makeFillet() and makeChamfer()
+# take one radius per call, other radii are done in turn, on what is left
+# of their edges.  We work in the shape's own coordinates and give the
+# result the placement of the original shape, as PartDesign does.
+###################################################################
+def FC3DM_MakeEdgeFinish(App,
+                         shape, op, groups):
+
+    FC3DM_CountTraceOp(op)
+    local = shape.copy()
+    local.Placement = App.Placement()
+
+    # Collect the edges of each radius, in the order that the radii come
+    radii = []
+    edgesByRadius = {}
+    for (radius, selectors) in groups:
+        if (radius not in edgesByRadius):
+            radii.append(radius)
+            edgesByRadius[radius] = []
+        for i in FC3DM_SelectEdges(shape, selectors):
+            edgesByRadius[radius].append(local.Edges[i])
+
+    result = local
+    for radius in radii:
+        edges = edgesByRadius[radius]
+        if (result is not local):
+            edges = FC3DM_FindEdgesAfter(edges, result)
+
+        if (op == "fillet"):
+            result = result.makeFillet(radius, edges)
+        else:
+            result = result.makeChamfer(radius, edges)
+
+    result.Placement = shape.Placement
+
+    return result
+
+
+###################################################################
+# FC3DM_MakeMoldedBody()
+#	Function to make a molded IC body, centered on the z axis, as one
+# ruled loft through its rectangular cross sections.  Above the high pivot
+# point (Hpph) and below the low pivot point (Hppl), each side slopes
+# inward at the mold angle.  Without a mold angle, the body is a box.
+###################################################################
+def FC3DM_MakeMoldedBody(App,
+                         A, B, H, K, maDeg, Hpph, Hppl):
+
+    if (maDeg <= 0):
+        shape = Part.makeBox(A, B, H-K)
+        shape.translate(App.Vector(-1*(A/2), -1*(B/2), K))
+        return shape
+
+    tanMa = math.tan(math.radians(maDeg))
+    zLow = max(Hppl, K)
+    zHigh = min(Hpph, H)
+
+    # (height, inset) of each cross section, from the bottom up
+    sections = []
+    if (zLow > K):
+        sections.append((K, (zLow-K) * tanMa))
+    sections.append((zLow, 0.0))
+    if (zHigh > zLow):
+        sections.append((zHigh, 0.0))
+    if (H > zHigh):
+        sections.append((H, (H-zHigh) * tanMa))
+
+    wires = []
+    for (z, inset) in sections:
+        x = (A/2) - inset
+        y = (B/2) - inset
+        wires.append(Part.makePolygon([App.Vector(-x, -y, z), App.Vector(x, -y, z),
+                                       App.Vector(x, y, z), App.Vector(-x, y, z),
+                                       App.Vector(-x, -y, z)]))
+
+    return Part.makeLoft(wires, True, True)
+
+
+###################################################################
+# FC3DM_MakeGullwingPin()
+#	Function to make an east side gullwing pin, by sweeping its W wide
+# cross section along its centerline:  out of the body at height Hpe,
+# down to the PCB, and out along the landing.  Since the cross section
+# does not turn, the sweep is done as one extrusion of the side profile
+# of the pin, across its width.
+#
+# The outer radius of each bend is Fr, and the inner radius is Fr-Tp
+# about the same center, so that the pin is Tp thick all the way around.
+# If Fr < Tp, the inner corners are sharp.  The inner end of the pin
+# slopes at the mold angle, from x = A/2 at the bottom of the pin.
+###################################################################
+def FC3DM_MakeGullwingPin(App,
+                          A, L, T, W, Tp, Fr, Hpe, maDeg):
+
+    # Outer and inner radius of both bends
+    Ro = Fr
+    Ri = max(Fr-Tp, 0.0)
+
+    # Left and right sides of the leg, and top and bottom of the arm
+    xi = (L/2.0) - T
+    xo = xi + Tp
+    zt = Hpe + (Tp/2.0)
+    zb = Hpe - (Tp/2.0)
+
+    # The profile is in the x-z plane, at the south side of the pin
+    def V(x, z):
+        return App.Vector(x, -1*(W/2.0), z)
+
+    # Go around the profile from the top of the inner end of the pin.
+    # Each step is a point to go straight to, or a bend (to, center, radius).
+    start = V((A/2.0) - (Tp*math.tan(math.radians(maDeg))), zt)
+    profile = [V(xo-Ro, zt),
+               (V(xo, zt-Ro), V(xo-Ro, zt-Ro), Ro),
+               V(xo, Tp+Ri),
+               (V(xo+Ri, Tp), V(xo+Ri, Tp+Ri), Ri),
+               V(L/2.0, Tp),
+               V(L/2.0, 0),
+               V(xi+Ro, 0),
+               (V(xi, Ro), V(xi+Ro, Ro), Ro),
+               V(xi, zb-Ri),
+               (V(xi-Ri, zb), V(xi-Ri, zb-Ri), Ri),
+               V(A/2.0, zb),
+               start]
+
+    edges = []
+    last = start
+    for step in profile:
+        if (isinstance(step, tuple)):
+            (point, center, radius) = step
+
+            # A bend without a radius is a sharp corner, so there is nothing to add
+            if (radius > 0):
+                mid = last.sub(center).add(point.sub(center))
+                mid.normalize()
+                mid.multiply(radius)
+                edges.append(Part.Arc(last, center.add(mid), point).toShape())
+
+        else:
+            point = step
+            edges.append(Part.makeLine(last, point))
+
+        last = point
+
+    return Part.Face(Part.Wire(edges)).extrude(App.Vector(0, W, 0))
+
+
+###################################################################
+# FC3DM_FuseShapes()
+#	Function to fuse a list of shapes together, in order.
+###################################################################
+def FC3DM_FuseShapes(shapes):
+
+    fusion = shapes[0]
+    for shape in shapes[1:]:
+        fusion = fusion.fuse(shape)
+
+    return fusion
+
+
+###################################################################
+# FC3DM_FuseShapesWithHistory()
+#	Function to fuse a list of shapes together in one general fuse, and
+# use the history of that boolean operation to find where each face of the
+# fusion came from.
+#
+# Returns (fusion, faceSources), where faceSources has one entry per face
+# of the fusion:  the sorted list of positions in shapes of the inputs that
+# the face came from, or None if it came from none of them.
+# Returns (None, None) if FreeCAD is too old (generalFuse and BOPTools came
+# with 0.17), or if the general fuse fails.
+###################################################################
+def FC3DM_FuseShapesWithHistory(shapes):
+
+    try:
+        from BOPTools import ShapeMerge
+        pieces, pieceMap = shapes[0].generalFuse(shapes[1:])
+
+        # Each input maps to the pieces that it was split into.  Where inputs
+        # overlap, a piece belongs to all of them.
+        solids = []
+        seenSolids = set()
+        sources = {}
+        for i in range(len(shapes)):
+            for piece in pieceMap[i]:
+                for solid in piece.Solids:
+                    if (solid.hashCode() not in seenSolids):
+                        seenSolids.add(solid.hashCode())
+                        solids.append(solid)
+                for face in piece.Faces:
+                    sources.setdefault(face.hashCode(), set()).add(i)
+
+        # Merge the pieces back into one solid.  This drops the faces between
+        # pieces, and keeps all the others as they are.
+        fusion = ShapeMerge.mergeSolids(solids)
+        if (len(fusion.Solids) == 1):
+            fusion = fusion.Solids[0]
+
+    except Exception:
+        return (None, None)
+
+    faceSources = []
+    for face in fusion.Faces:
+        if (face.hashCode() in sources):
+            faceSources.append(sorted(sources[face.hashCode()]))
+        else:
+            faceSources.append(None)
+
+    return (fusion, faceSources)
+
+
+###################################################################
+# FC3DM_CutShapeWithTools()
+#	Function to cut a list of tool shapes out of a shape.
+#
+# With several tools, we subtract a compound of all of them in a single
+# boolean operation.  This is much faster than one cut per tool against
+# an ever more complex shape.  If the single cut fails or gives an invalid
+# shape, we fall back to one cut per tool.
+###################################################################
+def FC3DM_CutShapeWithTools(shape, tools):
+
+    if (len(tools) == 1):
+        return shape.cut(tools[0])
+
+    # Try to do all the cuts at once
+    try:
+        result = shape.cut(Part.makeCompound(tools))
+        if ( (not result.isNull()) and (result.isValid()) ):
+            return result
+    except Exception:
+        pass
+
+    # Fall back to one cut per tool
+    for tool in tools:
+        shape = shape.cut(tool)
+
+    return shape
+
+
+###################################################################
+# FC3DM_EvaluateGraphNode()
+#	Function to compute the shape of one node, whose inputs have
+# already been evaluated.
+#
+# Supported operations are:
+# box        args (L, W, H, placement)            inputs ()
+# cylinder   args (radius, height, placement)     inputs ()
+# moldedBody args (A, B, H, K, maDeg, Hpph, Hppl) inputs ()
+# gullwingPin args (A, L, T, W, Tp, Fr, Hpe, maDeg) inputs ()
+# placement  args (placement,)                    inputs (shape)
+# rotate     args (rotDeg, center, axis)          inputs (shape)
+# cut        args ()                              inputs (shape, tool, tool, ...)
+# fuse       args ()                              inputs (shape, shape, ...)
+# fillet     args (groups,)                       inputs (shape)
+# chamfer    args (groups,)                       inputs (shape)
+#
+# placement sets the placement of the shape, as setting the Placement of
+# a document object does.  rotate rotates the shape about an axis through
+# center, on top of its current placement.  Where FreeCAD supports it
+# (located() and moved(), 0.19 and later), the result shares its geometry
+# with the input shape, so placed pins are instances of one template pin.
+# Otherwise the result is a copy.
+# fuse records where each face of the fusion came from in
+# graph["faceSources"], when FreeCAD can tell us.
+# fillet and chamfer groups are ((radius, selectors), ...), as taken by
+# FC3DM_MakeEdgeFinish().
+###################################################################
+def FC3DM_EvaluateGraphNode(App,
+                            graph, nodeId):
+
+    node = graph["nodes"][nodeId]
+    op = node["op"]
+    args = node["args"]
+    inputs = []
+    for inputId in node["inputs"]:
+        inputs.append(graph["values"][inputId])
+
+    if (op == "box"):
+        shape = Part.makeBox(args[0], args[1], args[2])
+        shape.Placement = FC3DM_TupleToPlacement(App, args[3])
+
+    elif (op == "cylinder"):
+        shape = Part.makeCylinder(args[0], args[1])
+        shape.Placement = FC3DM_TupleToPlacement(App, args[2])
+
+    elif (op == "moldedBody"):
+        shape = FC3DM_MakeMoldedBody(App, *args)
+
+    elif (op == "gullwingPin"):
+        shape = FC3DM_MakeGullwingPin(App, *args)
+
+    elif (op == "placement"):
+        if (hasattr(inputs[0], "located")):
+            shape = inputs[0].located(FC3DM_TupleToPlacement(App, args[0]))
+        else:
+            shape = inputs[0].copy()
+            shape.Placement = FC3DM_TupleToPlacement(App, args[0])
+
+    elif (op == "rotate"):
+        # Rotation about center:  p' = R*(p - center) + center
+        center = App.Vector(args[1][0], args[1][1], args[1][2])
+        rot = App.Rotation(App.Vector(args[2][0], args[2][1], args[2][2]), args[0])
+        base = center.sub(rot.multVec(center))
+        if (hasattr(inputs[0], "moved")):
+            shape = inputs[0].moved(App.Placement(base, rot))
+        else:
+            shape = inputs[0].copy()
+            shape.Placement = App.Placement(base, rot).multiply(inputs[0].Placement)
+
+    elif (op == "cut"):
+        FC3DM_CountTraceOp("cut")
+        shape = FC3DM_CutShapeWithTools(inputs[0], inputs[1:])
+
+    elif (op == "fuse"):
+        FC3DM_CountTraceOp("fuse")
+        shape, faceSources = FC3DM_FuseShapesWithHistory(inputs)
+        if (shape is None):
+            shape = FC3DM_FuseShapes(inputs)
+        else:
+            graph["faceSources"][nodeId] = faceSources
+
+    elif ( (op == "fillet") or (op == "chamfer") ):
+        shape = FC3DM_MakeEdgeFinish(App, inputs[0], op, args[0])
+
+    else:
+        raise ValueError("Unsupported graph operation " + op)
+
+    return shape
+
+
+###################################################################
+# FC3DM_EvaluateGraph()
+#	Function to evaluate the given nodes, and everything that they
+# depend on, in one pass.  Nodes that were evaluated earlier are not
+# evaluated again.  Returns the list of shapes for the given nodes.
+#
+# numThreads > 1 evaluates nodes of the same depth concurrently.
+###################################################################
+def FC3DM_EvaluateGraph(App,
+                        graph, nodeIds,
+                        numThreads=1):
+
+    values = graph["values"]
+
+    # Find all the nodes that we need, that don't have values yet
+    needed = set()
+    stack = list(nodeIds)
+    while (len(stack) > 0):
+        nodeId = stack.pop()
+        if ( (nodeId in needed) or (nodeId in values) ):
+            continue
+        needed.add(nodeId)
+        stack.extend(graph["nodes"][nodeId]["inputs"])
+
+    # Group the needed nodes by depth.  All inputs of a node are at a lesser depth.
+    levels = {}
+    for nodeId in needed:
+        levels.setdefault(graph["nodes"][nodeId]["depth"], []).append(nodeId)
+
+    # Evaluate one depth at a time
+    for depth in sorted(levels.keys()):
+
+        levelIds = sorted(levels[depth])
+
+        if ( (numThreads > 1) and (len(levelIds) > 1) ):
+            FC3DM_EvaluateGraphNodesConcurrently(App,
+                                                 graph, levelIds, numThreads)
+        else:
+            for nodeId in levelIds:
+                values[nodeId] = FC3DM_EvaluateGraphNode(App, graph, nodeId)
+
+    shapes = []
+    for nodeId in nodeIds:
+        shapes.append(values[nodeId])
+
+    return shapes
+
+
+###################################################################
+# FC3DM_EvaluateGraphNodesConcurrently()
+#	Function to evaluate a list of independent nodes with several
+# threads.  The first exception raised by any thread is re-raised here.
+###################################################################
+def FC3DM_EvaluateGraphNodesConcurrently(App,
+                                         graph, nodeIds, numThreads):
+
+    pending = list(nodeIds)
+    errors = []
+    lock = threading.Lock()
+
+    # Each worker takes the next pending node until there are none left
+    def worker():
+        while (True):
+            lock.acquire()
+            if ( (len(pending) == 0) or (len(errors) > 0) ):
+                lock.release()
+                return
+            nodeId = pending.pop(0)
+            lock.release()
+
+            try:
+                shape = FC3DM_EvaluateGraphNode(App, graph, nodeId)
+            except Exception as e:
+                lock.acquire()
+                errors.append(e)
+                lock.release()
+                return
+
+            lock.acquire()
+            graph["values"][nodeId] = shape
+            lock.release()
+
+    threads = []
+    for i in range(min(numThreads, len(nodeIds))):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    if (len(errors) > 0):
+        raise errors[0]
+
+    return 0
+
+
+###################################################################
+# FC3DM_DumpGraph()
+#	Function to describe the graph as a list of text lines, one per node.
+# names optionally maps node ids to the object names that use them.
+###################################################################
+def FC3DM_DumpGraph(graph,
+                    names=None):
+
+    if (names == None):
+        names = {}
+
+    lines = []
+    lines.append("Graph has " + str(len(graph["nodes"])) + " nodes, " + str(graph["hits"]) + " shared subexpressions, " + str(len(graph["values"])) + " evaluated")
+
+    for nodeId in range(len(graph["nodes"])):
+        node = graph["nodes"][nodeId]
+
+        inputs = []
+        for inputId in node["inputs"]:
+            inputs.append("n" + str(inputId))
+
+        line = "n%d = %s(%s) %s depth=%d key=%s" % (nodeId, node["op"], ", ".join(inputs), repr(node["args"]), node["depth"], node["key"][0:16])
+        if (nodeId in names):
+            line = line + " -> " + ", ".join(sorted(names[nodeId]))
+        lines.append(line)
+
+    return lines
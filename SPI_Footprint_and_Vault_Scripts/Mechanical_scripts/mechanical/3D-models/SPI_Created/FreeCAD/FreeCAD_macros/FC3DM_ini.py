@@ -0,0 +1,1028 @@
+#================================================================================================
+#
+#	@file			FC3DM_ini.py
+#
+#	@brief			Python module to read FC3DM ini files, without needing FreeCAD.
+#
+#	@details		
+#
+#    @version		0.3.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * Parms for a model come from FC3DM_global.ini and a component-specific ini file.  Reading
+# * them needs no FreeCAD at all, and tools that run outside FreeCAD (the model cache, the
+# * parallel scheduler, and the pre-flight check) need to read them exactly as FreeCAD does.
+# * So the ini file handling lives here, in a module that does not import FreeCAD.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * Read the global and component-specific ini files, and derive the paths and names of
+# * everything that a model build writes.  This is what FC3DM_ReadIniFiles() in
+# * FC3DM_utils.py calls to do its work.
+# * Produce the normalized parm lines that FC3DM_DescribeObjectsToLogFile() writes to the
+# * features log:  sorted, with derived and build-control parms excluded, and with the
+# * revision digits of stepSuffix stripped.  Two builds with the same normalized parm lines
+# * (and the same generator code) build the same model.
+# * Check parms against a schema, before we start building anything.  Each known parm has a
+# * declared type (see iniParmTypes), and each package family (see iniFamilySchemas) has
+# * a list of required parms.  Pin rows ("Pin1=Gullwing,West,-3.3,2.925") are parsed into
+# * a pin table (see FC3DM_BuildPinTable()), with their types, sides, and coordinates checked.
+# * Any problem raises FC3DM_IniError, naming the ini file and line, or the missing parm.
+# * Remember the parsed contents of each ini file, keyed on its modification time and size,
+# * and then on a hash of its contents.  So a long-lived FreeCAD process (batch runner,
+# * server) does not re-parse FC3DM_global.ini for every model.
+# * Read bundles:  one file that describes many models, with the same parms as the component-
+# * specific ini files.  A bundle is either JSON Lines (.jsonl), one JSON object per model, eg.
+# *   {"newModelName" : "QFN50P400X400X80-25N", "L" : 4.1, "Pin1" : "QFN,West,-1.94,1.25", ...}
+# * or CSV (.csv), with a header row of parm names and one row per model.  A CSV cell holds the
+# * same text as the ini file would after the '=' (except that strings need no quotes), and
+# * an empty cell means that this model does not have that parm.
+# * Records are numbered from 1, and are read one at a time, so a bundle may describe thousands
+# * of models.  "lib.jsonl#12" names record 12 of lib.jsonl, and "lib.jsonl#1-100" records 1
+# * through 100.  Everything that takes a list of ini files (FC3DM_IC_batch.py, FC3DM_parallel.py)
+# * takes these too.
+# * Take parm overrides from the FC3DM_PARMS environment variable, in ini file syntax, eg.
+# *   FC3DM_PARMS='bodyBuilder = "loft"; modelCacheDir = ""'
+# * These win over both ini files, so that a benchmark can try another way to build the same models.
+# * Accept the ini files that LPW writes:  pin rows are not quoted, and newModelPath is
+# * a Windows path whose closing quote is missing.
+# * This module runs under the python 2 in FreeCAD, and under python 3.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script does not write a debug file, since the debug file is only opened once the
+# * ini files have been read.
+# * Parms that are not in iniParmTypes are still accepted, as any python literal.
+# ***************************************************************************
+
+
+###################################
+#### Load external libraries.
+###################################
+import os
+import re
+import ast
+import csv
+import hashlib
+import json
+import numbers
+import sys
+from array import array
+
+# Parms that are derived, or that only control how we build a model.  These are
+# excluded when writing parms to the log file in FC3DM_DescribeObjectsToLogFile().
+parmsExcludedFromLog = ["debugFilePath", "footprintType", "hasEp", "newModelPathRel", "batchIniFileNames", "inMemoryShapes", "deferredShapes", "graphThreads", "batchBodyCuts", "instancedPins", "debugLevel", "debugWriterThread", "trace", "verboseLog", "fingerprint", "fingerprintFilePathNameExt", "modelCacheDir", "modelCacheMaxBytes", "modelCacheKey", "manifestFilePathNameExt", "pinTable", "compressStep", "backgroundExport", "shapeCacheDir", "shapeCacheMaxBytes", "bodyBuilder", "pinBuilder"]
+
+# Declared types of known parms:
+#  "str"     a quoted string
+#  "path"    a quoted path.  An unterminated one (as LPW writes newModelPath) is taken as is.
+#  "number"  an int or a float
+#  "int"     an int
+#  "color"   a tuple of 3 numbers, each 0 to 1
+#  "strList" a list of strings
+iniParmTypes = {"iniFileName" : "path", "batchIniFileNames" : "strList",
+                "newModelPath" : "path", "newModelPathRel" : "path", "modelCacheDir" : "path",
+                "shapeCacheDir" : "path",
+                "newModelName" : "str", "stepSuffix" : "str", "suffix" : "str", "stepExt" : "str",
+                "bodyName" : "str", "pinName" : "str", "pin1MarkName" : "str",
+                "pin1Name" : "str", "pin2Name" : "str", "moldName" : "str", "compType" : "str",
+                "debugLevel" : "str", "bodyBuilder" : "str", "pinBuilder" : "str",
+                "L" : "number", "T" : "number", "W" : "number", "A" : "number", "B" : "number",
+                "H" : "number", "K" : "number", "Tt" : "number", "Wt" : "number", "Ft" : "number",
+                "Rt" : "number", "Tp" : "number", "maDeg" : "number", "Hpph" : "number",
+                "Hppl" : "number", "Fr" : "number", "Hpe" : "number", "Frbody" : "number",
+                "hasDshapePads" : "number", "P1markOffset" : "number", "P1markRadius" : "number",
+                "P1markIndent" : "number", "markHeight" : "number", "P1chamferOffset" : "number",
+                "epPin1ChamferRadius" : "number", "termThickness" : "number",
+                "inMemoryShapes" : "int", "deferredShapes" : "int", "graphThreads" : "int",
+                "batchBodyCuts" : "int", "instancedPins" : "int", "debugWriterThread" : "int",
+                "trace" : "int", "verboseLog" : "int", "modelCacheMaxBytes" : "int",
+                "compressStep" : "int", "backgroundExport" : "int", "shapeCacheMaxBytes" : "int",
+                "colorPin1Mark" : "color", "colorPins" : "color", "colorBody" : "color"}
+
+# Parms that every model needs.  (Also one of newModelPath or newModelPathRel.)
+iniCommonParms = ["newModelName", "stepSuffix", "stepExt", "bodyName"]
+
+# Parms that each package family needs, and whether it has pin rows
+iniFamilySchemas = {"gullwing" : {"parms" : ["pinName", "pin1MarkName",
+                                             "L", "T", "W", "A", "B", "H", "K", "Tp", "Fr", "Hpe",
+                                             "maDeg", "Hpph", "Hppl", "Frbody",
+                                             "P1markOffset", "P1markRadius", "P1markIndent", "markHeight"],
+                                  "hasPins" : True},
+                    "qfn" : {"parms" : ["pinName", "pin1MarkName",
+                                        "L", "T", "W", "A", "B", "H", "K", "Tp", "hasDshapePads",
+                                        "maDeg", "Hpph", "Hppl", "Frbody",
+                                        "P1markOffset", "P1markRadius", "P1markIndent", "markHeight"],
+                             "hasPins" : True},
+                    "chipResistor" : {"parms" : ["pin1Name", "pin2Name", "moldName",
+                                                 "L", "W", "T", "H", "K", "termThickness"],
+                                      "hasPins" : False}}
+
+# Package family of each footprintType (the leading letters of newModelName)
+iniFootprintFamilies = {"SOP" : "gullwing", "SOIC" : "gullwing", "SOT" : "gullwing", "QFP" : "gullwing",
+                        "QFN" : "qfn"}
+
+# File extensions of bundles
+bundleFileExts = [".jsonl", ".csv"]
+
+# Parsed ini files, keyed on absolute path.  Each is (mtime, size, hash, entries).
+iniFileCache = {}
+
+
+###################################################################
+# FC3DM_IniError
+#	Exception raised for an ini file that we can't use.
+###################################################################
+class FC3DM_IniError(ValueError):
+    pass
+
+
+###################################################################
+# FC3DM_Compare()
+#	Function to compare two values, as the python 2 cmp() builtin does.
+###################################################################
+def FC3DM_Compare(a, b):
+
+    return (a > b) - (a < b)
+
+
+###################################################################
+# FC3DM_SortPinNames()
+#	Function to do custom comparison for pin names.
+###################################################################
+def FC3DM_SortPinNames(a, b):
+
+    # See if we're even sorting a pair of valid pin names
+    if (a.startswith("Pin") and b.startswith("Pin")):
+
+        # Strip off anything after an '=' char.
+        tup = a.partition('=')
+        a = tup[0];
+        tup = b.partition('=')
+        b = tup[0];
+
+        # Strip off leading "Pin" from a & b pin names
+        aStr = a.replace("Pin", "");
+        bStr = b.replace("Pin", "");
+
+        ## TODO:  Support BGA pin names!
+
+        # Try to convert remaining names to integer
+        try:
+            aInt = int(aStr);
+            bInt = int(bStr);
+
+            if aInt > bInt:
+                return 1
+            elif aInt == bInt:
+                return 0
+            else:
+                return -1
+            
+        # This failed, so one or both has a BGA or EP style name.  Do simple comparison.
+        except ValueError:
+            return FC3DM_Compare(aStr, bStr)
+
+    # Else at least one of these is not a valid pin name.  Do simple comparison.
+    else:
+        return FC3DM_Compare(a, b)
+    
+
+###################################################################
+# FC3DM_PinNameSortKey()
+#	Function to get a sort key for a pin name (or "name=value" line),
+# that orders names as FC3DM_SortPinNames() does, but without a call to a
+# python comparison function for every pair.
+#
+# Any line that begins with "Pin" sorts among the other lines as the
+# string "Pin" would.  Among those, numbered pins sort by number, and
+# other names (eg. "EP") sort as strings, before the numbered pins if
+# they sort before digits, else after them.  Names that mix the two
+# (BGA style) are not supported, as in FC3DM_SortPinNames().
+###################################################################
+def FC3DM_PinNameSortKey(name):
+
+    # Not a pin name.  Do simple comparison.
+    if (not name.startswith("Pin")):
+        return (name, 0, 0, "")
+
+    # Strip off anything after an '=' char, and the leading "Pin"
+    pinStr = name.partition('=')[0].replace("Pin", "")
+
+    # Try to convert remaining name to integer
+    try:
+        return ("Pin", 1, int(pinStr), "")
+
+    # This failed, so it has an EP style name.
+    except ValueError:
+        if (pinStr < "0"):
+            return ("Pin", 0, 0, pinStr)
+        return ("Pin", 2, 0, pinStr)
+
+
+###################################################################
+# FC3DM_NormalizeAbsPath()
+#	Function to normalize an absolute path.  Interpret any "../foo/bar" type of
+# things.  Change path separators to unix style.
+###################################################################
+def FC3DM_NormalizeAbsPath(myPath):
+
+    # Interpret any "../foo/bar" structures, remove redundant path separators, etc.
+    myPath = os.path.abspath(myPath)
+#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+
+    # Change to unix style path separators
+    myPath = myPath.replace("\\", "/")
+#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+
+    return myPath
+
+
+###################################################################
+# FC3DM_NormalizeRelPath()
+#	Function to normalize a relative path.  Interpret any "../foo/bar" type of
+# things.  Change path separators to unix style.
+###################################################################
+def FC3DM_NormalizeRelPath(myPath):
+
+    # Interpret any "../foo/bar" structures, remove redundant path separators, etc.
+    myPath = os.path.relpath(myPath)
+#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+
+    # Change to unix style path separators
+    myPath = myPath.replace("\\", "/")
+#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+
+    return myPath
+
+
+###################################################################
+# FC3DM_ParseIniValue()
+#	Function to parse the value of one "name=value" ini file line, and
+# check it against the declared type of that parm, if any.
+# Raises FC3DM_IniError with where if the value is no good.
+###################################################################
+def FC3DM_ParseIniValue(name, value, where):
+
+    parmType = iniParmTypes.get(name, "")
+
+    # Pin rows are usually not quoted.  Check them, but keep the text for the log file.
+    if (name.startswith("Pin")):
+        if (value.startswith('"') or value.startswith("'")):
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                raise FC3DM_IniError(where + ":  Can't parse pin row " + name + ".")
+        FC3DM_ParsePinRow(name, value, where)
+        return value
+
+    # Try to safely evaluate type (int, float, string, tuple, etc.)
+    try:
+        parsed = ast.literal_eval(value)
+
+    # An unterminated path string is taken as is.  LPW writes newModelPath this way.
+    except (ValueError, SyntaxError):
+        if ( (parmType == "path") and (value.startswith('"')) ):
+            return value[1:].rstrip('"')
+        raise FC3DM_IniError(where + ":  Can't parse value of " + name + ":  " + value)
+
+    FC3DM_CheckParmType(name, parsed, value, where)
+
+    return parsed
+
+
+###################################################################
+# FC3DM_CheckParmType()
+#	Function to check a parsed parm value against the declared type of
+# that parm, if any.  value is the text to report if it is no good.
+###################################################################
+def FC3DM_CheckParmType(name, parsed, value, where):
+
+    parmType = iniParmTypes.get(name, "")
+
+    # Check the type, if we know what it should be
+    ok = True
+    if (parmType in ["str", "path"]):
+        ok = isinstance(parsed, str)
+    elif (parmType == "number"):
+        ok = ( (isinstance(parsed, numbers.Real)) and (not isinstance(parsed, bool)) )
+    elif (parmType == "int"):
+        ok = ( (isinstance(parsed, numbers.Integral)) and (not isinstance(parsed, bool)) )
+    elif (parmType == "color"):
+        ok = ( (isinstance(parsed, tuple)) and (len(parsed) == 3) )
+        if (ok):
+            for component in parsed:
+                if ( (not isinstance(component, numbers.Real)) or (component < 0) or (component > 1) ):
+                    ok = False
+    elif (parmType == "strList"):
+        ok = isinstance(parsed, list)
+        if (ok):
+            for item in parsed:
+                if (not isinstance(item, str)):
+                    ok = False
+
+    if (not ok):
+        raise FC3DM_IniError(where + ":  Expected " + name + " to be of type " + parmType + ", not " + str(value))
+
+    return 0
+
+
+###################################################################
+# FC3DM_LoadIniFile()
+#	Function to parse an ini file into a list of (name, value) entries.
+# File format is "key=value".
+#
+# Parsed files are remembered, keyed on modification time and size.  If
+# those changed, the file is read again, but only re-parsed if its
+# contents actually changed.
+###################################################################
+def FC3DM_LoadIniFile(iniFileName):
+
+    absPath = os.path.abspath(iniFileName)
+    try:
+        stat = os.stat(absPath)
+    except OSError:
+        raise FC3DM_IniError("Can't find ini file " + iniFileName + ".")
+
+    # See if this file is unchanged since we last parsed it
+    cached = iniFileCache.get(absPath)
+    if ( (cached != None) and (cached[0] == stat.st_mtime) and (cached[1] == stat.st_size) ):
+        return cached[3]
+
+    fileP = open(absPath, "r")
+    text = fileP.read()
+    fileP.close()
+
+    # Under python 2, text is already a byte string
+    if (isinstance(text, bytes)):
+        digest = hashlib.sha1(text).hexdigest()
+    else:
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    if ( (cached != None) and (cached[2] == digest) ):
+        iniFileCache[absPath] = (stat.st_mtime, stat.st_size, digest, cached[3])
+        return cached[3]
+
+    entries = []
+    lineNum = 0
+    for line in text.splitlines():
+        lineNum = lineNum + 1
+        line = line.strip()
+
+        # Exclude all lines beginning with '#' comment character
+        if (line.startswith('#')):
+            continue
+
+        # Split at '#' char to strip off any within-line comments
+        line = line.partition('#')[0]
+
+        # Look for '=' sign to indicate name=value pair
+        if (line.find('=') > -1):
+
+            # Split at '=' sign and strip off leading/trailing whitespace
+            tup = line.partition('=')
+            name = tup[0].strip()
+            value = tup[2].strip()
+
+            entries.append((name, FC3DM_ParseIniValue(name, value, iniFileName + " line " + str(lineNum))))
+
+    iniFileCache[absPath] = (stat.st_mtime, stat.st_size, digest, entries)
+
+    return entries
+
+
+###################################################################
+# FC3DM_ReadIniFile()
+#	Function to read an ini file into parms.  See FC3DM_LoadIniFile().
+# 	Debug messages should not be written in this function because
+#	debug file has not yet been created.
+###################################################################
+def FC3DM_ReadIniFile(iniFileName,
+                      parms,
+                      verbose=True):
+
+    # Open ini file with our paths and parameters
+    if (verbose):
+        print ("About to open ini file :" + iniFileName + ":")
+
+    # Copy any lists, so that callers can't change what we remember about this file
+    for (name, value) in FC3DM_LoadIniFile(iniFileName):
+        if (isinstance(value, list)):
+            value = list(value)
+        parms[name] = value
+
+    return 0
+
+
+###################################################################
+# FC3DM_ParseParmOverrides()
+#	Function to parse parm overrides, given as "name = value" pairs in
+# ini file syntax, separated by ';' or newlines.  Returns a list of
+# (name, value) entries, like FC3DM_LoadIniFile().
+###################################################################
+def FC3DM_ParseParmOverrides(text, where):
+
+    entries = []
+    for line in text.replace("\n", ";").split(";"):
+        line = line.strip()
+        if (line == ""):
+            continue
+
+        if (line.find('=') < 0):
+            raise FC3DM_IniError(where + ":  Expected name = value, not " + line)
+
+        tup = line.partition('=')
+        name = tup[0].strip()
+        value = tup[2].strip()
+        entries.append((name, FC3DM_ParseIniValue(name, value, where)))
+
+    return entries
+
+
+###################################################################
+# FC3DM_SplitBundleSource()
+#	Function to see whether a model source (an entry in a list of ini
+# files) names records of a bundle:  "lib.jsonl", "lib.jsonl#12", or
+# "lib.jsonl#1-100".  Returns (bundleFileName, firstRecordNum,
+# lastRecordNum), with lastRecordNum None for "to the end".  Returns None
+# for an ini file.
+###################################################################
+def FC3DM_SplitBundleSource(source):
+
+    (bundleFileName, sep, recordSpec) = source.partition("#")
+    if (os.path.splitext(bundleFileName)[1].lower() not in bundleFileExts):
+        return None
+
+    if (sep == ""):
+        return (bundleFileName, 1, None)
+
+    # Record numbers start at 1, and a range can't run backwards
+    (first, dash, last) = recordSpec.partition("-")
+    try:
+        firstRecordNum = int(first)
+        lastRecordNum = firstRecordNum
+        if (dash != ""):
+            lastRecordNum = int(last)
+    except ValueError:
+        raise FC3DM_IniError("Bad bundle record numbers in " + source + ".")
+
+    if ( (firstRecordNum < 1) or (lastRecordNum < firstRecordNum) ):
+        raise FC3DM_IniError("Bad bundle record numbers in " + source + ".")
+
+    return (bundleFileName, firstRecordNum, lastRecordNum)
+
+
+###################################################################
+# FC3DM_ReadBundle()
+#	Function to read the records of a bundle, one at a time.  This is a
+# generator of (recordNum, record) tuples, for records firstRecordNum
+# through lastRecordNum (None for "to the end").
+#
+# Records are not parsed here, so that one bad record does not stop us
+# reading the rest.  See FC3DM_ParseBundleRecord().
+###################################################################
+def FC3DM_ReadBundle(bundleFileName, firstRecordNum=1, lastRecordNum=None):
+
+    isCsv = (os.path.splitext(bundleFileName)[1].lower() == ".csv")
+    if (not os.path.isfile(bundleFileName)):
+        raise FC3DM_IniError("Can't find bundle " + bundleFileName + ".")
+
+    # The csv module wants binary mode under python 2, and no newline translation under python 3
+    if (isCsv and (sys.version_info[0] < 3)):
+        fileP = open(bundleFileName, "rb")
+    elif (isCsv):
+        fileP = open(bundleFileName, "r", newline="")
+    else:
+        fileP = open(bundleFileName, "r")
+
+    try:
+        if (isCsv):
+            rows = csv.reader(fileP)
+            header = [name.strip() for name in next(rows, [])]
+        else:
+            rows = fileP
+
+        recordNum = 0
+        for row in rows:
+
+            # Skip blank lines, and JSON Lines comments
+            if (isCsv):
+                if (len([cell for cell in row if (cell.strip() != "")]) == 0):
+                    continue
+            elif ( (row.strip() == "") or (row.strip().startswith("#")) ):
+                continue
+
+            recordNum = recordNum + 1
+            if (recordNum < firstRecordNum):
+                continue
+            if ( (lastRecordNum != None) and (recordNum > lastRecordNum) ):
+                break
+
+            where = bundleFileName + " record " + str(recordNum)
+            if (isCsv):
+                yield (recordNum, {"format" : "csv", "where" : where, "values" : dict(zip(header, row))})
+            else:
+                yield (recordNum, {"format" : "jsonl", "where" : where, "text" : row})
+
+    finally:
+        fileP.close()
+
+
+###################################################################
+# FC3DM_ToStr()
+#	Function to turn a string from the json module into a str.  Under
+# python 2, json gives us unicode strings.
+###################################################################
+def FC3DM_ToStr(value):
+
+    if ( (not isinstance(value, str)) and (isinstance(value, type(u""))) ):
+        return value.encode("utf-8")
+
+    return value
+
+
+###################################################################
+# FC3DM_ParseBundleRecord()
+#	Function to parse one bundle record, as read by FC3DM_ReadBundle(),
+# into parms, checking each against its declared type.
+# Raises FC3DM_IniError if the record is no good.
+###################################################################
+def FC3DM_ParseBundleRecord(record):
+
+    where = record["where"]
+    recordParms = {}
+
+    # CSV cells are ini file text, except that strings need no quotes
+    if (record["format"] == "csv"):
+        for (name, value) in record["values"].items():
+            value = value.strip()
+            if ( (name == "") or (value == "") ):
+                continue
+
+            if ( (iniParmTypes.get(name, "") in ["str", "path"]) and (not value.startswith('"')) ):
+                recordParms[name] = value
+            else:
+                try:
+                    recordParms[name] = FC3DM_ParseIniValue(name, value, where)
+                # A cell that is not a python literal is a string, unless that parm can't be one
+                except FC3DM_IniError:
+                    if ( (iniParmTypes.get(name, "") != "") or (name.startswith("Pin")) ):
+                        raise
+                    recordParms[name] = value
+
+    # JSON values are already typed.  Colors come as lists.
+    else:
+        try:
+            values = json.loads(record["text"])
+        except ValueError as e:
+            raise FC3DM_IniError(where + ":  Can't parse JSON:  " + str(e))
+        if (not isinstance(values, dict)):
+            raise FC3DM_IniError(where + ":  Expected a JSON object.")
+
+        for (name, value) in values.items():
+            name = FC3DM_ToStr(name)
+            value = FC3DM_ToStr(value)
+            if (isinstance(value, list)):
+                value = [FC3DM_ToStr(item) for item in value]
+                if (iniParmTypes.get(name, "") == "color"):
+                    value = tuple(value)
+
+            if (name.startswith("Pin")):
+                FC3DM_ParsePinRow(name, value, where)
+            else:
+                FC3DM_CheckParmType(name, value, json.dumps(value), where)
+            recordParms[name] = value
+
+    return recordParms
+
+
+###################################################################
+# FC3DM_CountBundleRecords()
+#	Function to count the records in a bundle, without parsing them.
+###################################################################
+def FC3DM_CountBundleRecords(bundleFileName):
+
+    numRecords = 0
+    for (recordNum, record) in FC3DM_ReadBundle(bundleFileName):
+        numRecords = recordNum
+
+    return numRecords
+
+
+###################################################################
+# FC3DM_ExpandModelSources()
+#	Function to expand a list of model sources (ini files, and bundles or
+# ranges of bundle records) into one name per model:  the ini file name,
+# or "lib.jsonl#12" for record 12 of a bundle.
+###################################################################
+def FC3DM_ExpandModelSources(sources):
+
+    names = []
+    for source in sources:
+
+        bundle = FC3DM_SplitBundleSource(source)
+        if (bundle == None):
+            names.append(source)
+            continue
+
+        (bundleFileName, firstRecordNum, lastRecordNum) = bundle
+        if (lastRecordNum == None):
+            lastRecordNum = FC3DM_CountBundleRecords(bundleFileName)
+        for recordNum in range(firstRecordNum, lastRecordNum + 1):
+            names.append(bundleFileName + "#" + str(recordNum))
+
+    return names
+
+
+###################################################################
+# FC3DM_ParsePinRow()
+#	Function to parse a pin row, of the form "type,side,x,y".
+# Eg. "Gullwing,West,-3.3,2.925", "QFN,South,0.25,-1.99", or "EP,Ep,0,0".
+# Returns a (type, side, x, y) tuple.  Raises FC3DM_IniError with where
+# if the row is no good.
+###################################################################
+def FC3DM_ParsePinRow(name, row, where):
+
+    if (not isinstance(row, str)):
+        raise FC3DM_IniError(where + ":  Expected pin row " + name + " to be a string.")
+
+    # Split the pin definition string on ',' chars.
+    lis = row.split(",")
+    if (len(lis) != 4):
+        raise FC3DM_IniError(where + ":  Expected to find 4 fields in pin row " + name + ".  Actually saw " + str(len(lis)) + "!")
+
+    (pinType, side) = (lis[0].strip(), lis[1].strip())
+    try:
+        (x, y) = (float(lis[2]), float(lis[3]))
+    except ValueError:
+        raise FC3DM_IniError(where + ":  Bad x,y coordinates in pin row " + name + ".")
+
+    # Gullwing and QFN pins are on one of the 4 sides.  EPs can be of several types.
+    if (pinType in ["Gullwing", "QFN"]):
+        if (side not in ["East", "West", "North", "South"]):
+            raise FC3DM_IniError(where + ":  Unsupported pin side " + side + " in pin row " + name + ".")
+    elif (side != "Ep"):
+        raise FC3DM_IniError(where + ":  Unsupported pin type " + pinType + " in pin row " + name + ".")
+
+    return (pinType, side, x, y)
+
+
+###################################################################
+# FC3DM_BuildPinTable()
+#	Function to gather all the pin rows in parms into a pin table, sorted
+# by pin name.  The table is a dict of parallel columns:  "names",
+# "types", "sides" (lists), and "x", "y" (arrays of doubles).
+###################################################################
+def FC3DM_BuildPinTable(parms):
+
+    pinTable = {"names" : [], "types" : [], "sides" : [],
+                "x" : array("d"), "y" : array("d")}
+
+    pinNames = [name for name in parms.keys() if name.startswith("Pin")]
+    pinNames.sort(key=FC3DM_PinNameSortKey)
+    for name in pinNames:
+        (pinType, side, x, y) = FC3DM_ParsePinRow(name, parms[name], "pin row " + name)
+        pinTable["names"].append(name)
+        pinTable["types"].append(pinType)
+        pinTable["sides"].append(side)
+        pinTable["x"].append(x)
+        pinTable["y"].append(y)
+
+    return pinTable
+
+
+###################################################################
+# FC3DM_GetPackageFamily()
+#	Function to figure out which package family (see iniFamilySchemas)
+# a model is in.  Returns "" if we don't support it.
+###################################################################
+def FC3DM_GetPackageFamily(parms):
+
+    if (parms.get("compType", "") == "chipResistor"):
+        return "chipResistor"
+
+    # Look at just the leading characters in the newModelName (eg. "QFN" or "SOIC")
+    footprintType = re.sub('[0-9]+.*', '', parms["newModelName"])
+
+    return iniFootprintFamilies.get(footprintType, "")
+
+
+###################################################################
+# FC3DM_ValidateParms()
+#	Function to check that parms read from the global and component-
+# specific ini files describe a model that we can build.  Also builds
+# parms["pinTable"].  Raises FC3DM_IniError if not.
+###################################################################
+def FC3DM_ValidateParms(parms):
+
+    iniFileName = parms["iniFileName"]
+
+    # Check the parms that every model needs
+    missing = [name for name in iniCommonParms if (name not in parms)]
+    if ( ("newModelPath" not in parms) and ("newModelPathRel" not in parms) ):
+        missing.append("newModelPath")
+    if (len(missing) > 0):
+        raise FC3DM_IniError(iniFileName + ":  Missing required parms " + ", ".join(missing) + ".")
+
+    # Check the parms for this package family
+    family = FC3DM_GetPackageFamily(parms)
+    if (family == ""):
+        raise FC3DM_IniError(iniFileName + ":  Unsupported footprint type in newModelName " + parms["newModelName"] + ".")
+
+    schema = iniFamilySchemas[family]
+    required = list(schema["parms"])
+    if (parms["newModelName"].startswith("SOIC")):
+        required.append("P1chamferOffset")
+
+    # Packages with an EP need the EP dimensions
+    if ("Tt" in parms):
+        required.extend(["Wt", "Ft", "Rt"])
+
+    # Build and check the pin table
+    pinTable = FC3DM_BuildPinTable(parms)
+    if (schema["hasPins"]):
+        if (len(pinTable["names"]) == 0):
+            raise FC3DM_IniError(iniFileName + ":  No pin rows.")
+
+        for i in range(len(pinTable["names"])):
+            if (pinTable["sides"][i] == "Ep"):
+                required.extend(["Ft", "Rt"])
+                if (pinTable["types"][i].startswith("Type")):
+                    for suffix in ["_Tt", "_Wt", "_Ft", "_Rt", "_epPin1ChamferRadius"]:
+                        required.append(pinTable["types"][i] + suffix)
+                else:
+                    required.extend(["Tt", "Wt"])
+
+    missing = []
+    for name in required:
+        if ( (name not in parms) and (name not in missing) ):
+            missing.append(name)
+    if (len(missing) > 0):
+        raise FC3DM_IniError(iniFileName + ":  Missing required " + family + " parms " + ", ".join(missing) + ".")
+
+    parms["pinTable"] = pinTable
+
+    return 0
+
+
+###################################################################
+# FC3DM_ParseIniFiles()
+#	Function to read both global and component-specific ini files, and
+# derive the paths and names of everything that a model build writes.
+#
+# If iniFileNameOverride is given (relative to scriptPath), it is used
+# in place of the iniFileName pointer in FC3DM_global.ini.  This is how
+# the batch runner builds several components without rewriting the global ini.
+# If workDir is given, the debug file goes there.
+# verbose=False keeps this quiet, for tools that print their own results.
+# If record is given (see FC3DM_ReadBundle()), the component-specific parms
+# come from it, rather than from an ini file.  iniFileNameOverride then
+# names the record, eg. "lib.jsonl#12".  If iniFileNameOverride names a
+# record but none is given, we read that record from the bundle.
+###################################################################
+def FC3DM_ParseIniFiles(scriptPath, parms, iniFileNameOverride="",
+                        workDir="", verbose=True, record=None):
+
+    ## Prepare to read global ini file.
+    # Append ini file name.
+    iniFileName = os.path.join(scriptPath, "FC3DM_global.ini")
+
+    # Read global ini file
+    FC3DM_ReadIniFile(iniFileName,
+                      parms, verbose)
+
+    # Write parms to console window
+    if (verbose):
+        print("Parms are:")
+        print(parms)
+
+    # See if our caller wants a different component than the one in the global ini file
+    if (iniFileNameOverride != ""):
+        parms["iniFileName"] = iniFileNameOverride
+
+    ## Prepare to read component-specific ini file.
+    if (not "iniFileName" in parms):
+        raise FC3DM_IniError("FC3DM_global.ini does not say which component ini file to read (iniFileName).")
+
+    # Note:  Assumes that iniFileName from file is a relative directory!
+    #  Thus, we must pre-pend our path to this.
+    # The batch schedulers may hand us an absolute path, which we use as is.
+    if (os.path.isabs(parms["iniFileName"])):
+        iniFileName = FC3DM_NormalizeRelPath(parms["iniFileName"])
+    else:
+        iniFileName = FC3DM_NormalizeRelPath(os.path.join(scriptPath, parms["iniFileName"]))
+    parms["iniFileName"] = iniFileName
+
+    # Find the bundle record that we were asked for, if we weren't handed it
+    bundle = FC3DM_SplitBundleSource(iniFileName)
+    if ( (record == None) and (bundle != None) ):
+        if (bundle[1] != bundle[2]):
+            raise FC3DM_IniError("Expected one bundle record, not " + iniFileName + ".")
+        for (recordNum, record) in FC3DM_ReadBundle(bundle[0], bundle[1], bundle[2]):
+            pass
+        if (record == None):
+            raise FC3DM_IniError("Can't find record " + str(bundle[1]) + " in bundle " + bundle[0] + ".")
+
+    # Take the component-specific parms from a bundle record, if we were given one.
+    # Name it by its bundle and model name, which don't change if the bundle is reordered.
+    if (record != None):
+        recordParms = FC3DM_ParseBundleRecord(record)
+        parms.update(recordParms)
+        parms["iniFileName"] = iniFileName.partition("#")[0] + "#" + str(recordParms.get("newModelName", ""))
+
+    # Else read component-specific ini file
+    else:
+        FC3DM_ReadIniFile(iniFileName,
+                          parms, verbose)
+
+    # Overrides from our environment win over both (see FC3DM_benchmark.py)
+    for (name, value) in FC3DM_ParseParmOverrides(os.environ.get("FC3DM_PARMS", ""), "FC3DM_PARMS"):
+        parms[name] = value
+
+    # Make sure that we have everything we need, before anyone starts building
+    FC3DM_ValidateParms(parms)
+
+    ## Set standard colors for our component (if they are not defined in ini file!)
+    if (not "colorPin1Mark" in parms):
+        parms["colorPin1Mark"] = ((1.00,1.00,1.00)) # White for pin1Mark
+
+    if (not "colorPins" in parms):
+        parms["colorPins"] = ((0.80,0.80,0.75)) 	# Bright tin for all pins
+
+    if (not "colorBody" in parms):
+        parms["colorBody"] = ((0.10,0.10,0.10))		# Black for body    
+
+
+    ## Extract relevant parameter values from parms associative array
+
+    # See if we've been given a relative path for the new model
+    if ("newModelPathRel" in parms):
+        newModelPath = FC3DM_NormalizeAbsPath(os.path.join(scriptPath, parms["newModelPathRel"]))
+        newModelPath = newModelPath + "/"
+        parms["newModelPath"] = newModelPath
+
+    # Else we expect an absolute path in the ini file.
+    else:
+        newModelPath = parms["newModelPath"]
+        
+    newModelName = parms["newModelName"]
+    stepSuffix = parms["stepSuffix"]
+    stepExt = parms["stepExt"]
+
+    # A gzip compressed STEP file is a "STEP-Z" file
+    if (parms.get("compressStep", 0) != 0):
+        stepExt = ".stpZ"
+
+    ## Calculate derived strings
+    newModelPathNameExt = newModelPath + newModelName + ".FCStd"
+    newStepPathNameExt = newModelPath + newModelName + stepSuffix + stepExt
+    logFilePathNameExt = newModelPath + newModelName + ".log"
+    fingerprintFilePathNameExt = newModelPath + newModelName + ".fingerprint"
+    manifestFilePathNameExt = newModelPath + newModelName + ".manifest.json"
+    debugFilePath = newModelPath + "FC3DM_Debug.txt"
+
+    # If this process has its own work directory, keep our debug file there instead
+    if (workDir != ""):
+        debugFilePath = FC3DM_NormalizeAbsPath(workDir) + "/" + "FC3DM_Debug.txt"
+
+    # Strip out all "-" characters for use as the FreeCAD document name
+    docName = (newModelName + stepSuffix).replace("-", "_")
+
+    ## Store derived strings to parms
+    parms["newModelPathNameExt"] = newModelPathNameExt
+    parms["newStepPathNameExt"] = newStepPathNameExt
+    parms["logFilePathNameExt"] = logFilePathNameExt
+    parms["fingerprintFilePathNameExt"] = fingerprintFilePathNameExt
+    parms["manifestFilePathNameExt"] = manifestFilePathNameExt
+    parms["docName"] = docName
+
+    # This is a derived parm. All derived parms should be excluded when writing to the log file in FC3DM_DescribeObjectsToLogFile()
+    parms["debugFilePath"] = debugFilePath
+
+    # Write parms to console window
+    if (verbose):
+        print("Parms are:")
+        print(parms)
+
+    return 0
+
+
+###################################################################
+# FC3DM_FormatParmValue()
+#	Function to format a parm value for the log file.  Strings are
+# written as is.  Everything else is written with repr(), which gives
+# the same text under python 2 and python 3 (str() of a float does not).
+###################################################################
+def FC3DM_FormatParmValue(value):
+
+    if (isinstance(value, str)):
+        return value
+
+    return repr(value)
+
+
+###################################################################
+# FC3DM_GetLoggedParmLines()
+#	Function to get the normalized "name=value" parm lines that
+# FC3DM_DescribeObjectsToLogFile() writes to the log file.
+#
+# Derived and build-control parms (see parmsExcludedFromLog) are left out.
+# The revision digits of stepSuffix are stripped from all values, so that
+# these lines do not encode the rev number of the STEP file.
+###################################################################
+def FC3DM_GetLoggedParmLines(parms):
+
+    ## Analyze stepSuffix so that we can strip the trailing digits from this from all parms.
+    # Strip off the trailing digits.  Eg. convert "_TRT1" to "_TRT".
+    stepSuffix = parms["stepSuffix"]
+    stepSuffixStripped = re.sub('[0-9]+$', '', stepSuffix)
+
+    ## Dump all parms to string list
+    strList = list()
+
+    # Loop over all parms
+    for name in parms:
+
+        # Strip off any trailing digits from stepSuffix and derived strings (eg. convert "_TRT1" to "_TRT")
+        value = FC3DM_FormatParmValue(parms[name])
+        valueStripped = re.sub(stepSuffix, stepSuffixStripped, value)
+
+        # Append this to string list
+        strList.append(name + "=" + valueStripped)
+
+    # Sort the string list
+    strList.sort(key=FC3DM_PinNameSortKey)
+
+    # We will exclude some of the derived parms when writing to the log file.
+    parmLines = []
+    for i in strList:
+
+        excluded = False
+        for name in parmsExcludedFromLog:
+            if (i.startswith(name)):
+                excluded = True
+
+        if (not excluded):
+            parmLines.append(i)
+
+    return parmLines
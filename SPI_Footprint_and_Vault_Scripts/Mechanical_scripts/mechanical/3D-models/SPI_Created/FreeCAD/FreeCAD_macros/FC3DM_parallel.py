@@ -0,0 +1,409 @@
+#================================================================================================
+#
+#	@file			FC3DM_parallel.py
+#
+#	@brief			Python script to generate many 3D models in parallel FreeCADCmd processes.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * FreeCAD model generation is single threaded, and a single FreeCAD process can
+# * only build one model at a time.  This script regenerates a whole list of models
+# * by fanning the component ini files out to several FreeCADCmd worker processes
+# * at once, so that library regeneration scales with the number of CPU cores.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * This script is run with a plain python interpreter (it does not import FreeCAD).
+# * It splits the given component ini files into chunks and keeps up to N FreeCADCmd
+# * processes busy, each running FC3DM_IC_batch.py on one chunk.  Every worker gets
+# * its own work directory (for its debug file, batch log, and python.rc) and its own
+# * JSON result file, passed via the FC3DM_WORK_DIR, FC3DM_RESULT_FILE, and
+# * FC3DM_BATCH_INI_FILES environment variables.  When all workers are done, the
+# * per-model results are collected into a single JSON manifest.  The return code
+# * is 0 if every model was generated, and 1 otherwise.
+# *
+# * Example:
+# *   python FC3DM_parallel.py -j 8 --manifest FC3DM_manifest.json *.ini
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script will not write or modify any ini files, nor will it check whether
+# * two ini files would write the same output model.
+# ***************************************************************************
+
+###################################
+#### Load external libraries.
+###################################
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from FC3DM_cache import *
+
+# Places to look for FreeCADCmd if we are not told where it is
+freeCadCmdPaths = ["c:\\Program Files\\FreeCAD0.13\\bin\\FreeCADCmd.exe",
+                   "c:\\Program Files (x86)\\FreeCAD0.13\\bin\\FreeCADCmd.exe"]
+
+
+###################################################################
+# FC3DM_FindFreeCadCmd()
+#	Function to find the FreeCADCmd executable on this system.
+###################################################################
+def FC3DM_FindFreeCadCmd():
+
+    # An explicit environment setting wins
+    if ("FC3DM_FREECADCMD" in os.environ):
+        return os.environ["FC3DM_FREECADCMD"]
+
+    # Look in the usual install locations
+    for path in freeCadCmdPaths:
+        if (os.path.isfile(path)):
+            return path
+
+    # Hope that it is on our PATH
+    return "FreeCADCmd"
+
+
+###################################################################
+# FC3DM_SplitIntoChunks()
+#	Function to split a list of ini files into chunks of at most chunkSize.
+# A bundle is split into ranges of at most chunkSize records, each of
+# which is a chunk of its own (eg. ["lib.jsonl#1-25"]).
+###################################################################
+def FC3DM_SplitIntoChunks(iniFileNames, chunkSize):
+
+    chunks = []
+    iniChunk = []
+    for iniFileName in iniFileNames:
+
+        # Ini files are grouped into chunks
+        bundle = FC3DM_SplitBundleSource(iniFileName)
+        if (bundle == None):
+            iniChunk.append(iniFileName)
+            if (len(iniChunk) == chunkSize):
+                chunks.append(iniChunk)
+                iniChunk = []
+            continue
+
+        # Each worker streams its own range of a bundle's records
+        (bundleFileName, firstRecordNum, lastRecordNum) = bundle
+        if (lastRecordNum == None):
+            lastRecordNum = FC3DM_CountBundleRecords(bundleFileName)
+        for recordNum in range(firstRecordNum, lastRecordNum + 1, chunkSize):
+            chunks.append([bundleFileName + "#" + str(recordNum) + "-" + str(min(recordNum + chunkSize - 1, lastRecordNum))])
+
+    if (len(iniChunk) > 0):
+        chunks.append(iniChunk)
+
+    return chunks
+
+
+###################################################################
+# FC3DM_RunWorker()
+#	Function to run one FreeCADCmd worker process on one chunk of ini
+# files, and return the list of per-model result dicts that it reports.
+###################################################################
+def FC3DM_RunWorker(freeCadCmd, batchScript, scriptPath,
+                    workDir, chunk):
+
+    # Give this worker its own work directory
+    if (not os.path.isdir(workDir)):
+        os.makedirs(workDir)
+    resultFilePath = os.path.join(workDir, "FC3DM_results.json")
+    if (os.path.isfile(resultFilePath)):
+        os.remove(resultFilePath)
+
+    # Tell the worker what to build and where to put its private files
+    env = dict(os.environ)
+    env["FC3DM_BATCH_INI_FILES"] = os.pathsep.join(chunk)
+    env["FC3DM_WORK_DIR"] = workDir
+    env["FC3DM_RESULT_FILE"] = resultFilePath
+
+    # Run the worker.  Its console output goes to a file in its work directory.
+    startTime = time.time()
+    outFile = open(os.path.join(workDir, "FC3DM_worker.out"), "w")
+    try:
+        workerRc = subprocess.call([freeCadCmd, batchScript],
+                                   cwd=scriptPath, env=env,
+                                   stdout=outFile, stderr=subprocess.STDOUT)
+    except OSError as e:
+        workerRc = -1
+        print("Could not run " + freeCadCmd + ": " + str(e))
+    outFile.close()
+
+    # Collect the worker's results
+    results = []
+    if (os.path.isfile(resultFilePath)):
+        fileP = open(resultFilePath, "r")
+        results = json.load(fileP)
+        fileP.close()
+
+    # Any ini file that the worker did not report on is a failure (eg. FreeCADCmd crashed).
+    reported = set()
+    for result in results:
+        reported.add(result["iniFileName"])
+
+    for iniFileName in FC3DM_ExpandModelSources(chunk):
+        if (iniFileName not in reported):
+            results.append({"iniFileName" : iniFileName,
+                            "rc" : -1,
+                            "seconds" : time.time() - startTime,
+                            "message" : "Worker exited with rc " + str(workerRc) + " without reporting on this model."})
+
+    # Remember which worker built each model
+    for result in results:
+        result["workDir"] = workDir
+
+    return results
+
+
+###################################################################
+# FC3DM_FetchModelsFromCache()
+#	Function to copy out of the model cache every model that is already
+# there, so that we don't need to start a FreeCADCmd worker for it.
+# Returns the list of per-model results for the cache hits, and the list
+# of ini files that still need to be built.
+###################################################################
+def FC3DM_FetchModelsFromCache(scriptPath, iniFileNames):
+
+    results = []
+    misses = []
+    for iniFileName in iniFileNames:
+
+        # Bundles are left to the workers, which stream their records
+        if (FC3DM_SplitBundleSource(iniFileName) != None):
+            misses.append(iniFileName)
+            continue
+
+        startTime = time.time()
+        parms = {}
+        try:
+            FC3DM_ParseIniFiles(scriptPath, parms, iniFileName, "", False)
+        # Let the worker report on an ini file that we can't read
+        except Exception:
+            misses.append(iniFileName)
+            continue
+
+        cacheDir = FC3DM_GetModelCacheDir(scriptPath, parms)
+        cached = None
+        if (cacheDir != ""):
+            cached = FC3DM_FetchFromModelCache(cacheDir,
+                                               FC3DM_ComputeModelCacheKey(scriptPath, parms),
+                                               parms)
+        if (cached == None):
+            misses.append(iniFileName)
+            continue
+
+        result = {"iniFileName" : iniFileName,
+                  "rc" : 0,
+                  "seconds" : time.time() - startTime,
+                  "message" : "OK (from model cache)",
+                  "newModelName" : parms["newModelName"],
+                  "newModelPathNameExt" : parms["newModelPathNameExt"],
+                  "newStepPathNameExt" : parms["newStepPathNameExt"],
+                  "logFilePathNameExt" : parms["logFilePathNameExt"],
+                  "fromCache" : True}
+        result.update(cached)
+        results.append(result)
+        print("%4s %8.2f %s %s" % (str(result["rc"]), result["seconds"], result["iniFileName"], result["message"]))
+
+    return (results, misses)
+
+
+###################################################################
+# FC3DM_GenerateModelsInParallel()
+#	Function to keep up to numJobs worker processes busy until all
+# chunks have been generated.  Returns the list of per-model results.
+###################################################################
+def FC3DM_GenerateModelsInParallel(freeCadCmd, batchScript, scriptPath,
+                                   workRoot, iniFileNames,
+                                   numJobs, chunkSize):
+
+    # Queue up all the chunks
+    chunkQueue = queue.Queue()
+    chunkNum = 0
+    for chunk in FC3DM_SplitIntoChunks(iniFileNames, chunkSize):
+        chunkQueue.put((chunkNum, chunk))
+        chunkNum = chunkNum + 1
+
+    allResults = []
+    lock = threading.Lock()
+
+    # Each thread babysits one worker process at a time
+    def FC3DM_WorkerThread():
+
+        while True:
+            try:
+                (chunkNum, chunk) = chunkQueue.get_nowait()
+            except queue.Empty:
+                return
+
+            workDir = os.path.join(workRoot, "job%04d" % chunkNum)
+            results = FC3DM_RunWorker(freeCadCmd, batchScript, scriptPath,
+                                      workDir, chunk)
+
+            lock.acquire()
+            allResults.extend(results)
+            for result in results:
+                print("%4s %8.2f %s %s" % (str(result["rc"]), result["seconds"], result["iniFileName"], result["message"]))
+            lock.release()
+
+    # Start the threads and wait for them all to finish
+    threads = []
+    for i in range(numJobs):
+        thread = threading.Thread(target=FC3DM_WorkerThread)
+        thread.start()
+        threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+    # Report results in the order we were given the ini files (and bundle records)
+    modelNames = FC3DM_ExpandModelSources(iniFileNames)
+    order = {}
+    for i in range(len(modelNames)):
+        order[modelNames[i]] = i
+    allResults.sort(key=lambda result: order.get(result["iniFileName"], len(modelNames)))
+
+    return allResults
+
+
+###################################
+#### Main function
+###################################
+if (__name__ == "__main__"):
+
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Generate FC3DM 3D models in parallel FreeCADCmd processes.")
+    parser.add_argument("iniFileNames", nargs="+",
+                        help="component-specific ini files, or bundles (.jsonl, .csv, optionally with #first-last records), to generate models for")
+    parser.add_argument("-j", "--jobs", type=int, default=multiprocessing.cpu_count(),
+                        help="number of FreeCADCmd processes to run at once (default: number of cores)")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="number of models per FreeCADCmd process (default: spread evenly, 4 chunks per job)")
+    parser.add_argument("--freecad-cmd", default=FC3DM_FindFreeCadCmd(),
+                        help="path to FreeCADCmd")
+    parser.add_argument("--work-dir", default=os.path.join(scriptPath, "FC3DM_work"),
+                        help="directory under which each worker gets its own work directory")
+    parser.add_argument("--manifest", default=os.path.join(scriptPath, "FC3DM_manifest.json"),
+                        help="JSON file to which all results are written")
+    args = parser.parse_args()
+
+    # Use absolute paths, since workers run in the macros directory
+    iniFileNames = [os.path.abspath(i) for i in args.iniFileNames]
+    freeCadCmd = args.freecad_cmd
+    if (os.path.isfile(freeCadCmd)):
+        freeCadCmd = os.path.abspath(freeCadCmd)
+
+    # Models already in the model cache don't need a worker at all
+    startTime = time.time()
+    (cachedResults, iniFileNames) = FC3DM_FetchModelsFromCache(scriptPath, iniFileNames)
+
+    # Compute chunk size.  Several chunks per job keeps all workers busy to the end.
+    numJobs = max(1, args.jobs)
+    chunkSize = args.chunk_size
+    if (chunkSize <= 0):
+        chunkSize = max(1, len(FC3DM_ExpandModelSources(iniFileNames)) // (4 * numJobs))
+
+    results = FC3DM_GenerateModelsInParallel(freeCadCmd,
+                                             os.path.join(scriptPath, "FC3DM_IC_batch.py"),
+                                             scriptPath,
+                                             os.path.abspath(args.work_dir),
+                                             iniFileNames,
+                                             numJobs, chunkSize)
+    results = cachedResults + results
+
+    # Write the manifest
+    numFailed = len([result for result in results if (result["rc"] != 0)])
+    manifest = {"jobs" : numJobs,
+                "chunkSize" : chunkSize,
+                "seconds" : time.time() - startTime,
+                "numModels" : len(results),
+                "numFailed" : numFailed,
+                "models" : results}
+
+    fileP = open(args.manifest, "w")
+    json.dump(manifest, fileP, indent=1, sort_keys=True)
+    fileP.close()
+
+    print("Generated " + str(len(results) - numFailed) + " of " + str(len(results)) + " models in " + ("%.1f" % manifest["seconds"]) + " seconds.")
+
+    if (numFailed == 0):
+        sys.exit(0)
+    else:
+        sys.exit(1)
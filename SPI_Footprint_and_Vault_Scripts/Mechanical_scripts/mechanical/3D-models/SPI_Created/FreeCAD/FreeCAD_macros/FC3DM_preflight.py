@@ -0,0 +1,229 @@
+#================================================================================================
+#
+#	@file			FC3DM_preflight.py
+#
+#	@brief			Python script to tell, without FreeCAD, whether an FC3DM model needs to be regenerated.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * LPW writes a component ini file, launches FreeCAD, waits for python.rc, and only then
+# * compares the new features log with the old one, to see whether it should revert the new
+# * files.  When nothing that goes into the model changed, all that FreeCAD time is wasted.
+# * This module answers that question up front, without importing FreeCAD.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * Each model build writes a manifest (<newModelName>.manifest.json, next to the model)
+# * with the model's parm hash and the names and sizes of the files that it wrote.
+# * The parm hash is the model cache key (see FC3DM_ComputeModelCacheKey() in
+# * FC3DM_cache.py), ie. a hash of the normalized parms that shape the model files, and of
+# * the generator code.  It does not depend on the current directory, or on where the
+# * model and ini files are, so LPW may run the pre-flight check from anywhere.
+# * A pre-flight check reads the global and component-specific ini files with the same
+# * rules as FC3DM_ReadIniFiles(), recomputes the parm hash, and compares it with the
+# * manifest.  A model is up to date if the hashes match, and each file that a build with
+# * the current parms would write exists, is in the manifest, and has the recorded size.
+# * Otherwise it needs to be regenerated.
+# * Run as:
+# *   python FC3DM_preflight.py [iniFileName ...]
+# * With no ini files, the one named by iniFileName in FC3DM_global.ini is checked.  Prints
+# * "up to date" or "regenerate" (with the reason) for each, and exits with 0 if all are up
+# * to date, 1 if any need to be regenerated.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This does not look inside the model files, so a model edited by hand after it was built
+# * still counts as up to date.
+# ***************************************************************************
+
+
+###################################
+#### Load external libraries.
+###################################
+import json
+import os
+import sys
+import time
+
+from FC3DM_ini import *
+from FC3DM_cache import *
+
+# Bump this whenever the layout of the manifest changes
+manifestFormat = 1
+
+# Files that a model build writes, and that must still be there for the model to be up to date
+manifestFiles = ["newModelPathNameExt", "newStepPathNameExt", "logFilePathNameExt", "fingerprintFilePathNameExt"]
+
+
+###################################################################
+# FC3DM_WriteModelManifest()
+#	Function to write the manifest of a freshly built (or cached) model,
+# recording its parm hash and the files that make it up.
+###################################################################
+def FC3DM_WriteModelManifest(parms, parmHash):
+
+    manifest = {"format" : manifestFormat,
+                "parmHash" : parmHash,
+                "newModelName" : parms["newModelName"],
+                "created" : time.strftime("%Y-%m-%d %H:%M:%S"),
+                "fingerprint" : parms.get("fingerprint", ""),
+                "files" : {}}
+
+    # File names are relative to the manifest, so that the model directory may be moved
+    for parmName in manifestFiles:
+        manifest["files"][os.path.basename(parms[parmName])] = os.path.getsize(parms[parmName])
+
+    fileP = open(parms["manifestFilePathNameExt"], "w")
+    json.dump(manifest, fileP, indent=1, sort_keys=True)
+    fileP.close()
+
+    return 0
+
+
+###################################################################
+# FC3DM_CheckModelManifest()
+#	Function to see whether the model described by parms (as read by
+# FC3DM_ParseIniFiles()) is up to date with respect to its manifest.
+# Returns a (upToDate, reason) tuple.
+###################################################################
+def FC3DM_CheckModelManifest(scriptPath, parms):
+
+    manifestFilePathNameExt = parms["manifestFilePathNameExt"]
+    if (not os.path.isfile(manifestFilePathNameExt)):
+        return (False, "no manifest " + manifestFilePathNameExt)
+
+    try:
+        fileP = open(manifestFilePathNameExt, "r")
+        manifest = json.load(fileP)
+        fileP.close()
+    except (IOError, OSError, ValueError) as e:
+        return (False, "can't read manifest " + manifestFilePathNameExt + ": " + str(e))
+
+    if (manifest.get("format") != manifestFormat):
+        return (False, "manifest format changed")
+
+    if (manifest["parmHash"] != FC3DM_ComputeModelCacheKey(scriptPath, parms)):
+        return (False, "parms or generator scripts changed")
+
+    # Make sure that the files that these parms would write were built, and that nobody
+    # has removed or truncated them since
+    for parmName in manifestFiles:
+        filePath = parms[parmName]
+        fileName = os.path.basename(filePath)
+        if (fileName not in manifest["files"]):
+            return (False, "manifest does not list " + filePath)
+        if (not os.path.isfile(filePath)):
+            return (False, "missing " + filePath)
+        if (os.path.getsize(filePath) != manifest["files"][fileName]):
+            return (False, "size of " + filePath + " changed")
+
+    return (True, "")
+
+
+###################################################################
+# FC3DM_PreflightIniFile()
+#	Function to read the ini files for one model and check it against its
+# manifest.  iniFileName may be "" to use the pointer in FC3DM_global.ini.
+# Returns a (upToDate, reason) tuple.
+###################################################################
+def FC3DM_PreflightIniFile(scriptPath, iniFileName):
+
+    parms = {}
+    try:
+        FC3DM_ParseIniFiles(scriptPath, parms, iniFileName, "", False)
+    except Exception as e:
+        return (False, "can't read ini files: " + str(e))
+
+    return FC3DM_CheckModelManifest(scriptPath, parms)
+
+
+###################################
+#### Main function
+###################################
+if (__name__ == "__main__"):
+
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+
+    # Check the ini files that we were given, else the one named in the global ini file
+    iniFileNames = [os.path.abspath(i) for i in sys.argv[1:]]
+    if (len(iniFileNames) == 0):
+        iniFileNames = [""]
+
+    numStale = 0
+    for iniFileName in iniFileNames:
+        (upToDate, reason) = FC3DM_PreflightIniFile(scriptPath, iniFileName)
+
+        if (upToDate):
+            print("up to date " + iniFileName)
+        else:
+            print("regenerate " + iniFileName + " (" + reason + ")")
+            numStale = numStale + 1
+
+    if (numStale == 0):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,283 @@
+#================================================================================================
+#
+#	@file			FC3DM_server.py
+#
+#	@brief			Python script to serve FC3DM 3D model generation requests from a warm FreeCAD process.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * Launching FreeCAD for every footprint costs far more time than generating the
+# * 3D model itself.  This script is a long-lived FC3DM service.  It is started once
+# * (normally under FreeCADCmd), keeps FreeCAD, Part, and FC3DM_utils loaded, and
+# * generates models on request.  FC3DM_client.py is the matching client.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * This script listens on a local TCP port (127.0.0.1 only), or on a Unix domain
+# * socket where the platform supports them.  The port comes from the
+# * FC3DM_SERVER_PORT environment variable (default 50731) and the socket path from
+# * FC3DM_SERVER_SOCKET.  The protocol is one JSON object per line in each
+# * direction.  Supported requests are:
+# *   {"cmd" : "generate", "iniFileName" : "foo.ini"}
+# *       Generate a model.  iniFileName is relative to the macros directory, or
+# *       absolute, or "" to use the pointer in FC3DM_global.ini.  The answer
+# *       carries rc, message, output file paths, per-stage timings, and the hash
+# *       of the generated geometry.
+# *   {"cmd" : "ping"}
+# *   {"cmd" : "reload"}     Reload FC3DM_utils.py after it has been edited.
+# *   {"cmd" : "shutdown"}
+# *
+# * A model that fails is reported only in the answer.  Its python.rc and debug file go to
+# * the server's private work directory (FC3DM_WORK_DIR, or else a new temporary directory),
+# * never to the macros directory, where LPW waits for python.rc from the FreeCAD it launched.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script handles one request at a time.  It will not accept connections from
+# * other machines.
+# ***************************************************************************
+
+###################################
+#### Load external libraries.
+###################################
+import FreeCAD
+import sys
+import os
+import socket
+import json
+import tempfile
+import time
+import traceback
+
+# FreeCAD only gives us a Gui when we are running inside the full GUI application.
+# Under FreeCADCmd there is none.
+App = FreeCAD
+if (getattr(FreeCAD, "GuiUp", 0)):
+    import FreeCADGui
+    Gui = FreeCADGui
+else:
+    Gui = None
+
+## Get path to this script, so that we can find FC3DM_utils.py and FC3DM_global.ini
+if ("__file__" in globals()):
+    scriptPath = os.path.dirname(os.path.abspath(__file__))
+else:
+    scriptPath = os.getcwd()
+print("scriptPath is :" + scriptPath + ":")
+sys.path.append(scriptPath)
+
+# Import our utilities module
+import FC3DM_utils
+
+# Default TCP port to listen on
+defaultServerPort = 50731
+
+# Our private work directory, so that models that fail don't write python.rc where LPW looks for it
+serverWorkDir = os.environ.get("FC3DM_WORK_DIR", "")
+if (serverWorkDir == ""):
+    serverWorkDir = tempfile.mkdtemp(prefix="FC3DM_server-")
+FC3DM_utils.FC3DM_SetWorkDir(serverWorkDir)
+print("Work directory is :" + serverWorkDir + ":")
+
+
+###################################################################
+# FC3DM_HandleServerRequest()
+#	Function to handle one request.  Returns the response dict.
+# Sets response["shutdown"] to True if we should stop serving.
+###################################################################
+def FC3DM_HandleServerRequest(request):
+
+    response = {}
+    cmd = request.get("cmd", "")
+
+    # Generate a model
+    if (cmd == "generate"):
+
+        iniFileName = request.get("iniFileName", "")
+        FC3DM_utils.FC3DM_GenerateIcModelSafely(App, Gui,
+                                                scriptPath, iniFileName,
+                                                response)
+
+    # Reload our utilities module, since this changes often!
+    elif (cmd == "reload"):
+        reload(FC3DM_utils)
+        FC3DM_utils.FC3DM_SetWorkDir(serverWorkDir)
+        response["rc"] = 0
+        response["message"] = "Reloaded FC3DM_utils."
+
+    elif (cmd == "ping"):
+        response["rc"] = 0
+        response["message"] = "pong"
+
+    elif (cmd == "shutdown"):
+        response["rc"] = 0
+        response["message"] = "Shutting down."
+        response["shutdown"] = True
+
+    # Else unsupported!
+    else:
+        response["rc"] = -1
+        response["message"] = "Unsupported cmd :" + str(cmd) + ":"
+
+    return response
+
+
+###################################################################
+# FC3DM_ServeConnection()
+#	Function to answer all the requests arriving on one connection.
+# Returns False if we were asked to shut down.
+###################################################################
+def FC3DM_ServeConnection(conn):
+
+    keepServing = True
+    rfile = conn.makefile("r")
+    wfile = conn.makefile("w")
+
+    # One JSON request per line
+    while True:
+
+        line = rfile.readline()
+        if (line == ""):
+            break
+        if (line.strip() == ""):
+            continue
+
+        startTime = time.time()
+        try:
+            request = json.loads(line)
+            response = FC3DM_HandleServerRequest(request)
+        except Exception as e:
+            traceback.print_exc()
+            response = {"rc" : -1, "message" : "Bad request: " + str(e)}
+        response["serverSeconds"] = time.time() - startTime
+
+        # One JSON response per line
+        wfile.write(json.dumps(response, sort_keys=True) + "\n")
+        wfile.flush()
+
+        if (response.get("shutdown", False)):
+            keepServing = False
+            break
+
+    rfile.close()
+    wfile.close()
+    conn.close()
+
+    return keepServing
+
+
+###################################################################
+# FC3DM_OpenListenSocket()
+#	Function to open the socket on which we accept connections.
+###################################################################
+def FC3DM_OpenListenSocket():
+
+    # Use a Unix domain socket if we were asked to and the platform has them
+    socketPath = os.environ.get("FC3DM_SERVER_SOCKET", "")
+    if ( (socketPath != "") and hasattr(socket, "AF_UNIX") ):
+
+        if (os.path.exists(socketPath)):
+            os.remove(socketPath)
+        listenSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listenSocket.bind(socketPath)
+        print("Listening on Unix socket :" + socketPath + ":")
+
+    # Else use TCP, but only on the loopback interface
+    else:
+
+        port = int(os.environ.get("FC3DM_SERVER_PORT", defaultServerPort))
+        listenSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listenSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listenSocket.bind(("127.0.0.1", port))
+        print("Listening on 127.0.0.1:" + str(port))
+
+    listenSocket.listen(5)
+
+    return listenSocket
+
+
+###################################
+#### Main function
+###################################
+
+listenSocket = FC3DM_OpenListenSocket()
+
+# Serve connections, one at a time, until asked to shut down
+keepServing = True
+while (keepServing):
+
+    (conn, addr) = listenSocket.accept()
+    keepServing = FC3DM_ServeConnection(conn)
+
+listenSocket.close()
+if (os.environ.get("FC3DM_SERVER_SOCKET", "") != ""):
+    try:
+        os.remove(os.environ["FC3DM_SERVER_SOCKET"])
+    except OSError:
+        pass
+
+print("FC3DM server exiting.")
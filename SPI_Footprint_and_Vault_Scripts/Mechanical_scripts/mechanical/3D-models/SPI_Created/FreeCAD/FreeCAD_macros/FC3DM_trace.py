@@ -0,0 +1,317 @@
+#================================================================================================
+#
+#	@file			FC3DM_trace.py
+#
+#	@brief			Python module to record Chrome trace (JSON) files of FC3DM function calls.
+#
+#	@details		
+#
+#    @version		0.1.0
+#					   $Rev::                                                                        $:
+#	@date			  $Date::                                                                        $:
+#	@author			$Author::                                                                        $:
+#					    $Id::                                                                             $:
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#	
+#***************************************************************************
+# * The Sierra Photonics, Inc. Software License, Version 1.0:
+# *  
+# * Copyright (c) 2012 by Sierra Photonics Inc.  All rights reserved.
+# *  Author:        Jeff Collins, jcollins@sierraphotonics.com
+# *  Author:        $Author$
+# *  Check-in Date: $Date$ 
+# *  Version #:     $Revision$
+# *  
+# * Redistribution and use in source and binary forms, with or without
+# * modification, are permitted provided that the following conditions
+# * are met and the person seeking to use or redistribute such software hereby
+# * agrees to and abides by the terms and conditions below:
+# *
+# * 1. Redistributions of source code must retain the above copyright
+# * notice, this list of conditions and the following disclaimer.
+# *
+# * 2. Redistributions in binary form must reproduce the above copyright
+# * notice, this list of conditions and the following disclaimer in
+# * the documentation and/or other materials provided with the
+# * distribution.
+# *
+# * 3. The end-user documentation included with the redistribution,
+# * if any, must include the following acknowledgment:
+# * "This product includes software developed by Sierra Photonics Inc." 
+# * Alternately, this acknowledgment may appear in the software itself,
+# * if and wherever such third-party acknowledgments normally appear.
+# *
+# * 4. The Sierra Photonics Inc. names or marks must
+# * not be used to endorse or promote products derived from this
+# * software without prior written permission. For written
+# * permission, please contact:
+# *  
+# *  Sierra Photonics Inc.
+# *  attn:  Legal Department
+# *  7563 Southfront Rd.
+# *  Livermore, CA  94551  USA
+# * 
+# * IN ALL CASES AND TO THE FULLEST EXTENT PERMITTED UNDER APPLICABLE LAW,
+# * THIS SOFTWARE IS PROVIDED ``AS IS'' AND ANY EXPRESSED OR IMPLIED
+# * WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# * OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# * DISCLAIMED.  IN NO EVENT SHALL SIERRA PHOTONICS INC. OR 
+# * ITS CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# * SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# * LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF
+# * USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# * ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# * OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT
+# * OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# * SUCH DAMAGE.
+# *
+# * This software consists of voluntary contributions made by many
+# * individuals on behalf of the Altium Community Software.
+# *
+# * See also included file SPI_License.txt.
+# *
+# * THEORY OF OPERATIONS
+# * FC3DM_utils.py builds a model in a long series of FC3DM_* calls, and it is not obvious
+# * which of them take the time.  This module wraps chosen functions so that, while a
+# * trace is running, each call is recorded as a span with its wall time and CPU time.
+# * The trace is written as a Chrome trace (JSON) file, which may be opened in
+# * chrome://tracing or https://ui.perfetto.dev.
+# *
+# * WHAT THIS SCRIPT WILL DO
+# * Wrapped functions check whether a trace is running, and if not, simply call the
+# * original function.  So wrapping costs almost nothing when tracing is off.
+# * The caller may supply a function that returns the shapes that a call works on.
+# * The face and edge counts of these shapes are recorded before and after the call.
+# * Boolean operations are counted with FC3DM_CountTraceOp() where they are actually
+# * done.  Each span records how many of each kind were done during it.
+# *
+# * WHAT THIS SCRIPT WILL *NOT* DO
+# * This script does not know about FreeCAD, documents, or object names.  Those stay in
+# * FC3DM_utils.py.  CPU time is for the whole process, so spans that overlap on
+# * several threads each see the CPU time of all of them.
+# ***************************************************************************
+
+
+###################################
+#### Load external libraries.
+###################################
+import os
+import time
+import json
+import threading
+
+# Trace events so far, or None when we are not tracing.  See FC3DM_StartTrace().
+traceEvents = None
+traceFilePath = ""
+traceStartTime = 0.0
+traceCounters = {}
+traceLock = threading.Lock()
+
+
+###################################################################
+# FC3DM_StartTrace()
+#	Function to start recording a trace, to be written to the given
+# file by FC3DM_StopTrace().  Any trace already running is discarded.
+###################################################################
+def FC3DM_StartTrace(filePath, processName):
+
+    global traceEvents
+    global traceFilePath
+    global traceStartTime
+    global traceCounters
+
+    traceFilePath = filePath
+    traceStartTime = time.time()
+    traceCounters = {}
+    traceEvents = []
+
+    # Name our process in the trace viewer
+    traceEvents.append({"name" : "process_name", "ph" : "M", "pid" : os.getpid(), "tid" : 0,
+                        "args" : {"name" : processName}})
+
+    return 0
+
+
+###################################################################
+# FC3DM_StopTrace()
+#	Function to stop recording a trace, and write it to its file.
+# Does nothing if we are not tracing.
+###################################################################
+def FC3DM_StopTrace():
+
+    global traceEvents
+
+    if (traceEvents == None):
+        return 0
+
+    trace = {}
+    trace["traceEvents"] = traceEvents
+    trace["displayTimeUnit"] = "ms"
+    trace["otherData"] = {"opCounts" : traceCounters}
+    traceEvents = None
+
+    fileP = open(traceFilePath, "w")
+    json.dump(trace, fileP)
+    fileP.close()
+
+    return 0
+
+
+###################################################################
+# FC3DM_IsTracing()
+#	Function to see whether we are recording a trace.
+###################################################################
+def FC3DM_IsTracing():
+
+    return (traceEvents != None)
+
+
+###################################################################
+# FC3DM_CountTraceOp()
+#	Function to count one operation (eg. "cut" or "fuse") in the trace.
+###################################################################
+def FC3DM_CountTraceOp(op):
+
+    if (traceEvents == None):
+        return 0
+
+    traceLock.acquire()
+    traceCounters[op] = traceCounters.get(op, 0) + 1
+    traceLock.release()
+
+    return 0
+
+
+###################################################################
+# FC3DM_AddTraceSpan()
+#	Function to add a span to the trace, that started and ended at the
+# given times (as from time.time()).
+###################################################################
+def FC3DM_AddTraceSpan(name, category, startTime, endTime,
+                       args=None):
+
+    if (traceEvents == None):
+        return 0
+
+    event = {"name" : name, "cat" : category, "ph" : "X",
+             "ts" : (startTime - traceStartTime) * 1e6, "dur" : (endTime - startTime) * 1e6,
+             "pid" : os.getpid(), "tid" : threading.current_thread().ident}
+    if (args != None):
+        event["args"] = args
+
+    traceLock.acquire()
+    traceEvents.append(event)
+    traceLock.release()
+
+    return 0
+
+
+###################################################################
+# FC3DM_GetCpuTime()
+#	Function to get the user plus system CPU time of this process.
+###################################################################
+def FC3DM_GetCpuTime():
+
+    t = os.times()
+
+    return t[0] + t[1]
+
+
+###################################################################
+# FC3DM_CountShapeElements()
+#	Function to count the faces and edges of a list of shapes.  Returns
+# None if there are no shapes, or if any of them can't be counted.
+###################################################################
+def FC3DM_CountShapeElements(shapes):
+
+    if ( (shapes == None) or (len(shapes) == 0) ):
+        return None
+
+    try:
+        faces = 0
+        edges = 0
+        for shape in shapes:
+            faces = faces + len(shape.Faces)
+            edges = edges + len(shape.Edges)
+    except Exception:
+        return None
+
+    return (faces, edges)
+
+
+###################################################################
+# FC3DM_TraceFunction()
+#	Function to replace a function of a module with a wrapper that
+# records each call in the trace, while we are tracing.
+#
+# getShapes, if given, is called as getShapes(args, result) before the
+# call (with result None) and after it.  It returns a list of the shapes
+# whose faces and edges we should count, or None.
+# getLabel, if given, is called as getLabel(args), and its result is
+# appended to the name of the span.
+###################################################################
+def FC3DM_TraceFunction(module, funcName, category,
+                        getShapes=None, getLabel=None):
+
+    func = getattr(module, funcName)
+
+    # Don't wrap a function twice
+    if (hasattr(func, "tracedFunction")):
+        return 0
+
+    def wrapper(*args, **kwargs):
+
+        if (traceEvents == None):
+            return func(*args, **kwargs)
+
+        # Note what we have before the call
+        before = None
+        if (getShapes != None):
+            try:
+                before = FC3DM_CountShapeElements(getShapes(args, None))
+            except Exception:
+                pass
+        countersBefore = dict(traceCounters)
+        startTime = time.time()
+        startCpu = FC3DM_GetCpuTime()
+
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+
+        # Record the call, even if it raised an exception (or called sys.exit())
+        finally:
+            endTime = time.time()
+            eventArgs = {"cpuMs" : (FC3DM_GetCpuTime() - startCpu) * 1e3}
+
+            if (before != None):
+                eventArgs["facesBefore"] = before[0]
+                eventArgs["edgesBefore"] = before[1]
+            if (getShapes != None):
+                try:
+                    after = FC3DM_CountShapeElements(getShapes(args, result))
+                    if (after != None):
+                        eventArgs["facesAfter"] = after[0]
+                        eventArgs["edgesAfter"] = after[1]
+                except Exception:
+                    pass
+
+            for op in traceCounters.keys():
+                count = traceCounters[op] - countersBefore.get(op, 0)
+                if (count > 0):
+                    eventArgs[op + "Ops"] = count
+
+            name = funcName
+            if (getLabel != None):
+                name = name + "(" + str(getLabel(args)) + ")"
+
+            FC3DM_AddTraceSpan(name, category, startTime, endTime, eventArgs)
+
+    wrapper.tracedFunction = func
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    setattr(module, funcName, wrapper)
+
+    return 0
@@ -91,11 +91,15 @@
 # *     A function to fillet the edges of an object
 # *     A function to create a cylinder
 # * 
+# * All functions take Gui == None to mean that we are running without a GUI
+# * (eg. under FreeCADCmd).  In that case object colors and visibility are only
+# * recorded, and the colors are applied when we export the STEP file.
+# * 
 # * 
 # ***************************************************************************
 
 
-import FreeCAD, Draft
+import FreeCAD
 import Part
 import math
 import string
@@ -104,25 +108,126 @@ import sys
 import os
 import re
 import ast
+import time
+import traceback
+import json
+import hashlib
+import threading
+import Queue
+import gzip
+import shutil
+import tempfile
 from FreeCAD import Base
 
+# NumPy is optional.  Without it, we extract and sort vertexes in plain python.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Import our ini file module, reloading it since this changes often!
+import FC3DM_ini
+reload(FC3DM_ini)
+from FC3DM_ini import *
+
+# Import our model cache module, reloading it since this changes often!
+import FC3DM_cache
+reload(FC3DM_cache)
+from FC3DM_cache import *
+
+# Import our pre-flight check module, reloading it since this changes often!
+import FC3DM_preflight
+reload(FC3DM_preflight)
+from FC3DM_preflight import *
+
+# Import our tracing module, reloading it since this changes often!
+import FC3DM_trace
+reload(FC3DM_trace)
+from FC3DM_trace import *
+
+# Import our operation graph module, reloading it since this changes often!
+import FC3DM_graph
+reload(FC3DM_graph)
+from FC3DM_graph import *
+
 scriptPathUtils = ""
 
+# Private work directory for this FreeCAD process (see FC3DM_SetWorkDir())
+workDirUtils = ""
+
 # Fudge factor used by QFN packages to have pins and body be in ever so slightly different planes
 tinyDeltaForQfn = 0.000001
 deltaForBodyCutsLength = 0.2
 deltaForBodyCutsPosition = 0.1
 debugFilePath = "null"
+
+# Debug file, and what we write to it.  See FC3DM_OpenDebugFile().
+# Messages are kept in debugBuffer and written out debugBufferLines at a time,
+# or handed to the debugQueue of a background writer thread.
+logOff = 0
+logError = 1
+logWarning = 2
+logInfo = 3
+logDebug = 4
+logLevels = {"off" : logOff, "error" : logError, "warning" : logWarning, "info" : logInfo, "debug" : logDebug}
+debugLevel = logDebug
+debugFile = None
+debugBuffer = []
+debugBufferLines = 200
+debugQueue = None
+debugThread = None
+
+# Colors and visibility of objects, keyed on (docName, objName).
+# These are kept as plain data, so that we can build models without a GUI.
+# They are applied to the GUI view objects as we go (if we have a GUI),
+# and to the exported objects at STEP export time.
+objectColors = {}
+objectVisibility = {}
+
+# In-memory objects, keyed on (docName, objName), and the operation graph
+# of each document that they refer to.  See FC3DM_SetInMemoryShapes().
+inMemoryShapes = False
+deferredShapes = False
+graphThreads = 1
+objectNodes = {}
+objectGraphs = {}
+
+# Background STEP export, for batch runs.  See FC3DM_StartExportThread().
+# Jobs handed to exportQueue stay in exportJobs until FC3DM_ReapExportJobs()
+# closes their documents.  exportQueue holds at most exportQueueSize jobs, so
+# that only a few finished models are held in memory at once.
+exportQueue = None
+exportThread = None
+exportJobs = []
+exportQueueSize = 1
  
 ###################################################################
 # FC3DM_OpenDebugFile()
-#	Open a debug file to which we will write debug messages
+#	Open a debug file to which we will write debug messages.
+# The file stays open until FC3DM_CloseDebugFile().
+#
+# parms["debugLevel"] is one of "off", "error", "warning", "info", or "debug"
+# (the default).  Messages above this level are dropped.
+# parms["debugWriterThread"] = 1 writes the debug file from a background thread.
 ###################################################################
 def FC3DM_OpenDebugFile(parms):
 
-    # Retrieve the debug file path from parms
     global debugFilePath
+    global debugLevel
+    global debugFile
+    global debugQueue
+    global debugThread
+
+    # Close any debug file left open, eg. by a previous model that raised an exception
+    FC3DM_CloseDebugFile()
+
+    # Retrieve the debug file path and level from parms
     debugFilePath = parms["debugFilePath"]
+    debugLevel = logLevels.get(str(parms.get("debugLevel", "debug")).lower(), logDebug)
+
+    # With debug output disabled, we don't even create the file
+    if (debugLevel == logOff):
+        return 0
 
     # Open the debug file in "write" mode to overwrite any existing "FC3DM_Debug.txt"
     debugFile = open(debugFilePath, "w")
@@ -131,24 +236,82 @@ def FC3DM_OpenDebugFile(parms):
 
     debugFile.write("Debug File Path is " + debugFilePath + "\n\n")
 
-    # Close the file to save the changes
-    debugFile.close()
+    # Start the background writer, if we were asked to
+    if (parms.get("debugWriterThread", 0) != 0):
+        debugQueue = Queue.Queue()
+        debugThread = threading.Thread(target=FC3DM_DebugWriterThread, args=(debugFile, debugQueue))
+        debugThread.daemon = True
+        debugThread.start()
+
+    return 0
+
+
+###################################################################
+# FC3DM_DebugWriterThread()
+#	Function run by the background debug writer thread.  Writes blocks
+# of messages from the queue to the debug file, until it gets None.
+###################################################################
+def FC3DM_DebugWriterThread(fileP, queue):
+
+    while (True):
+        lines = queue.get()
+        if (lines == None):
+            return 0
+
+        fileP.write("".join(lines))
+        fileP.flush()
+
+
+###################################################################
+# FC3DM_IsDebugLevelEnabled()
+#	Function to see whether messages of the given level are written to
+# the debug file.  Use this to skip building expensive debug messages.
+###################################################################
+def FC3DM_IsDebugLevelEnabled(level):
+
+    return ( (debugFile != None) and (level <= debugLevel) )
+
 
 ###################################################################
 # FC3DM_WriteToDebugFile()
 # 	Write necessary debug messages to "FC3DM_Debug.txt" in the working directory
 ###################################################################
-def FC3DM_WriteToDebugFile(msg):
+def FC3DM_WriteToDebugFile(msg, level=logDebug):
 
-    # Open the debug file in append mode to add the message to the existing debug file
-    global debugFilePath
-    debugFile = open(debugFilePath, "a")
-    
-    # Write message to the debug file  
-    debugFile.write(msg + "\n")
+    # Drop messages above the debug level, or when we have no debug file
+    if ( (level > debugLevel) or (debugFile == None) ):
+        return 0
 
-    # Close the file to save the changes
-    debugFile.close()
+    debugBuffer.append(msg + "\n")
+
+    # Write out the buffer when it's full, or right away for errors, so that
+    # an abort message always makes it to the file.
+    if ( (len(debugBuffer) >= debugBufferLines) or (level <= logError) ):
+        FC3DM_FlushDebugFile()
+
+    return 0
+
+
+###################################################################
+# FC3DM_FlushDebugFile()
+#	Function to write out all buffered debug messages.
+###################################################################
+def FC3DM_FlushDebugFile():
+
+    if ( (debugFile == None) or (len(debugBuffer) == 0) ):
+        return 0
+
+    lines = list(debugBuffer)
+    del debugBuffer[:]
+
+    # Hand the messages to the writer thread, or write them ourselves
+    if (debugQueue != None):
+        debugQueue.put(lines)
+    else:
+        debugFile.write("".join(lines))
+        debugFile.flush()
+
+    return 0
     
     
 ###################################################################
@@ -157,2120 +320,3895 @@ def FC3DM_WriteToDebugFile(msg):
 ###################################################################
 def FC3DM_CloseDebugFile():
 
-    
-    # Open the debug file in append mode so that we may close it
-    global debugFilePath
-    debugFile = open(debugFilePath, "a")
+    global debugFile
+    global debugQueue
+    global debugThread
+
+    if (debugFile == None):
+        return 0
+
+    # Write out what's left, and wait for the writer thread to finish
+    FC3DM_FlushDebugFile()
+    if (debugThread != None):
+        debugQueue.put(None)
+        debugThread.join()
+        debugQueue = None
+        debugThread = None
 
     # Close the file to save the changes
     debugFile.close()
+    debugFile = None
 
     return 0
 
 
 ###################################################################
-# is_number()
-# 	Function below was stolen from Daniel Goldberg's post at:
-#  http://stackoverflow.com/questions/354038/how-do-i-check-if-a-string-is-a-number-in-python
-###################################################################
-def is_number(s):
-    try:
-        float(s)
-        return True
-    except ValueError:
-        return False
-
-
-###################################################################
-# FC3DM_SortPinNames()
-#	Function to do custom comparison for pin names.
+# FC3DM_ActivateDocument()
+#	Function to make the given document the active document.
+# If we are running without a GUI (Gui == None), only the App side
+# is touched.
 ###################################################################
-def FC3DM_SortPinNames(a, b):
+def FC3DM_ActivateDocument(App, Gui,
+                           docName):
 
-    # See if we're even sorting a pair of valid pin names
-    if (a.startswith("Pin") and b.startswith("Pin")):
+    App.ActiveDocument=None
+    if (Gui != None):
+        Gui.ActiveDocument=None
+    App.setActiveDocument(docName)
+    App.ActiveDocument=App.getDocument(docName)
+    if (Gui != None):
+        Gui.ActiveDocument=Gui.getDocument(docName)
 
-        # Strip off anything after an '=' char.
-        tup = a.partition('=')
-        a = tup[0];
-        tup = b.partition('=')
-        b = tup[0];
+    return 0
 
-        # Strip off leading "Pin" from a & b pin names
-        aStr = a.replace("Pin", "");
-        bStr = b.replace("Pin", "");
 
-        ## TODO:  Support BGA pin names!
+###################################################################
+# FC3DM_ViewFit()
+#	Function to zoom the active view to fit, if we have a GUI.
+###################################################################
+def FC3DM_ViewFit(App, Gui):
 
-        # Try to convert remaining names to integer
-        try:
-            aInt = int(aStr);
-            bInt = int(bStr);
+    if (Gui != None):
+        Gui.SendMsgToActiveView("ViewFit")
 
-            if aInt > bInt:
-                return 1
-            elif aInt == bInt:
-                return 0
-            else:
-                return -1
-            
-        # This failed, so one or both has a BGA or EP style name.  Use cmp() builtin.
-        except ValueError:
-            return cmp(aStr, bStr)
+    return 0
 
-    # Else at least one of these is not a valid pin name.  Do simple comparison using builtin.
-    else:
-        return cmp(a, b)
-    
 
 ###################################################################
-# FC3DM_NormalizeAbsPath()
-#	Function to normalize an absolute path.  Interpret any "../foo/bar" type of
-# things.  Change path separators to unix style.
+# FC3DM_ActivateWorkbench()
+#	Function to activate a workbench, if we have a GUI.
 ###################################################################
-def FC3DM_NormalizeAbsPath(myPath):
+def FC3DM_ActivateWorkbench(App, Gui,
+                            workbenchName):
 
-    # Interpret any "../foo/bar" structures, remove redundant path separators, etc.
-    myPath = os.path.abspath(myPath)
-#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+    if (Gui != None):
+        Gui.activateWorkbench(workbenchName)
 
-    # Change to unix style path separators
-    myPath = myPath.replace("\\", "/")
-#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
-
-    return myPath
+    return 0
 
 
 ###################################################################
-# FC3DM_NormalizeRelPath()
-#	Function to normalize a relative path.  Interpret any "../foo/bar" type of
-# things.  Change path separators to unix style.
+# FC3DM_SetObjectVisibility()
+#	Function to record whether an object is visible, and apply it to
+# the GUI view object if we have a GUI.
 ###################################################################
-def FC3DM_NormalizeRelPath(myPath):
+def FC3DM_SetObjectVisibility(App, Gui,
+                              docName, objName, visible):
 
-    # Interpret any "../foo/bar" structures, remove redundant path separators, etc.
-    myPath = os.path.relpath(myPath)
-#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+    # Record visibility as plain data
+    objectVisibility[(docName, objName)] = visible
 
-    # Change to unix style path separators
-    myPath = myPath.replace("\\", "/")
-#    FC3DM_WriteToDebugFile("myPath is now: " + myPath)
+    # Apply it now, if we can
+    if ( (Gui != None) and (App.getDocument(docName).getObject(objName) != None) ):
+        if (visible):
+            Gui.getDocument(docName).show(objName)
+        else:
+            Gui.getDocument(docName).hide(objName)
 
-    return myPath
+    return 0
 
 
 ###################################################################
-# FC3DM_ReadIniFile()
-#	Function to read an ini file.  File format is "key=value".
-# 	Debug messages should not be written in this function because
-#	debug file has not yet been created.
+# FC3DM_SetObjectColor()
+#	Function to record the color of an object, and apply it to the GUI
+# view object if we have a GUI.
+#
+# color is either one (r,g,b) tuple for the whole object (ShapeColor),
+# or a list with one (r,g,b) tuple per face (DiffuseColor).
 ###################################################################
-def FC3DM_ReadIniFile(iniFileName,
-                      parms):
-
-    # Open ini file with our paths and parameters
-    print ("About to open ini file :" + iniFileName + ":")
+def FC3DM_SetObjectColor(App, Gui,
+                         docName, objName, color):
 
-    #ins = open(iniFileName, "rb" )
-    lines = [line.strip() for line in open(iniFileName, "r")]
+    # Record color as plain data
+    objectColors[(docName, objName)] = color
 
-    array = []
-    for line in lines:
-        array.append( line )
+    # Apply it now, if we can
+    if ( (Gui != None) and (App.getDocument(docName).getObject(objName) != None) ):
+        FC3DM_ApplyObjectColor(Gui.getDocument(docName).getObject(objName), color)
 
-        # Exclude all lines beginning with '#' comment character
-        if (not (line.startswith('#'))):
-#            print line
-
-            # Split at '#' char to strip off any within-line comments
-            tup = line.partition('#')
-            line = tup[0];
+    return 0
 
-            # Look for '=' sign to indicate name=value pair
-            if (line.find('=') > -1):
-#                print "Found name=value pair!"
 
-                # Split at '=' sign and strip off leading/trailing whitespace
-                tup = line.partition('=')
-                name = tup[0].strip()
-                value = tup[2].strip()
-#                print("name=:" + name + ":")
-#                print("value=:" + value + ":")
+###################################################################
+# FC3DM_GetObjectColor()
+#	Function to retrieve the recorded color of an object.
+# Returns None if no color was ever set for this object.
+###################################################################
+def FC3DM_GetObjectColor(App, Gui,
+                         docName, objName):
 
-                # Use AST library to safely evaluate type (int, float, string, tuple, etc.) and then add to parms list.
-                parms[name] = ast.literal_eval(value)
+    return objectColors.get((docName, objName), None)
 
-    return 0
 
-                
 ###################################################################
-# FC3DM_ReadIniFiles()
-#	Function to read both global and component-specific ini files.
-# 	Debug messages should not be written in this function because
-#	debug file has not yet been created.
+# FC3DM_ApplyObjectColor()
+#	Function to apply a recorded color to a GUI view object.
 ###################################################################
-def FC3DM_ReadIniFiles(scriptPath, parms):
+def FC3DM_ApplyObjectColor(viewObject, color):
 
-    # Store to global variable
-    global scriptPathUtils
-    scriptPathUtils = scriptPath
+    # A list of colors means one color per face
+    if (isinstance(color, list)):
+        viewObject.DiffuseColor = color
+    else:
+        viewObject.ShapeColor = color
 
-    ## Prepare to read global ini file.
-    # Append ini file name.
-    iniFileName = scriptPath + "\\" + "FC3DM_global.ini"
+    return 0
 
-    # Read global ini file
-    FC3DM_ReadIniFile(iniFileName,
-                      parms)
 
-    # Write parms to console window
-    print "Parms are:"
-    print parms
+###################################################################
+# FC3DM_RotateObjectAboutAxis()
+#	Function to rotate an object about an arbitrary axis through the
+# given center point.  The rotation is applied on top of the object's
+# current placement (as Draft.rotate() does), but without needing the
+# Draft workbench, which will not load without a GUI.
+###################################################################
+def FC3DM_RotateObjectAboutAxis(App, Gui,
+                                docName, rotMe, rotDeg,
+                                center, axis):
+
+    # Rotate in memory
+    if ((docName, rotMe) in objectNodes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, rotMe,
+                             "rotate", (rotDeg, (center.x, center.y, center.z), (axis.x, axis.y, axis.z)), [rotMe])
+        return 0
+
+    # Rotation about center:  p' = R*(p - center) + center
+    rot = App.Rotation(axis, rotDeg)
+    base = center.sub(rot.multVec(center))
+    obj = FreeCAD.getDocument(docName).getObject(rotMe)
+    obj.Placement = App.Placement(base, rot).multiply(obj.Placement)
 
-    ## Prepare to read component-specific ini file.
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    # Note:  Assumes that iniFileName from file is a relative directory!
-    #  Thus, we must pre-pend our path to this.
-    iniFileName = FC3DM_NormalizeRelPath(scriptPath + "\\" + parms["iniFileName"])
-    parms["iniFileName"] = iniFileName
+    return 0
 
-    # Read component-specific ini file
-    FC3DM_ReadIniFile(iniFileName,
-                      parms)
 
-    ## Set standard colors for our component (if they are not defined in ini file!)
-    if (not "colorPin1Mark" in parms):
-        parms["colorPin1Mark"] = ((1.00,1.00,1.00)) # White for pin1Mark
+###################################################################
+# FC3DM_SetInMemoryShapes()
+#	Function to choose whether the FC3DM_* helpers work on in-memory
+# Part shapes (True) or on FreeCAD document objects (False).
+#
+# In memory, every operation is recorded as a node in an operation
+# graph per document (see FC3DM_graph.py), and each object name just
+# refers to a node in objectNodes, keyed on (docName, objName).  There
+# are no document recomputes, and identical operations are only done
+# once.  FC3DM_MaterializeObjects() turns the surviving shapes into
+# document objects once, just before we save and export.
+#
+# If deferred is True, nodes are only evaluated when a shape is first
+# needed (normally all at once, by FC3DM_EvaluateObjects()).  Otherwise
+# each node is evaluated as soon as it is recorded.  numThreads > 1 lets
+# the evaluation work on independent nodes concurrently.
+###################################################################
+def FC3DM_SetInMemoryShapes(enabled, deferred=False, numThreads=1):
 
-    if (not "colorPins" in parms):
-        parms["colorPins"] = ((0.80,0.80,0.75)) 	# Bright tin for all pins
+    # Store to global variables
+    global inMemoryShapes
+    global deferredShapes
+    global graphThreads
+    inMemoryShapes = enabled
+    deferredShapes = deferred
+    graphThreads = numThreads
 
-    if (not "colorBody" in parms):
-        parms["colorBody"] = ((0.10,0.10,0.10))		# Black for body    
+    return 0
 
 
-    ## Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
+###################################################################
+# FC3DM_GetObjectGraph()
+#	Function to get the operation graph for a document, creating it
+# if needed.
+###################################################################
+def FC3DM_GetObjectGraph(docName):
 
-    # See if we've been given a relative path for the new model
-    if ("newModelPathRel" in parms):
-        newModelPath = FC3DM_NormalizeAbsPath(scriptPath + "\\" + parms["newModelPathRel"])
-        newModelPath = newModelPath + "/"
-        parms["newModelPath"] = newModelPath
+    if (not docName in objectGraphs):
+        objectGraphs[docName] = FC3DM_NewGraph()
 
-    # Else we expect an absolute path in the ini file.
-    else:
-        newModelPath = parms["newModelPath"]
-        
-    # TODO:  Currently no error checking!
-    newModelName = parms["newModelName"]
-    stepSuffix = parms["stepSuffix"]
-    stepExt = parms["stepExt"]
+    return objectGraphs[docName]
 
-    ## Calculate derived strings
-    newModelPathNameExt = newModelPath + newModelName + ".FCStd"
-    newStepPathNameExt = newModelPath + newModelName + stepSuffix + stepExt
-    logFilePathNameExt = newModelPath + newModelName + ".log"
-    debugFilePath = newModelPath + "FC3DM_Debug.txt"
 
-    # Strip out all "-" characters for use as the FreeCAD document name
-    docName = string.replace(newModelName + stepSuffix, "-", "_")
+###################################################################
+# FC3DM_RecordObjectOp()
+#	Function to record an operation in the document's operation graph,
+# and make objName refer to its result.  inputObjNames are the names of
+# the objects that the operation works on, which must be in memory.
+# See FC3DM_EvaluateGraphNode() for the supported operations.
+###################################################################
+def FC3DM_RecordObjectOp(App, Gui,
+                         docName, objName,
+                         op, args, inputObjNames):
 
-    ## Store derived strings to parms
-    parms["newModelPathNameExt"] = newModelPathNameExt
-    parms["newStepPathNameExt"] = newStepPathNameExt
-    parms["logFilePathNameExt"] = logFilePathNameExt
-    parms["docName"] = docName
+    graph = FC3DM_GetObjectGraph(docName)
 
-    # This is a derived parm. All derived parms should be excluded when writing to the log file in FC3DM_DescribeObjectsToLogFile()
-    parms["debugFilePath"] = debugFilePath
+    # Look up the nodes of the input objects
+    inputs = []
+    for inputObjName in inputObjNames:
+        inputs.append(objectNodes[(docName, inputObjName)])
 
-    ## Remove bogus parms
-    del parms["foo"]
+    # Record this operation and point objName at it
+    nodeId = FC3DM_AddGraphNode(graph,
+                                op, args, inputs)
+    objectNodes[(docName, objName)] = nodeId
 
-    # Write parms to console window
-    print "Parms are:"
-    print parms
+    # Evaluate right away, unless we are deferring all evaluation
+    if (not deferredShapes):
+        FC3DM_EvaluateGraph(App,
+                            graph, [nodeId],
+                            graphThreads)
 
     return 0
 
 
 ###################################################################
-# FC3DM_FilletObjectEdges()
-# 	Function to fillet edges of a given object.
+# FC3DM_GetObjectNodeNames()
+#	Function to find which in-memory objects of a document refer to
+# which graph nodes.  Returns a dict mapping node id to object names.
 ###################################################################
-def FC3DM_FilletObjectEdges(App, Gui,
-                            docName, filletMe, edges, radius):
-
-    FC3DM_WriteToDebugFile("Hello from FC3DM_FilletObjectEdges()")
-    FC3DM_WriteToDebugFile("About to fillet " + filletMe)
-
-    # Init
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-
-    # Fillet the sharp edges of the termination sheet metal
-    Gui.activateWorkbench("PartDesignWorkbench")
-    App.activeDocument().addObject("PartDesign::Fillet","Fillet")
-    App.activeDocument().Fillet.Base = (App.ActiveDocument.getObject(filletMe),edges)
-    Gui.activeDocument().hide(filletMe)
-#    Gui.activeDocument().Fusion.Visibility=False
-    Gui.activeDocument().setEdit('Fillet')
-    App.ActiveDocument.Fillet.Radius = radius
-    App.ActiveDocument.recompute()
-    Gui.activeDocument().resetEdit()
+def FC3DM_GetObjectNodeNames(docName):
 
-    # Remove the objects that made up the fillet
-    App.getDocument(docName).removeObject(filletMe)
-
-    # Copy the cut object and call it the original cutMe name
-    newTermShape = FreeCAD.getDocument(docName).getObject("Fillet").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",filletMe)
-    newTermObj.Shape = newTermShape
-    
-    # Remove the fillet itself
-    App.getDocument(docName).removeObject("Fillet")
+    names = {}
+    for key in objectNodes.keys():
+        if (key[0] == docName):
+            names.setdefault(objectNodes[key], []).append(key[1])
 
-    return 0
+    return names
 
 
 ###################################################################
-# FC3DM_ChamferObjectEdges()
-# 	Function to chamfer edges of a given object.
-#
-# NOTE:  This function is less useful than you may think.  If you
-#  want a 45 deg chamfer, then the two planes meeting at the edge
-#  that you want to chamfer must be perpendicular!  If, on the
-#  other hand, one is angled by the mold angle, then calling this
-#  function will NOT give you a 45 degree absolute chamfer!
+# FC3DM_EvaluateObjects()
+#	Function to evaluate all in-memory objects of a document in one pass.
 ###################################################################
-def FC3DM_ChamferObjectEdges(App, Gui,
-                             docName, chamferMe, edges, size):
+def FC3DM_EvaluateObjects(App, Gui,
+                          docName):
 
-    # Init
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-
-    # Chamfer the specified edge(s)
-    Gui.activateWorkbench("PartDesignWorkbench")
-    App.activeDocument().addObject("PartDesign::Chamfer","Chamfer")
-    App.activeDocument().Chamfer.Base = (App.ActiveDocument.getObject(chamferMe),edges)
-    Gui.activeDocument().hide(chamferMe)
-#    Gui.activeDocument().Fusion.Visibility=False
-    Gui.activeDocument().setEdit('Chamfer')
-    App.ActiveDocument.Chamfer.Size = size
-    App.ActiveDocument.recompute()
-    Gui.activeDocument().resetEdit()
+    names = FC3DM_GetObjectNodeNames(docName)
 
-    # Remove the objects that made up the chamfer
-    App.getDocument(docName).removeObject(chamferMe)
+    # Nothing to do if this document has no in-memory objects
+    if (len(names) == 0):
+        return 0
 
-    # Copy the cut object and call it the original cutMe name
-    newTermShape = FreeCAD.getDocument(docName).getObject("Chamfer").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",chamferMe)
-    newTermObj.Shape = newTermShape
-    
-    # Remove the chamfer itself
-    App.getDocument(docName).removeObject("Chamfer")
+    FC3DM_EvaluateGraph(App,
+                        FC3DM_GetObjectGraph(docName), sorted(names.keys()),
+                        graphThreads)
 
     return 0
 
 
 ###################################################################
-# FC3DM_DescribeObjectsToLogFile()
-#	Function to describe all objects to a log file.
+# FC3DM_DescribeGraphToDebugFile()
+#	Function to describe a document's operation graph to the debug file.
 ###################################################################
-def FC3DM_DescribeObjectsToLogFile(App, Gui,
-                                   parms, pinNames,
+def FC3DM_DescribeGraphToDebugFile(App, Gui,
                                    docName):
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    bodyName = parms["bodyName"]
-    pin1MarkName = parms["pin1MarkName"]
-    logFilePathNameExt = parms["logFilePathNameExt"]
-    stepSuffix = parms["stepSuffix"]
+    # Nothing to do if this document never had in-memory objects
+    if (not docName in objectGraphs):
+        return 0
 
-    # Init
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+    FC3DM_WriteToDebugFile("Operation graph for " + docName + ":")
+    for line in FC3DM_DumpGraph(objectGraphs[docName], FC3DM_GetObjectNodeNames(docName)):
+        FC3DM_WriteToDebugFile(line)
 
-    ## Analyze stepSuffix so that we can strip the trailing digits from this from all parms.
-    ## This way, our generated logfile will not encode the rev number of this STEP file.
-    # Strip off the trailing digits.  Eg. convert "_TRT1" to "_TRT".
-    stepSuffixStripped = re.sub('[0-9]+$', '', stepSuffix)
+    return 0
 
-    ## Dump all parms to string list
-    strList = list()
 
-    # Loop over all parms
-    for name in parms:
+###################################################################
+# FC3DM_GetObjectShape()
+#	Function to get the shape of an object, whether it lives in memory
+# or in the document.  In-memory shapes are shared, so callers must
+# not modify them.
+###################################################################
+def FC3DM_GetObjectShape(App, Gui,
+                         docName, objName):
 
-        # Strip off any trailing digits from stepSuffix and derived strings (eg. convert "_TRT1" to "_TRT")
-        value = str(parms[name])
-        valueStripped = re.sub(stepSuffix, stepSuffixStripped, value)
+    # See if this object lives in memory
+    if ((docName, objName) in objectNodes):
+        return FC3DM_EvaluateGraph(App,
+                                   FC3DM_GetObjectGraph(docName), [objectNodes[(docName, objName)]],
+                                   graphThreads)[0]
 
-        # Append this to string list
-        strList.append(name + "=" + valueStripped)
+    # Links (see FC3DM_InstancePins()) have no Shape of their own
+    obj = App.getDocument(docName).getObject(objName)
+    if (not hasattr(obj, "Shape")):
+        return Part.getShape(obj)
 
-    # Sort the string list
-    strList.sort(FC3DM_SortPinNames)
+    return obj.Shape
 
-    ## Open the logfile
-    fileP = open(logFilePathNameExt, 'w')
 
-    # Log all the parms to logfile
-    fileP.write("Parms:\n")
-    for i in strList:
-    
-        #FC3DM_WriteToDebugFile(i)
-        # We will exclude some of the derived parms when writing to the log file.
-        if ( (not i.startswith("debugFilePath")) and (not i.startswith("footprintType")) and (not i.startswith("hasEp")) and (not i.startswith("newModelPathRel")) ):
-            fileP.write(i + '\n')
+###################################################################
+# FC3DM_GetObjectFaceSources()
+#	Function to get, for each face of a fused object, the positions of
+# the fused objects that the face came from.  See FC3DM_FuseShapesWithHistory().
+# Returns None if this is unknown, eg. for objects that live in the document.
+###################################################################
+def FC3DM_GetObjectFaceSources(App, Gui,
+                               docName, objName):
 
-    ## Log all pin vertices to logfile.
-    # Loop over all the pin names.
-    for pin in pinNames:
+    # Only fusions done in memory record where their faces came from
+    if ((docName, objName) not in objectNodes):
+        return None
 
-        # Initialize an array that will store the vertices and be sorted
-        pinVertexArray = []
-        
-        FC3DM_WriteToDebugFile("About to describe pin " + pin + " to log file")
-        print("About to describe pin " + pin + " to log file!")
+    FC3DM_GetObjectShape(App, Gui, docName, objName)
 
-        # Declare the name of this object
-        fileP.write("\n" + pin + ':\n')
+    return FC3DM_GetObjectGraph(docName)["faceSources"].get(objectNodes[(docName, objName)], None)
 
-        # Declare the soon-to-be color of this object
-        fileP.write("Color " + str(parms["colorPins"]) + "\n")
 
-        # Loop over all the faces in this pin.
-        for face in App.ActiveDocument.getObject(pin).Shape.Faces:
+###################################################################
+# FC3DM_SetObjectShape()
+#	Function to create an object with the given shape, either in memory
+# or as a Part::Feature in the document.  source, if given, identifies
+# the shape (see FC3DM_AddGraphValue()).
+###################################################################
+def FC3DM_SetObjectShape(App, Gui,
+                         docName, objName, shape, source=""):
 
-            # Loop over all the vertexes in this pin
-            for vertex in face.Vertexes:
-            
-                # Add this pin vertex to an array that will be sorted and printed to the log file
-                pinVertexArray.append(str(vertex.Point))
-                
-        # FC3DM_WriteToDebugFile(pin + " vertices: ")
-        # Write the sorted array to the log file if the line is not null
-        pinVertexArray.sort(FC3DM_SortPinNames)
-        for line in pinVertexArray:
-            if (line != ""):
-                # FC3DM_WriteToDebugFile(line)
-                fileP.write(line + "\n")
-        fileP.write("")
-                
+    if (inMemoryShapes):
+        objectNodes[(docName, objName)] = FC3DM_AddGraphValue(FC3DM_GetObjectGraph(docName), shape, source)
 
-    ## Log all body vertices to logfile.
-    # Declare the name of this object
-    fileP.write("\n" + bodyName + ':\n')
-    FC3DM_WriteToDebugFile("About to describe " + bodyName + " to log file")
+    else:
+        newObj = App.getDocument(docName).addObject("Part::Feature",objName)
+        newObj.Shape = shape
 
-    # Declare the soon-to-be color of this object
-    fileP.write("Color " + str(parms["colorBody"]) + "\n")
+    return 0
 
-    # Initialize an array that will store the vertices and be sorted
-    bodyVertexArray = []
-    
-    # Loop over all the faces in this body.
-    for face in App.ActiveDocument.getObject(bodyName).Shape.Faces:
 
-        # Loop over all the vertexes in this body
-        for vertex in face.Vertexes:
-            # Add this vertex to an array that will be sorted and written to the log file.
-            bodyVertexArray.append(str(vertex.Point))
+###################################################################
+# FC3DM_FetchCachedShapes()
+#	Function to look up a set of shapes in the shape cache (see
+# FC3DM_cache.py), by the kind of shapes that they are (eg. "gullwingPin")
+# and the dict of inputs that define them.  On a hit, creates objects
+# named objNames with the cached shapes, and returns True.  Returns False
+# on a miss, or if there is no shape cache.
+###################################################################
+def FC3DM_FetchCachedShapes(App, Gui,
+                            parms,
+                            docName, kind, inputs, objNames):
 
-    # FC3DM_WriteToDebugFile("Body vertices: ")
-    # Write the sorted array to the log file if the line is not null
-    bodyVertexArray.sort(FC3DM_SortPinNames)
-    for line in bodyVertexArray:
-        if (line != ""):
-            # FC3DM_WriteToDebugFile(bodyVertexArray[i])
-            fileP.write(line + "\n")
-    fileP.write("")
+    cacheDir = FC3DM_GetShapeCacheDir(scriptPathUtils, parms)
+    if (cacheDir == ""):
+        return False
 
-    ## Log all pin1Mark vertices to logfile.
-    # Declare the name of this object
-    fileP.write("\n" + pin1MarkName + ':\n')
+    key = FC3DM_ComputeShapeCacheKey(scriptPathUtils, kind, inputs)
+    found = FC3DM_LookUpCacheEntry(cacheDir, key)
+    if (found == None):
+        FC3DM_WriteToDebugFile("Shape cache miss for " + kind + " " + key, logInfo)
+        return False
+    (entryDir, entry) = found
 
-    # Declare the soon-to-be color of this object
-    fileP.write("Color " + str(parms["colorPin1Mark"]) + "\n")
+    # Read all the shapes, before we create any objects
+    shapes = []
+    try:
+        for i in range(len(objNames)):
+            shapes.append(Part.read(os.path.join(entryDir, "shape" + str(i) + ".brep")))
 
-    # Initialize an array that will store the vertices and be sorted
-    pin1MarkerVertexArray = []
+        # Mark this entry as recently used
+        os.utime(os.path.join(entryDir, "entry.json"), None)
 
-    # Loop over all the faces in this pin1Mark.
-    for face in App.ActiveDocument.getObject(pin1MarkName).Shape.Faces:
+    # The entry was pruned while we were reading it
+    except Exception:
+        FC3DM_WriteToDebugFile("Shape cache entry " + key + " went away while we read it.", logWarning)
+        return False
 
-        # Loop over all the vertexes in this pin1Mark
-        for vertex in face.Vertexes:
+    FC3DM_WriteToDebugFile("Shape cache hit for " + kind + " " + key, logInfo)
+    for i in range(len(objNames)):
+        FC3DM_SetObjectShape(App, Gui,
+                             docName, objNames[i], shapes[i], kind + " " + key + " " + str(i))
 
-                        
-            # Add this pin vertex to an array that will be sorted and printed to the log file
-            pin1MarkerVertexArray.append(str(vertex.Point))
-                
-    # FC3DM_WriteToDebugFile("Pin1 Mark vertices: ")
-    # Write the sorted array to the log file if the line is not null
-    pin1MarkerVertexArray.sort(FC3DM_SortPinNames)
-    for line in pin1MarkerVertexArray:
-        if (line != ""):
-            # FC3DM_WriteToDebugFile(line)
-            fileP.write(line + "\n")
-    fileP.write("")
+    return True
 
 
-    # Close the logfile
-    fileP.close()
-        
+###################################################################
+# FC3DM_StoreCachedShapes()
+#	Function to store the shapes of objNames in the shape cache, as the
+# shapes of the given kind built from the given inputs (see
+# FC3DM_FetchCachedShapes()).  Does nothing if there is no shape cache.
+###################################################################
+def FC3DM_StoreCachedShapes(App, Gui,
+                            parms,
+                            docName, kind, inputs, objNames):
+
+    cacheDir = FC3DM_GetShapeCacheDir(scriptPathUtils, parms)
+    if (cacheDir == ""):
+        return 0
+
+    key = FC3DM_ComputeShapeCacheKey(scriptPathUtils, kind, inputs)
+    if (FC3DM_LookUpCacheEntry(cacheDir, key) != None):
+        return 0
+
+    # Write the shapes to BREP files, for FC3DM_StoreCacheEntry() to copy into place
+    tempDir = tempfile.mkdtemp()
+    filePaths = []
+    for i in range(len(objNames)):
+        filePath = os.path.join(tempDir, "shape" + str(i) + ".brep")
+        FC3DM_GetObjectShape(App, Gui, docName, objNames[i]).exportBrep(filePath)
+        filePaths.append((filePath, "shape" + str(i) + ".brep"))
+
+    FC3DM_StoreCacheEntry(cacheDir, key,
+                          {"kind" : kind,
+                           "inputs" : inputs},
+                          filePaths, parms.get("shapeCacheMaxBytes", shapeCacheDefaultMaxBytes))
+    shutil.rmtree(tempDir, True)
+
+    FC3DM_WriteToDebugFile("Stored " + kind + " in shape cache as " + key, logInfo)
+
     return 0
 
 
 ###################################################################
-# FC3DM_FuseObjects()
-#	Function to fuse two objects together.
+# FC3DM_SetObjectPlacement()
+#	Function to set the placement of an object, whether it lives in
+# memory or in the document.
 ###################################################################
-def FC3DM_FuseObjects(App, Gui,
-                      docName, fuseMe, addMeToFusion):
-
-    # Fuse two objects
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    App.activeDocument().addObject("Part::MultiFuse","Fusion")
-    App.activeDocument().Fusion.Shapes = [App.ActiveDocument.getObject(fuseMe), App.ActiveDocument.getObject(addMeToFusion)]
-    App.ActiveDocument.recompute()
+def FC3DM_SetObjectPlacement(App, Gui,
+                             docName, objName, placement):
 
-    # Remove the objects that made up the fusion
-    App.getDocument(docName).removeObject(fuseMe)
-    App.getDocument(docName).removeObject(addMeToFusion)
+    # See if this object lives in memory
+    if ((docName, objName) in objectNodes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, objName,
+                             "placement", (FC3DM_PlacementToTuple(placement),), [objName])
 
-    # Copy the fusion object and call it the original fuseMe name
-    newTermShape = FreeCAD.getDocument(docName).getObject("Fusion").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",fuseMe)
-    newTermObj.Shape = newTermShape
-    
-    # Remove the fusion itself
-    App.getDocument(docName).removeObject("Fusion")
+    else:
+        App.getDocument(docName).getObject(objName).Placement = placement
 
     return 0
 
 
 ###################################################################
-# FC3DM_FuseSetOfObjects()
-#	Function to fuse a set of objects together and preserve face colors.
+# FC3DM_RemoveObject()
+#	Function to remove an object, whether it lives in memory or in
+# the document.
 ###################################################################
-def FC3DM_FuseSetOfObjects(App, Gui,
-                           parms,
-                           docName, objNameList, fusionName):
-
-    FC3DM_WriteToDebugFile("Hello from FC3DM_FuseSetOfObjects()")
+def FC3DM_RemoveObject(App, Gui,
+                       docName, objName):
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    bodyName = parms["bodyName"]
-    pin1MarkName = parms["pin1MarkName"]
-    FC3DM_WriteToDebugFile("pin1MarkName is: " + pin1MarkName + ":")
+    # See if this object lives in memory.  Its node stays in the graph,
+    # since other objects may have been built from it.
+    if ((docName, objName) in objectNodes):
+        del objectNodes[(docName, objName)]
 
+    else:
+        App.getDocument(docName).removeObject(objName)
 
-    # Configure active document
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    
-    FC3DM_WriteToDebugFile("Creating an object list")
-    # Create list of objects, starting with object names
-    objs=[]
-    for i in objNameList:
-        
-        FC3DM_WriteToDebugFile("Adding new obj from objNameList: " + i + ":.")
-        objs.append(App.activeDocument().getObject(i))
+    return 0
 
-    # Do the multi-fusion.  Write to new "Temp" object.
-    FC3DM_WriteToDebugFile("Writing multi-fusion to \"Temp\"")
-    Gui.activateWorkbench("PartWorkbench")
-    FC3DM_WriteToDebugFile("Activated workbench")
-    App.activeDocument().addObject("Part::MultiFuse","Temp")
-    FC3DM_WriteToDebugFile("Added object")
-    App.activeDocument().getObject("Temp").Shapes = objs
-    FC3DM_WriteToDebugFile("Got object")
-    FC3DM_WriteToDebugFile("The following step may take as long as 5 minutes. Be patient for complicated components")
-    App.ActiveDocument.recompute()
 
-    # Copy the temp fusion object and call it the desired fusion name
-    FC3DM_WriteToDebugFile("Copying \"Temp\" to " + fusionName)
-    newTermShape = FreeCAD.getDocument(docName).getObject("Temp").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature", fusionName)
-    newTermObj.Shape = newTermShape
-    App.ActiveDocument.recompute()
-    FC3DM_WriteToDebugFile("Done with multi-fusion.")
+###################################################################
+# FC3DM_InstancePins()
+#	Function to turn in-memory pins that are just a template pin put in
+# a new place into links to one shared template object, so that the
+# template geometry is stored (and exported to STEP) only once.
+#
+# Needs App::Link (FreeCAD 0.19 and later).  Each template becomes a
+# hidden Part::Feature named "PinInstanceTemplateN", with the color of
+# the first pin that uses it.  Each pin becomes an App::Link with the
+# pin's name and placement.  Pins that are not instances are left alone.
+###################################################################
+def FC3DM_InstancePins(App, Gui,
+                       docName, pinNames):
 
+    graph = FC3DM_GetObjectGraph(docName)
+    templates = {}
 
-    ### Preserve face colors for the body and pin1Mark!
-    # Cache vertex lists for the body and pin1Mark, so that we may find them later
-    # in the fused object.
-    FC3DM_WriteToDebugFile("About to loop over pin1Mark faces")
-    ## Loop over all faces in the pin1Mark object
-    pin1MarkVerts=[]
-    for i in App.ActiveDocument.getObject(pin1MarkName).Shape.Faces:
-        FC3DM_WriteToDebugFile("Found face in pin1Mark object!")
+    for pin in pinNames:
 
-        # Loop over all the vertexes in this face
-        bufList = []
-        for j in i.Vertexes:
+        # See if this pin is an instance of some template shape
+        instance = None
+        if ((docName, pin) in objectNodes):
+            instance = FC3DM_GetGraphInstance(graph, objectNodes[(docName, pin)])
+        if (instance == None):
+            continue
 
-            bufList.append(str(j.Point))
+        (templateId, placementTuple) = instance
 
-        # Sort bufList so that we can reliably pattern match against it later on.
-        bufList.sort()
+        # Create the template object the first time that we see it
+        if (not templateId in templates):
 
-        # Write bufList to debug file
-        FC3DM_WriteToDebugFile("Vertexes for this face are: " + str(bufList))
+            templateName = "PinInstanceTemplate" + str(len(templates))
+            templateObj = App.getDocument(docName).addObject("Part::Feature",templateName)
+            templateObj.Shape = FC3DM_EvaluateGraph(App,
+                                                    graph, [templateId],
+                                                    graphThreads)[0]
+            templates[templateId] = templateObj
 
-        # Store all the vertexes for this face as a string array
-        pin1MarkVerts.append(str(bufList))
+            color = FC3DM_GetObjectColor(App, Gui, docName, pin)
+            if (color != None):
+                FC3DM_SetObjectColor(App, Gui, docName, templateName, color)
+            FC3DM_SetObjectVisibility(App, Gui, docName, templateName, False)
 
+        # Replace the in-memory pin with a link to the template
+        del objectNodes[(docName, pin)]
+        link = App.getDocument(docName).addObject("App::Link",pin)
+        link.LinkedObject = templates[templateId]
+        link.Placement = FC3DM_TupleToPlacement(App, placementTuple)
 
-    FC3DM_WriteToDebugFile("About to loop over body faces")
-    ## Loop over all faces in the body object
-    bodyVerts=[]
-    for i in App.ActiveDocument.getObject(bodyName).Shape.Faces:
-        FC3DM_WriteToDebugFile("Found face in body object!")
+    FC3DM_WriteToDebugFile("Instanced " + str(len(pinNames)) + " pins from " + str(len(templates)) + " template(s)")
 
-        # Loop over all the vertexes in this face
-        bufList = []
-        for j in i.Vertexes:
+    return 0
 
-            bufList.append(str(j.Point))
 
-        # Sort bufList so that we can reliably pattern match against it later on.
-        bufList.sort()
+###################################################################
+# FC3DM_MaterializeObjects()
+#	Function to turn all in-memory shapes of a document into
+# Part::Feature objects in that document, with their recorded colors
+# and visibility.  Does nothing for objects that already live in the
+# document.
+###################################################################
+def FC3DM_MaterializeObjects(App, Gui,
+                             docName):
 
-        # Write bufList to debug file
-        FC3DM_WriteToDebugFile("Vertexes for this face are: " + str(bufList))
+    # Evaluate everything that is still pending, in one pass
+    FC3DM_EvaluateObjects(App, Gui,
+                          docName)
+    FC3DM_DescribeGraphToDebugFile(App, Gui,
+                                   docName)
 
-        # Store all the vertexes for this face as a string array
-        bodyVerts.append(str(bufList))
+    # Find all in-memory objects belonging to this document
+    objNames = []
+    for key in objectNodes.keys():
+        if (key[0] == docName):
+            objNames.append(key[1])
+    objNames.sort()
 
+    # Add a document object for each of them
+    for objName in objNames:
 
-    FC3DM_WriteToDebugFile("About to loop over pin faces")
-    ## Loop over all faces in the pin objects
-    pinVerts=[]
-    for k in objNameList:
+        newObj = App.getDocument(docName).addObject("Part::Feature",objName)
+        newObj.Shape = FC3DM_GetObjectShape(App, Gui, docName, objName)
+        del objectNodes[(docName, objName)]
 
-        # See if this object name is the body or pin 1 marker.
-        if ( (k != bodyName) and (k != pin1MarkName) ):
+        # Apply recorded color and visibility, if we have a GUI to show them
+        if (Gui != None):
+            color = FC3DM_GetObjectColor(App, Gui, docName, objName)
+            if (color != None):
+                FC3DM_ApplyObjectColor(Gui.getDocument(docName).getObject(objName), color)
 
-            FC3DM_WriteToDebugFile("Found pin object named " + k + ".")
+            if ((docName, objName) in objectVisibility):
+                FC3DM_SetObjectVisibility(App, Gui, docName, objName, objectVisibility[(docName, objName)])
 
-            # Loop over all the vertexes in this face
-            for i in App.ActiveDocument.getObject(k).Shape.Faces:
-                FC3DM_WriteToDebugFile("Found face in pin object!")
+    App.getDocument(docName).recompute()
 
-                # Loop over all the vertexes in this face
-                bufList = []
-                for j in i.Vertexes:
+    return 0
 
-                    bufList.append(str(j.Point))
 
-                # Sort bufList so that we can reliably pattern match against it later on.
-                bufList.sort()
+###################################################################
+# is_number()
+# 	Function below was stolen from Daniel Goldberg's post at:
+#  http://stackoverflow.com/questions/354038/how-do-i-check-if-a-string-is-a-number-in-python
+###################################################################
+def is_number(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
 
-                # Write bufList to debug file
-                FC3DM_WriteToDebugFile("Vertexes for this face are: " + str(bufList))
 
-                # Store all the vertexes for this face as a string array
-                pinVerts.append(str(bufList))
+###################################################################
+# FC3DM_ReadIniFiles()
+#	Function to read both global and component-specific ini files.
+# 	Debug messages should not be written in this function because
+#	debug file has not yet been created.
+#
+# If iniFileNameOverride is given (relative to scriptPath), it is used
+# in place of the iniFileName pointer in FC3DM_global.ini.  This is how
+# the batch runner builds several components without rewriting the global ini.
+# If record is given, the component-specific parms come from that bundle record.
+# See FC3DM_ParseIniFiles() in FC3DM_ini.py, which does all the real work.
+###################################################################
+def FC3DM_ReadIniFiles(scriptPath, parms, iniFileNameOverride="", record=None):
 
+    # Store to global variable
+    global scriptPathUtils
+    scriptPathUtils = scriptPath
 
-    ## Prepare to compare all faces in the fusion with pin1Mark, pin, and body faces
-    faceColors=[]
+    # Call FC3DM_ParseIniFiles() to do all the real work
+    try:
+        FC3DM_ParseIniFiles(scriptPath, parms, iniFileNameOverride,
+                            workDirUtils, True, record)
+
+    # We can't build from these ini files.  We don't know this model's debug file yet,
+    # so report this in the one in our work directory (or next to this script).
+    except FC3DM_IniError as e:
+        print("Bad ini file: " + str(e))
+        if (workDirUtils != ""):
+            FC3DM_OpenDebugFile({"debugFilePath" : os.path.join(workDirUtils, "FC3DM_Debug.txt")})
+        else:
+            FC3DM_OpenDebugFile({"debugFilePath" : os.path.join(scriptPath, "FC3DM_Debug.txt")})
+        FC3DM_WriteToDebugFile("Abort message: Bad ini file: " + str(e), logError)
+        FC3DM_MyExit(-1)
 
-    # Loop over all the faces in the fusion object
-    for xp in App.ActiveDocument.getObject(fusionName).Shape.Faces:
-        FC3DM_WriteToDebugFile("")
-        FC3DM_WriteToDebugFile("Found face in fusion object!")
-
-        # Clear found flags for pin1Mark, body, and pin
-        isPin1Mark = False;
-        isBody = False;
-        isPin = False;
-
-        # Loop over all the vertexes in this fusion shape face
-        buf = cStringIO.StringIO()
-        bufList = []
-        for j in xp.Vertexes:
-
-            # Record this vertex in a string buffer
-            print >> buf, j.Point
-            bufList.append(str(j.Point))
-
-        # Sort bufList so that we can reliably pattern match against it later on.
-        bufList.sort()
-        
-        # Write bufList to debug file
-        FC3DM_WriteToDebugFile("Vertexes for this face are:"  + str(bufList))
+    return 0
 
-        # Convert this vertex to a string.
-        thisVert = ""
-        thisVert = str(bufList)
 
+###################################################################
+# FC3DM_FilletObjectEdges()
+# 	Function to fillet edges of a given object.
+#
+# edges may be FreeCAD edge names (eg. "Edge4"), or geometric edge
+# selectors (see FC3DM_SelectEdges() in FC3DM_graph.py).
+###################################################################
+def FC3DM_FilletObjectEdges(App, Gui,
+                            docName, filletMe, edges, radius):
 
-        # See if this face is the same as a face from the pin1Mark object
-        for i in pin1MarkVerts:
+    FC3DM_FilletObjectEdgeGroups(App, Gui,
+                                 docName, filletMe, [(radius, edges)])
 
-            # I can't get Faces.isSame() to actually work.  That's why I'm doing this
-            # kludge with sprint'ing vertex info to a string.
-#            FC3DM_WriteToDebugFile(xp.isSame(i))
-        
-            # See if the i string (from a pin1Mark vertex string) equals our current vertex string
-            if (thisVert == i):
-                isPin1Mark = True;
+    return 0
 
-        # See if this face is the same as a face from the pin1Mark object
-        for i in pinVerts:
 
-            # I can't get Faces.isSame() to actually work.  That's why I'm doing this
-            # kludge with sprint'ing vertex info to a string.
-#            FC3DM_WriteToDebugFile(xp.isSame(i))
-        
-            # See if the i string (from a pin vertex string) equals our current vertex string
-            if (thisVert == i):
-                isPin = True;
+###################################################################
+# FC3DM_FilletObjectEdgeGroups()
+# 	Function to fillet several groups of edges of a given object, each
+# with its own radius, in one go.  groups is a list of (radius, edges)
+# pairs, with edges as for FC3DM_FilletObjectEdges().
+###################################################################
+def FC3DM_FilletObjectEdgeGroups(App, Gui,
+                                 docName, filletMe, groups):
 
-        # See if this face is the same as a face from the body object
-        for i in bodyVerts:
+    FC3DM_WriteToDebugFile("Hello from FC3DM_FilletObjectEdgeGroups()")
+    FC3DM_WriteToDebugFile("About to fillet " + filletMe)
 
-            # I can't get Faces.isSame() to actually work.  That's why I'm doing this
-            # kludge with sprint'ing vertex info to a string.
-#            FC3DM_WriteToDebugFile(xp.isSame(i))
-        
-            # See if the i string (from a body vertex string) equals our current vertex string
-            if (thisVert == i):
-                isBody = True;
+    FC3DM_FinishObjectEdges(App, Gui,
+                            docName, filletMe, "fillet", groups)
 
+    return 0
 
-        # See if we found a face that derives from our pin1Mark
-        if (isPin1Mark):
 
-            FC3DM_WriteToDebugFile("This face in fusion exactly matched a pin1Mark face.")
+###################################################################
+# FC3DM_ChamferObjectEdges()
+# 	Function to chamfer edges of a given object.
+#
+# edges may be FreeCAD edge names (eg. "Edge4"), or geometric edge
+# selectors (see FC3DM_SelectEdges() in FC3DM_graph.py).
+#
+# NOTE:  This function is less useful than you may think.  If you
+#  want a 45 deg chamfer, then the two planes meeting at the edge
+#  that you want to chamfer must be perpendicular!  If, on the
+#  other hand, one is angled by the mold angle, then calling this
+#  function will NOT give you a 45 degree absolute chamfer!
+###################################################################
+def FC3DM_ChamferObjectEdges(App, Gui,
+                             docName, chamferMe, edges, size):
 
-            # Color Pin1Mark white
-            faceColors.append(parms["colorPin1Mark"])
+    FC3DM_ChamferObjectEdgeGroups(App, Gui,
+                                  docName, chamferMe, [(size, edges)])
 
-        # See if we found a face that derives from a pin
-        elif (isPin):
+    return 0
 
-            FC3DM_WriteToDebugFile("This face in fusion exactly matched a pin face.")
 
-            # Color pin bright tin.
-            faceColors.append(parms["colorPins"])
-        
-        # See if we found a face that derives from our body
-        elif (isBody):
+###################################################################
+# FC3DM_ChamferObjectEdgeGroups()
+# 	Function to chamfer several groups of edges of a given object, each
+# with its own size, in one go.  groups is a list of (size, edges)
+# pairs, with edges as for FC3DM_ChamferObjectEdges().
+###################################################################
+def FC3DM_ChamferObjectEdgeGroups(App, Gui,
+                                  docName, chamferMe, groups):
 
-            FC3DM_WriteToDebugFile("This face in fusion exactly matched a body face.")
+    FC3DM_FinishObjectEdges(App, Gui,
+                            docName, chamferMe, "chamfer", groups)
 
-            # Color body black
-            faceColors.append(parms["colorBody"])
+    return 0
 
-        # Else we're not sure what it is.  Assume that it's part of the body
-        # that got modified as pins fused to it, and thus wasn't an exact match.
-        else:
 
-            FC3DM_WriteToDebugFile("This face in fusion didn't match a known face!")
+###################################################################
+# FC3DM_FinishObjectEdges()
+# 	Function to fillet or chamfer (op) groups of edges of a given object.
+#
+# This calls makeFillet() or makeChamfer() on the shape directly (see
+# FC3DM_MakeEdgeFinish()), so there is no need for the PartDesign
+# workbench, a PartDesign feature, or its edit mode.
+###################################################################
+def FC3DM_FinishObjectEdges(App, Gui,
+                            docName, objName, op, groups):
 
-            # Count the number of vertex lines in this string.
-            numLines = len(buf.getvalue().splitlines())
+    # Edge selectors may be lists.  Graph node arguments must be tuples.
+    groupsTuple = tuple([(radius, tuple(edges)) for (radius, edges) in groups])
 
-            # Empirically I've seen that unmatched pin faces have only 4 vertexes.
-            # TODO:  Will this simple distinction be true for non-gullwing ICs???
-            isChipResistor = False
-            if ("compType" in parms):
-                if (parms["compType"] == "chipResistor"):
-                    isChipResistor = True
-            FC3DM_WriteToDebugFile(" isChipResistor = " + str(isChipResistor))
+    # Fillet or chamfer in memory
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, objName,
+                             op, (groupsTuple,), [objName])
+        return 0
 
-            if ( (numLines <= 4) and (isChipResistor == False) ):
-                FC3DM_WriteToDebugFile(" numLines is " + str(numLines) + ".  Hoping it's part of a pin!")
+    # Init
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
 
-                # Color pin bright tin.
-                faceColors.append(parms["colorPins"])
-        
-            # Else we assume that it's part of the body.
-            else:
-           
-                FC3DM_WriteToDebugFile(" numLines is " + str(numLines) + ".  Hoping it's part of the body!")
+    # Fillet or chamfer the shape of the object
+    newShape = FC3DM_MakeEdgeFinish(App, App.getDocument(docName).getObject(objName).Shape, op, groupsTuple)
 
-                # Color body black
-                faceColors.append(parms["colorBody"])
+    # Replace the object with one of the new shape, by the same name
+    App.getDocument(docName).removeObject(objName)
+    FC3DM_SetObjectShape(App, Gui,
+                         docName, objName, newShape)
 
+    return 0
 
-    # Now that we have a list of all the face colors that we want, proceed to apply it
-    # to the fusion shape.
-    # A special thanks here to FC guru/author WMayer for his forum post at
-    # https://sourceforge.net/apps/phpbb/free-cad/viewtopic.php?f=19&t=4117
-    # which pointed me in the right direction to make this actually work.                
-    FC3DM_WriteToDebugFile("Attempting to set fusion face colors")
-    FC3DM_WriteToDebugFile("Attempting to set fusion face colors")
-    Gui.ActiveDocument.getObject(fusionName).DiffuseColor=faceColors
-    App.ActiveDocument.recompute()
-    FC3DM_WriteToDebugFile("Attempted to set fusion face colors")
 
-    FC3DM_WriteToDebugFile("Deleting the original objects that made up the fusion")
-    # Delete the original objects that comprised the fusion
-    for i in objNameList:
+###################################################################
+# FC3DM_DescribeObjectsToLogFile()
+#	Function to describe all objects to a log file.
+###################################################################
+def FC3DM_DescribeObjectsToLogFile(App, Gui,
+                                   parms, pinNames,
+                                   docName):
 
-        App.activeDocument().removeObject(i)
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    bodyName = parms["bodyName"]
+    pin1MarkName = parms["pin1MarkName"]
+    logFilePathNameExt = parms["logFilePathNameExt"]
 
-    # Remove the temp fusion
-    App.getDocument(docName).removeObject("Temp")
-    App.ActiveDocument.recompute()
+    # Init
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
 
-    # Deallocate list
-    del objs
+    ## Get the normalized parm lines.  These don't encode the rev number of this STEP file.
+    parmLines = FC3DM_GetLoggedParmLines(parms)
 
-    return 0
+    ## Describe all objects:  pins, then body, then pin1Mark.
+    objects = []
+    for pin in pinNames:
+        objects.append((pin, parms["colorPins"]))
+    objects.append((bodyName, parms["colorBody"]))
+    objects.append((pin1MarkName, parms["colorPin1Mark"]))
+
+    # Only keep all the vertexes of each object around when we are asked to log them
+    verboseLog = (parms.get("verboseLog", 0) != 0)
+
+    # Fingerprint each object, and the whole model.  Extract the vertexes of each object just once.
+    objectFingerprints = []
+    objectPoints = []
+    for (objName, color) in objects:
+        FC3DM_WriteToDebugFile("About to fingerprint " + objName)
+        (points, faceLines) = FC3DM_ExtractShapeVertexes(FC3DM_GetObjectShape(App, Gui, docName, objName))
+        objectFingerprints.append(FC3DM_ComputeObjectFingerprint(points, faceLines, color))
+        if (verboseLog):
+            objectPoints.append(points)
+
+    fingerprint = FC3DM_ComputeModelFingerprint(parmLines, objects, objectFingerprints)
+    parms["fingerprint"] = fingerprint
+    FC3DM_WriteToDebugFile("Model fingerprint is " + fingerprint)
+
+    ## Write the fingerprint to its own file, so that callers need only compare this one line
+    fileP = open(parms["fingerprintFilePathNameExt"], 'w')
+    fileP.write("Fingerprint " + fingerprint + "\n")
+    fileP.close()
 
+    ## Build up the whole log, then write it in one go.
+    # The fingerprint goes first, so that callers may compare just the first line
+    logLines = ["Fingerprint " + fingerprint]
 
-###################################################################
-# FC3DM_CutWithSpecified Object()
-#	Function to cut an object with an object that was created earlier.
-###################################################################
-def FC3DM_CutWithSpecifiedObject(App, Gui,
-                                 docName, cutMe, cutter):
+    # Log all the parms to logfile
+    logLines.append("Parms:")
+    logLines.extend(parmLines)
 
-    # Perform cut
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    App.activeDocument().addObject("Part::Cut","Cut000")
-    App.activeDocument().Cut000.Base = FreeCAD.getDocument(docName).getObject(cutMe)
-    App.activeDocument().Cut000.Tool = App.activeDocument().Cutter
-    Gui.activeDocument().hide(cutMe)
-    Gui.activeDocument().hide(cutter)
-    App.ActiveDocument.recompute()
-    
-    # Remove the objects that made up the cut
-    App.getDocument(docName).removeObject(cutMe)
-    App.getDocument(docName).removeObject(cutter)
+    ## Log all objects to logfile.
+    for i in range(len(objects)):
 
-    # Copy the cut object and call it the original cutMe name
-    newTermShape = FreeCAD.getDocument(docName).getObject("Cut000").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",cutMe)
-    newTermObj.Shape = newTermShape
+        (objName, color) = objects[i]
 
-    # Remove the cut itself
-    App.getDocument(docName).removeObject("Cut000")
-                             
+        # Declare the name of this object
+        logLines.append("")
+        logLines.append(objName + ':')
+
+        # Declare the soon-to-be color of this object
+        logLines.append("Color " + str(color))
+
+        # Declare the fingerprint of this object
+        logLines.append("Fingerprint " + objectFingerprints[i])
+
+        # Write all the unique vertexes of this object (in mm, sorted), when we are asked to
+        if (verboseLog):
+            logLines.append(FC3DM_FormatPoints(objectPoints[i]))
+
+    ## Write the logfile
+    fileP = open(logFilePathNameExt, 'w')
+    fileP.write("\n".join(logLines) + "\n")
+    fileP.close()
+        
     return 0
 
+
 ###################################################################
-# FC3DM_CutWithFilletedBox()
-#	Function to cut an object with a filleted box that we create for this purpose.
+# FC3DM_QuantizePoint()
+#	Function to quantize a point to integer multiples of 1 nm, so that
+# floating point noise between runs does not change fingerprints.
 ###################################################################
-def FC3DM_CutWithFilletedBox(App, Gui,
-                             docName, cutMe,
-                             L, W, H, x, y, ppH,
-                             r0, r1, r2, r3,
-                             edges, radius):
-    
-    # Create box to use to cut away at body
-    App.ActiveDocument.addObject("Part::Box", "Cutter")
-    App.ActiveDocument.recompute()
-    Gui.SendMsgToActiveView("ViewFit")
-    FreeCAD.getDocument(docName).getObject("Cutter").Length = L
-    FreeCAD.getDocument(docName).getObject("Cutter").Width = W
-    FreeCAD.getDocument(docName).getObject("Cutter").Height = H
-    FreeCAD.getDocument(docName).getObject("Cutter").Placement = App.Placement(App.Vector(x, y, ppH),App.Rotation(r0, r1, r2, r3))
-
-    Gui.activateWorkbench("PartWorkbench")
+def FC3DM_QuantizePoint(point):
 
-    # See if we need to filet the cutting box
-    if (radius != 0.0) :
-
-        # Fillet the selected edges of this cutting box
-        FC3DM_FilletObjectEdges(App, Gui,
-                                docName, "Cutter", edges, radius)
+    return (int(round(point.x * 1e6)), int(round(point.y * 1e6)), int(round(point.z * 1e6)))
 
-    # Pass cutMe and the "Cutter" to FC3DM_CutWithSpecifiedObject() to do all the cutting
-    FC3DM_CutWithSpecifiedObject(App, Gui,
-                                 docName, cutMe, "Cutter")
 
-    return 0
+###################################################################
+# FC3DM_ExtractShapeVertexes()
+#	Function to extract the vertexes of a shape in canonical form.
+#
+# Returns the deduplicated vertexes, quantized with FC3DM_QuantizePoint()
+# and sorted, as a list of (x, y, z) tuples.  Also returns each face as a
+# line of the (sorted, unique) numbers of its vertexes in that list, with
+# the lines sorted.  So neither depends on the order in which OpenCASCADE
+# happens to list faces and vertexes.
+###################################################################
+def FC3DM_ExtractShapeVertexes(shape):
+
+    # Without NumPy, do this one vertex at a time
+    if (numpy == None):
+        return FC3DM_ExtractShapeVertexesSlowly(shape)
+
+    # Make one pass over all the faces, to get every vertex's coordinates and the face it is on
+    coords = []
+    faceNums = []
+    faces = shape.Faces
+    for faceNum in range(len(faces)):
+        vertexes = faces[faceNum].Vertexes
+        for vertex in vertexes:
+            point = vertex.Point
+            coords.extend((point.x, point.y, point.z))
+        faceNums.extend([faceNum] * len(vertexes))
+
+    if (len(coords) == 0):
+        return ([], [""] * len(faces))
+
+    # Quantize to 1 nm.  Round half away from zero, as python 2's round() does.
+    xyz = numpy.array(coords, dtype=numpy.float64).reshape(-1, 3) * 1e6
+    xyz = (numpy.sign(xyz) * numpy.floor(numpy.abs(xyz) + 0.5)).astype(numpy.int64)
+
+    # Sort the vertexes by x, then y, then z, and number the unique ones
+    order = numpy.lexsort((xyz[:,2], xyz[:,1], xyz[:,0]))
+    xyz = xyz[order]
+    isNew = numpy.ones(len(xyz), dtype=bool)
+    isNew[1:] = numpy.any(xyz[1:] != xyz[:-1], axis=1)
+    points = [tuple(point) for point in xyz[isNew].tolist()]
+
+    vertexNums = numpy.empty(len(xyz), dtype=numpy.int64)
+    vertexNums[order] = numpy.cumsum(isNew) - 1
+
+    # Sort by face, then vertex number, and drop vertexes listed more than once for a face
+    faceNums = numpy.array(faceNums, dtype=numpy.int64)
+    order = numpy.lexsort((vertexNums, faceNums))
+    faceNums = faceNums[order]
+    vertexNums = vertexNums[order]
+    isNew[0] = True
+    isNew[1:] = (faceNums[1:] != faceNums[:-1]) | (vertexNums[1:] != vertexNums[:-1])
+    faceNums = faceNums[isNew]
+    vertexNums = vertexNums[isNew].tolist()
+
+    # Split into one line per face.  Faces without any vertexes (eg. a sphere) are empty lines.
+    starts = [0] + (numpy.nonzero(faceNums[1:] != faceNums[:-1])[0] + 1).tolist() + [len(vertexNums)]
+    faceLines = [""] * (len(faces) - (len(starts) - 1))
+    for i in range(len(starts) - 1):
+        faceLines.append(" ".join([str(num) for num in vertexNums[starts[i]:starts[i+1]]]))
+    faceLines.sort()
+
+    return (points, faceLines)
 
 
 ###################################################################
-# FC3DM_CutWithBox()
-#	Function to cut an object with a box that we create for this purpose.
+# FC3DM_ExtractShapeVertexesSlowly()
+#	Function to do what FC3DM_ExtractShapeVertexes() does, without NumPy.
 ###################################################################
-def FC3DM_CutWithBox(App, Gui,
-                     docName, cutMe,
-                     L, W, H, x, y, ppH,
-                     r0, r1, r2, r3):
+def FC3DM_ExtractShapeVertexesSlowly(shape):
 
+    # Collect the unique vertexes, and each face as a sorted tuple of them
+    points = set()
+    faces = []
+    for face in shape.Faces:
+        facePoints = set()
+        for vertex in face.Vertexes:
+            facePoints.add(FC3DM_QuantizePoint(vertex.Point))
+        points.update(facePoints)
+        faces.append(tuple(sorted(facePoints)))
 
-    edges = []
-    radius = 0.0
+    # Number the vertexes in sorted order, and describe faces by vertex number
+    points = sorted(points)
+    pointNums = {}
+    for i in range(len(points)):
+        pointNums[points[i]] = i
 
-    # Call FC3DM_CutWithFilletedBox() to do all the real work
-    FC3DM_CutWithFilletedBox(App, Gui,
-                             docName, cutMe,
-                             L, W, H, x, y, ppH,
-                             r0, r1, r2, r3,
-                             edges, radius)
-    
-    return 0
+    faceLines = []
+    for face in faces:
+        faceLines.append(" ".join([str(pointNums[point]) for point in face]))
+    faceLines.sort()
+
+    return (points, faceLines)
 
 
 ###################################################################
-# FC3DM_CutObjectWithToolAndKeepTool()
-#	Function to cut an object with a tool object, but keep tool
-# object when we're all done.
+# FC3DM_FormatPoints()
+#	Function to format a list of quantized (x, y, z) points, as returned by
+# FC3DM_ExtractShapeVertexes(), as lines of coordinates in mm.
 ###################################################################
-def FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
-                                       docName, cutMe, cuttingTool):
-    
-    # Copy the tool object
-    newTermShape = FreeCAD.getDocument(docName).getObject(cuttingTool).Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature","newCuttingTool")
-    newTermObj.Shape = newTermShape
+def FC3DM_FormatPoints(points):
 
-    # Perform cut
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    App.activeDocument().addObject("Part::Cut","Cut000")
-    App.activeDocument().Cut000.Base = FreeCAD.getDocument(docName).getObject(cutMe)
-    App.activeDocument().Cut000.Tool = FreeCAD.getDocument(docName).getObject("newCuttingTool")
-    Gui.activeDocument().hide(cutMe)
-    Gui.activeDocument().hide("newCuttingTool")
-    App.ActiveDocument.recompute()
+    lines = []
+    for (x, y, z) in points:
+        lines.append("%.6f %.6f %.6f" % (x * 1e-6, y * 1e-6, z * 1e-6))
 
-    # Remove the objects that made up the cut
-    App.getDocument(docName).removeObject(cutMe)
-    App.getDocument(docName).removeObject("newCuttingTool")
+    return "\n".join(lines)
 
-    # Copy the cut object and call it the original cutMe name
-    newTermShape = FreeCAD.getDocument(docName).getObject("Cut000").Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",cutMe)
-    newTermObj.Shape = newTermShape
 
-    # Remove the cut itself
-    App.getDocument(docName).removeObject("Cut000")
+###################################################################
+# FC3DM_ComputeObjectFingerprint()
+#	Function to compute a short, canonical fingerprint of an object's
+# geometry and color, from the vertexes and faces returned by
+# FC3DM_ExtractShapeVertexes().
+###################################################################
+def FC3DM_ComputeObjectFingerprint(points, faceLines, color):
 
-    return 0
+    # Hash the color, vertexes, and faces
+    hasher = hashlib.sha1()
+    hasher.update("color %s\n" % str(color))
+    hasher.update("".join(["v %d %d %d\n" % point for point in points]))
+    hasher.update("".join(["f " + line + "\n" for line in faceLines]))
+
+    return hasher.hexdigest()[0:16]
 
 
 ###################################################################
-# FC3DM_CutObjectWithToolAndDiscardTool
-#	Function to cut an object with a tool object, and discard
-# tool object when we're all done.
+# FC3DM_ComputeModelFingerprint()
+#	Function to compute a short fingerprint of a whole model:  its parms
+# (as written to the log file, with stepSuffix digits stripped), and the
+# names and fingerprints of all its objects.
 ###################################################################
-def FC3DM_CutObjectWithToolAndDiscardTool(App, Gui,
-                                          docName, cutMe, cuttingTool):
-
-    # Call FC3DM_CutObjectWithToolAndKeepTool() to do all the real work
-    FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
-                                       docName, cutMe, cuttingTool)
+def FC3DM_ComputeModelFingerprint(parmLines, objects, objectFingerprints):
 
-    # Remove the tool
-    App.getDocument(docName).removeObject(cuttingTool)
+    hasher = hashlib.sha1()
+    for line in parmLines:
+        hasher.update("p " + line + "\n")
+    for i in range(len(objects)):
+        hasher.update("o " + objects[i][0] + " " + objectFingerprints[i] + "\n")
 
-    return 0
-    
+    return hasher.hexdigest()[0:16]
 
 
 ###################################################################
-# FC3DM_TranslateObjectAndRotateAboutZ()
-#	Function to translate an object in x,y and then rotate it about Z axis.
+# FC3DM_ComputeGeometryHash()
+#	Function to compute a short hash of an object's geometry.
+# Vertex coordinates are rounded to 1 nm so that floating point noise
+# between runs does not change the hash.
 ###################################################################
-def FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
-                                         docName, rotMe,
-                                         x, y, rotDeg):
+def FC3DM_ComputeGeometryHash(App, Gui,
+                              docName, objName):
 
-    # Convert to radians
-    rot = math.radians(rotDeg)
+    return FC3DM_ComputeShapeHash(FC3DM_GetObjectShape(App, Gui, docName, objName))
 
-    # Rotate about the Z-axis.  Do the specified x,y translations.
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    FreeCAD.getDocument(docName).getObject(rotMe).Placement = App.Placement(App.Vector(x,y,0),App.Rotation(0,0,math.sin(rot/2),math.cos(rot/2)))
 
-    return 0
+###################################################################
+# FC3DM_ComputeShapeHash()
+#	Function to compute a short hash of a shape's geometry.
+# See FC3DM_ComputeGeometryHash().
+###################################################################
+def FC3DM_ComputeShapeHash(shape):
 
+    # Collect the unique, rounded vertex coordinates.  Adding 0.0 turns -0.0 into 0.0.
+    points = set()
+    for vertex in shape.Vertexes:
+        points.add( (round(vertex.Point.x, 6) + 0.0, round(vertex.Point.y, 6) + 0.0, round(vertex.Point.z, 6) + 0.0) )
 
-###################################################################
-# FC3DM_RotateObjectAboutZ()
-#	Function to rotate an object about Z axis.
-###################################################################
-def FC3DM_RotateObjectAboutZ(App, Gui,
-                             docName, rotMe, rotDeg):
-
-    # Call FC3DM_TranslateObjectAndRotateAboutZ() to do all the real work
-    FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
-                                         docName, rotMe,
-                                         0, 0, rotDeg)
+    # Hash the topology counts, volume, and sorted vertexes
+    hasher = hashlib.sha1()
+    hasher.update("faces=%d edges=%d volume=%.6f\n" % (len(shape.Faces), len(shape.Edges), shape.Volume))
+    for point in sorted(points):
+        hasher.update("%.6f %.6f %.6f\n" % point)
 
-    return 0
+    return hasher.hexdigest()[0:16]
 
 
 ###################################################################
-# FC3DM_CreateBox()
-#	Function to create and place a box.
-#
-# Parameter names are per Mentor LP Wizard tool:
-# L == width of body
-# W == length of body
-# H == height of body
-# K == standoff height of body
-#
-# Other parameters
-# x == x coordinate of body
-# y == y coordinate of body
-# rotDeg == rotation about Z axis, in degrees
+# FC3DM_FuseObjects()
+#	Function to fuse two objects together.
 ###################################################################
-def FC3DM_CreateBox(App, Gui,
-                    L, W, H, K,
-                    x, y, rotDeg, 
-                    docName,
-                    bodyName):
-    
-    # Constant pi
-    pi = 3.141592654
+def FC3DM_FuseObjects(App, Gui,
+                      docName, fuseMe, addMeToFusion):
 
-    # Create box to model IC body
-    App.ActiveDocument.addObject("Part::Box",bodyName)
-    App.ActiveDocument.recompute()
-    Gui.SendMsgToActiveView("ViewFit")
+    # Fuse in memory
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, fuseMe,
+                             "fuse", (), [fuseMe, addMeToFusion])
+        FC3DM_RemoveObject(App, Gui, docName, addMeToFusion)
+        return 0
 
-    # Set body size
-    FreeCAD.getDocument(docName).getObject(bodyName).Length = L
-    FreeCAD.getDocument(docName).getObject(bodyName).Width = W
-    FreeCAD.getDocument(docName).getObject(bodyName).Height = (H-K)
+    # Fuse two objects
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    App.activeDocument().addObject("Part::MultiFuse","Fusion")
+    FC3DM_CountTraceOp("fuse")
+    App.activeDocument().Fusion.Shapes = [App.ActiveDocument.getObject(fuseMe), App.ActiveDocument.getObject(addMeToFusion)]
+    App.ActiveDocument.recompute()
 
-    # Compute initial rotation about z axis
-    rot = math.radians(rotDeg)
+    # Remove the objects that made up the fusion
+    App.getDocument(docName).removeObject(fuseMe)
+    App.getDocument(docName).removeObject(addMeToFusion)
 
-    # Center the body at (0,0), set standoff height, and set initial rotation about Z-axis
-    FreeCAD.getDocument(docName).getObject(bodyName).Placement = App.Placement(App.Vector(x, y, K),App.Rotation(0,0,math.sin(rot/2),math.cos(rot/2)))
+    # Copy the fusion object and call it the original fuseMe name
+    newTermShape = FreeCAD.getDocument(docName).getObject("Fusion").Shape.copy()
+    newTermObj = App.activeDocument().addObject("Part::Feature",fuseMe)
+    newTermObj.Shape = newTermShape
     
+    # Remove the fusion itself
+    App.getDocument(docName).removeObject("Fusion")
+
     return 0
 
 
 ###################################################################
-# FC3DM_CreateAndCenterBox()
-#	Function to create and center a box
-#
-# Parameter names are per Mentor LP Wizard tool:
-# L == width of body
-# W == length of body
-# H == height of body
-# K == standoff height of body
-#
-# Other parameters:
-# rotDeg == rotation about Z axis, in degrees
+# FC3DM_GetFaceKey()
+#	Function to compute a hashable key for a face from its vertexes.
+# Coordinates are rounded to 1 nm and sorted, so that the key depends
+# neither on vertex order nor on floating point noise.
 ###################################################################
-def FC3DM_CreateAndCenterBox(App, Gui,
-                             L, W, H, K,
-                             rotDeg, 
-                             docName,
-                             bodyName):
-    
-    # Compute x and y coordinates
-    # FIXME:  Do we have to account for rotation as we do this???
-    x = -1*(L/2)
-    y = -1*(W/2)
+def FC3DM_GetFaceKey(face):
 
-    # Call FC3DM_CreateBox() to do all the real work.
-    FC3DM_CreateBox(App, Gui,
-                    L, W, H, K,
-                    x, y, rotDeg, 
-                    docName,
-                    bodyName)
-    
-    return 0
+    points = []
+    for vertex in face.Vertexes:
+        point = vertex.Point
+        points.append( (round(point.x, 6) + 0.0, round(point.y, 6) + 0.0, round(point.z, 6) + 0.0) )
+    points.sort()
+
+    return tuple(points)
 
 
 ###################################################################
-# FC3DM_CreateCylinderVert()
-#	Function to create a vertical (oriented in Z-axis) cylinder.
+# FC3DM_IndexFaces()
+#	Function to add all the faces of a shape to a face index, which
+# maps face keys (see FC3DM_GetFaceKey()) to the given source tag.
 ###################################################################
-def FC3DM_CreateCylinderVert(App, Gui,
-                             docName, cylName, x, y, z, radius, height):
+def FC3DM_IndexFaces(shape, faceIndex, source):
 
-    Gui.activateWorkbench("PartWorkbench")
-    App.ActiveDocument.addObject("Part::Cylinder",cylName)
-    App.ActiveDocument.recompute()
-    Gui.SendMsgToActiveView("ViewFit")
-    FreeCAD.getDocument(docName).getObject(cylName).Radius = radius
-    FreeCAD.getDocument(docName).getObject(cylName).Height = height
-    FreeCAD.getDocument(docName).getObject(cylName).Placement = App.Placement(App.Vector(x,y,z),App.Rotation(0,0,0,1))
+    for face in shape.Faces:
+        faceIndex[FC3DM_GetFaceKey(face)] = source
 
     return 0
 
 
 ###################################################################
-# FC3DM_CreateIcBody()
-# 	Function to create an IC body
-#
-# Parameter names are per Mentor LP Wizard tool:
-# A == width of body
-# B == length of body
-# H == height of body
-# K == standoff height of body
-#
-# Other parameters:
-# maDeg == mold angle in degrees
-# Hpph == height of high pivot point
-# Hppl == height of low pivot point
-# Frbody == fillet radius (for top and bottom faces)
-# P1markOffset == Offset in X and Y from pin1 corner to start of pin 1 marker
+# FC3DM_FuseSetOfObjects()
+#	Function to fuse a set of objects together and preserve face colors.
 ###################################################################
-def FC3DM_CreateIcBody(App, Gui,
-                       parms,
-                       docName):
+def FC3DM_FuseSetOfObjects(App, Gui,
+                           parms,
+                           docName, objNameList, fusionName):
 
-    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcBody()")
+    FC3DM_WriteToDebugFile("Hello from FC3DM_FuseSetOfObjects()")
 
     # Extract relevant parameter values from parms associative array
     # TODO:  Currently no error checking!
-    A = parms["A"]
-    B = parms["B"]
-    H = parms["H"]
-    K = parms["K"]
-    maDeg = parms["maDeg"]
-    Hpph = parms["Hpph"]
-    Hppl = parms["Hppl"]
-    Frbody = parms["Frbody"]
-    P1markOffset = parms["P1markOffset"]
-    P1markRadius = parms["P1markRadius"]
-    P1markIndent = parms["P1markIndent"]
-    markHeight = parms["markHeight"]
     bodyName = parms["bodyName"]
     pin1MarkName = parms["pin1MarkName"]
-    newModelName = parms["newModelName"]
+    FC3DM_WriteToDebugFile("pin1MarkName is: " + pin1MarkName + ":")
 
-    # Figure out the footprintType for the current IC model.
-    # Do this by extracting just the leading characters in the newModelName.
-    # footprintType = echo $newModelName | sed 's/[0-9]+.*//g'
-    footprintType = re.sub('[0-9]+.*', '', newModelName)
-    # This is a derived parm. All derived parms should be excluded when writing the log file in FC3DM_DescribeObjectsToLogFile()
-    parms["footprintType"] = footprintType
-    print footprintType
 
-    print "docName is :" + docName + ":"
-    print "bodyName is:" + bodyName + ":"
-    print "B is       :" + str(B) + ":"
+    # Configure active document
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    
+    FC3DM_WriteToDebugFile("Creating an object list")
+    # Create list of objects, starting with object names
+    objs=[]
+    for i in objNameList:
+        
+        FC3DM_WriteToDebugFile("Adding new obj from objNameList: " + i + ":.")
+        if (not inMemoryShapes):
+            objs.append(App.activeDocument().getObject(i))
+
+    # Fuse in memory
+    if (inMemoryShapes):
+        FC3DM_WriteToDebugFile("Doing in-memory multi-fusion to " + fusionName)
+        FC3DM_WriteToDebugFile("The following step may take as long as 5 minutes. Be patient for complicated components")
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, fusionName,
+                             "fuse", (), objNameList)
+        FC3DM_WriteToDebugFile("Done with multi-fusion.")
 
+    # Do the multi-fusion.  Write to new "Temp" object.
+    else:
+        FC3DM_WriteToDebugFile("Writing multi-fusion to \"Temp\"")
+        FC3DM_ActivateWorkbench(App, Gui, "PartWorkbench")
+        FC3DM_WriteToDebugFile("Activated workbench")
+        App.activeDocument().addObject("Part::MultiFuse","Temp")
+        FC3DM_CountTraceOp("fuse")
+        FC3DM_WriteToDebugFile("Added object")
+        App.activeDocument().getObject("Temp").Shapes = objs
+        FC3DM_WriteToDebugFile("Got object")
+        FC3DM_WriteToDebugFile("The following step may take as long as 5 minutes. Be patient for complicated components")
+        App.ActiveDocument.recompute()
+
+        # Copy the temp fusion object and call it the desired fusion name
+        FC3DM_WriteToDebugFile("Copying \"Temp\" to " + fusionName)
+        newTermShape = FreeCAD.getDocument(docName).getObject("Temp").Shape.copy()
+        newTermObj = App.activeDocument().addObject("Part::Feature", fusionName)
+        newTermObj.Shape = newTermShape
+        App.ActiveDocument.recompute()
+        FC3DM_WriteToDebugFile("Done with multi-fusion.")
 
-    # See if this package has an EP (exposed pad)
-    if ("Tt" in parms):
 
-        # Flag that this package has an EP
-        hasEp = True
+    ### Preserve face colors for the body and pin1Mark!
+    # Find out which object each input to the fusion is.
+    inputSources = []
+    for k in objNameList:
+        if (k == bodyName):
+            inputSources.append("body")
+        elif (k == pin1MarkName):
+            inputSources.append("pin1Mark")
+        else:
+            inputSources.append("pin")
 
-        # Enforce that the body is not allowed to go all the way to the PCB surface.
-        # This is necessary in order to get the coloring right for pins vs. body.
-        K = max(K, tinyDeltaForQfn)
-        parms["K"] = K        
+    # When the fusion was done in memory, the history of the boolean operation
+    # tells us which inputs each face of the fusion came from.
+    faceSources = FC3DM_GetObjectFaceSources(App, Gui, docName, fusionName)
+    if (faceSources == None):
+        FC3DM_WriteToDebugFile("No face history for fusion.  Will match faces by their vertexes.")
 
-    else:
-        hasEp = False
+    # Otherwise, or for faces that the history doesn't account for, we will index
+    # the faces of the body, pins, and pin1Mark, so that we may find them in the fusion.
+    # Each face is keyed on its rounded, sorted vertexes.
+    # When a face matches more than one source, pin1Mark wins over pins, which win
+    # over the body.  Thus we index in that order of increasing precedence.
+    faceIndex = None
 
-    # Store whether or not we have an EP pad.
-    # This is a derived parm. All derived parms should be excluded when writing the log file in FC3DM_DescribeObjectsToLogFile()
-    parms["hasEp"] = hasEp
 
-    
-    # For SOIC packages, chamfer the upper long edge along pin 1        
-    if (footprintType == "SOIC"):
+    ## Prepare to look up all faces in the fusion among pin1Mark, pin, and body faces
+    faceColors=[]
 
-        # Retrieve chamfer offset
-        P1chamferOffset = parms["P1chamferOffset"]
+    # Empirically I've seen that unmatched pin faces have only 4 vertexes.
+    # TODO:  Will this simple distinction be true for non-gullwing ICs???
+    isChipResistor = False
+    if ("compType" in parms):
+        if (parms["compType"] == "chipResistor"):
+            isChipResistor = True
+    FC3DM_WriteToDebugFile(" isChipResistor = " + str(isChipResistor))
 
-    # Handle QFN packages.
-    elif (footprintType == "QFN"):
+    # Loop over all the faces in the fusion object
+    numUnmatched = 0
+    numFromHistory = 0
+    for faceNum, xp in enumerate(FC3DM_GetObjectShape(App, Gui, docName, fusionName).Faces):
+
+        # Look up where this face came from in the history of the fusion.
+        # Faces shared by several inputs go to pin1Mark, then pins, then the body.
+        source = None
+        if ( (faceSources != None) and (faceSources[faceNum] != None) ):
+            tags = []
+            for i in faceSources[faceNum]:
+                tags.append(inputSources[i])
+            for tag in ["pin1Mark", "pin", "body"]:
+                if (tag in tags):
+                    source = tag
+                    break
+            numFromHistory = numFromHistory + 1
+
+        # Else look up where this face came from by its vertexes
+        else:
 
-        # Set for no pin 1 chamfer
-        P1chamferOffset = 0
+            # Index the faces of the inputs, the first time that we need to
+            if (faceIndex == None):
+                faceIndex = {}
 
-        # Enforce that the body is not allowed to go all the way to the PCB surface.
-        # This is necessary in order to get the coloring right for pins vs. body.
-        K = max(K, tinyDeltaForQfn)
-        parms["K"] = K        
+                FC3DM_WriteToDebugFile("About to index body faces")
+                FC3DM_IndexFaces(FC3DM_GetObjectShape(App, Gui, docName, bodyName), faceIndex, "body")
 
-    # Other packages have no chamfer of the body upper long edge along pin 1        
-    else:
-        P1chamferOffset = 0
+                FC3DM_WriteToDebugFile("About to index pin faces")
+                for k in objNameList:
 
-    # Constant pi
-    pi = 3.141592654
+                    # See if this object name is the body or pin 1 marker.
+                    if ( (k != bodyName) and (k != pin1MarkName) ):
 
-    # Mold angle (in radians)
-    ma = math.radians(maDeg)
+                        FC3DM_IndexFaces(FC3DM_GetObjectShape(App, Gui, docName, k), faceIndex, "pin")
 
-    # Chamfer angle in degrees and radians
-    caDeg = 45
-    ca = math.radians(caDeg)
+                FC3DM_WriteToDebugFile("About to index pin1Mark faces")
+                FC3DM_IndexFaces(FC3DM_GetObjectShape(App, Gui, docName, pin1MarkName), faceIndex, "pin1Mark")
 
-    # The pin 1 chamfer is referenced to the cut-away body, not at the rectangular prism prior to all the cuts.
-    # moldOffset === offset due to mold angle
-    # tan (maDeg) = moldOffset / (H-Hpph)
-    # moldOffset = (H-Hpph) * tan(maDeg)
-    moldOffset = (H-Hpph) * math.tan(ma)
+                FC3DM_WriteToDebugFile("Indexed " + str(len(faceIndex)) + " distinct faces")
 
-    # Configure active document
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+            faceKey = FC3DM_GetFaceKey(xp)
+            source = faceIndex.get(faceKey, None)
 
-    # Prepare to call FC3DM_CreateBox() to create a box to for the IC body
-    # Choose initial rotation of 90 degrees about z axis
-    # We want pin 1 to be in the upper left corner to match the assumptions in Mentor LP Wizard
-    lBox = B
-    wBox = A
-    xBox = 1*(A/2)
-    yBox = -1*(B/2)
-    rotDeg = 90.0
-    FC3DM_CreateBox(App, Gui,
-                    lBox, wBox, H, K,
-                    xBox, yBox, rotDeg, 
-                    docName,
-                    bodyName)
-    
-    # Useless cut to reset the coordinates of the body
-    FC3DM_CutWithBox(App, Gui,
-                     docName, bodyName,
-                     A, H-K, H-K, -1*(A/2), B/2, K,
-                     0, 0, 0, 0)
+        # See if we found a face that derives from our pin1Mark
+        if (source == "pin1Mark"):
 
-    ## Make 2 cuts to each side of body, to model mold angle
-    # Only do the cuts if we have a mold angle
-    if (maDeg > 0):    
+            # Color Pin1Mark white
+            faceColors.append(parms["colorPin1Mark"])
 
-        # Perform a cut at the north side of the IC body (pivot point high)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hpph,
-                         math.sin(ma/2),0,0,math.cos(ma/2))
+        # See if we found a face that derives from a pin
+        elif (source == "pin"):
 
-        # Perform a cut at the north side of the IC body (pivot point low)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hppl,
-                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+            # Color pin bright tin.
+            faceColors.append(parms["colorPins"])
+        
+        # See if we found a face that derives from our body
+        elif (source == "body"):
 
+            # Color body black
+            faceColors.append(parms["colorBody"])
 
-        # Rotate the IC body 180 degrees about the z axis
-        FC3DM_RotateObjectAboutZ(App, Gui,
-                                 docName, bodyName, 180)
+        # Else we're not sure what it is.  Assume that it's part of the body
+        # that got modified as pins fused to it, and thus wasn't an exact match.
+        else:
+
+            numUnmatched = numUnmatched + 1
+            faceKey = FC3DM_GetFaceKey(xp)
+            numLines = len(faceKey)
+            if (FC3DM_IsDebugLevelEnabled(logDebug)):
+                FC3DM_WriteToDebugFile("This face in fusion didn't match a known face!  Vertexes for this face are: " + str(faceKey))
+
+            if ( (numLines <= 4) and (isChipResistor == False) ):
+                FC3DM_WriteToDebugFile(" numLines is " + str(numLines) + ".  Hoping it's part of a pin!")
+
+                # Color pin bright tin.
+                faceColors.append(parms["colorPins"])
+        
+            # Else we assume that it's part of the body.
+            else:
+           
+                FC3DM_WriteToDebugFile(" numLines is " + str(numLines) + ".  Hoping it's part of the body!")
+
+                # Color body black
+                faceColors.append(parms["colorBody"])
+
+    FC3DM_WriteToDebugFile("Matched " + str(len(faceColors) - numUnmatched) + " of " + str(len(faceColors)) + " faces in fusion, " + str(numFromHistory) + " of them from its history")
+
+
+    # Now that we have a list of all the face colors that we want, proceed to apply it
+    # to the fusion shape.
+    # A special thanks here to FC guru/author WMayer for his forum post at
+    # https://sourceforge.net/apps/phpbb/free-cad/viewtopic.php?f=19&t=4117
+    # which pointed me in the right direction to make this actually work.                
+    FC3DM_WriteToDebugFile("Attempting to set fusion face colors")
+    FC3DM_WriteToDebugFile("Attempting to set fusion face colors")
+    FC3DM_SetObjectColor(App, Gui, docName, fusionName, faceColors)
+    if (not inMemoryShapes):
+        App.ActiveDocument.recompute()
+    FC3DM_WriteToDebugFile("Attempted to set fusion face colors")
+
+    FC3DM_WriteToDebugFile("Deleting the original objects that made up the fusion")
+    # Delete the original objects that comprised the fusion
+    for i in objNameList:
+
+        FC3DM_RemoveObject(App, Gui, docName, i)
+
+    # Remove the temp fusion
+    if (not inMemoryShapes):
+        App.getDocument(docName).removeObject("Temp")
+        App.ActiveDocument.recompute()
+
+    # Deallocate list
+    del objs
+
+    return 0
+
+
+###################################################################
+# FC3DM_CutWithSpecified Object()
+#	Function to cut an object with an object that was created earlier.
+###################################################################
+def FC3DM_CutWithSpecifiedObject(App, Gui,
+                                 docName, cutMe, cutter):
+
+    # Cut in memory
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, cutMe,
+                             "cut", (), [cutMe, cutter])
+        FC3DM_RemoveObject(App, Gui, docName, cutter)
+        return 0
+
+    # Perform cut
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    App.activeDocument().addObject("Part::Cut","Cut000")
+    FC3DM_CountTraceOp("cut")
+    App.activeDocument().Cut000.Base = FreeCAD.getDocument(docName).getObject(cutMe)
+    App.activeDocument().Cut000.Tool = App.activeDocument().Cutter
+    FC3DM_SetObjectVisibility(App, Gui, docName, cutMe, False)
+    FC3DM_SetObjectVisibility(App, Gui, docName, cutter, False)
+    App.ActiveDocument.recompute()
+    
+    # Remove the objects that made up the cut
+    App.getDocument(docName).removeObject(cutMe)
+    App.getDocument(docName).removeObject(cutter)
+
+    # Copy the cut object and call it the original cutMe name
+    newTermShape = FreeCAD.getDocument(docName).getObject("Cut000").Shape.copy()
+    newTermObj = App.activeDocument().addObject("Part::Feature",cutMe)
+    newTermObj.Shape = newTermShape
+
+    # Remove the cut itself
+    App.getDocument(docName).removeObject("Cut000")
+                             
+    return 0
+
+###################################################################
+# FC3DM_CutWithFilletedBox()
+#	Function to cut an object with a filleted box that we create for this purpose.
+###################################################################
+def FC3DM_CutWithFilletedBox(App, Gui,
+                             docName, cutMe,
+                             L, W, H, x, y, ppH,
+                             r0, r1, r2, r3,
+                             edges, radius):
+    
+    # Create box to use to cut away at body
+    if (inMemoryShapes):
+        placement = App.Placement(App.Vector(x, y, ppH),App.Rotation(r0, r1, r2, r3))
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, "Cutter",
+                             "box", (L, W, H, FC3DM_PlacementToTuple(placement)), [])
+
+    else:
+        App.ActiveDocument.addObject("Part::Box", "Cutter")
+        App.ActiveDocument.recompute()
+        FC3DM_ViewFit(App, Gui)
+        FreeCAD.getDocument(docName).getObject("Cutter").Length = L
+        FreeCAD.getDocument(docName).getObject("Cutter").Width = W
+        FreeCAD.getDocument(docName).getObject("Cutter").Height = H
+        FreeCAD.getDocument(docName).getObject("Cutter").Placement = App.Placement(App.Vector(x, y, ppH),App.Rotation(r0, r1, r2, r3))
+
+    FC3DM_ActivateWorkbench(App, Gui, "PartWorkbench")
+
+    # See if we need to filet the cutting box
+    if (radius != 0.0) :
+
+        # Fillet the selected edges of this cutting box
+        FC3DM_FilletObjectEdges(App, Gui,
+                                docName, "Cutter", edges, radius)
+
+    # Pass cutMe and the "Cutter" to FC3DM_CutWithSpecifiedObject() to do all the cutting
+    FC3DM_CutWithSpecifiedObject(App, Gui,
+                                 docName, cutMe, "Cutter")
+
+    return 0
+
+
+###################################################################
+# FC3DM_CutWithBox()
+#	Function to cut an object with a box that we create for this purpose.
+###################################################################
+def FC3DM_CutWithBox(App, Gui,
+                     docName, cutMe,
+                     L, W, H, x, y, ppH,
+                     r0, r1, r2, r3):
+
+
+    edges = []
+    radius = 0.0
+
+    # Call FC3DM_CutWithFilletedBox() to do all the real work
+    FC3DM_CutWithFilletedBox(App, Gui,
+                             docName, cutMe,
+                             L, W, H, x, y, ppH,
+                             r0, r1, r2, r3,
+                             edges, radius)
+    
+    return 0
+
+
+###################################################################
+# FC3DM_CutObjectWithToolAndKeepTool()
+#	Function to cut an object with a tool object, but keep tool
+# object when we're all done.
+###################################################################
+def FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
+                                       docName, cutMe, cuttingTool):
+    
+    # Cut in memory.  The tool shape is left untouched, so there is no need to copy it.
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, cutMe,
+                             "cut", (), [cutMe, cuttingTool])
+        return 0
+
+    # Copy the tool object
+    newTermShape = FreeCAD.getDocument(docName).getObject(cuttingTool).Shape.copy()
+    newTermObj = App.activeDocument().addObject("Part::Feature","newCuttingTool")
+    newTermObj.Shape = newTermShape
+
+    # Perform cut
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    App.activeDocument().addObject("Part::Cut","Cut000")
+    FC3DM_CountTraceOp("cut")
+    App.activeDocument().Cut000.Base = FreeCAD.getDocument(docName).getObject(cutMe)
+    App.activeDocument().Cut000.Tool = FreeCAD.getDocument(docName).getObject("newCuttingTool")
+    FC3DM_SetObjectVisibility(App, Gui, docName, cutMe, False)
+    FC3DM_SetObjectVisibility(App, Gui, docName, "newCuttingTool", False)
+    App.ActiveDocument.recompute()
+
+    # Remove the objects that made up the cut
+    App.getDocument(docName).removeObject(cutMe)
+    App.getDocument(docName).removeObject("newCuttingTool")
+
+    # Copy the cut object and call it the original cutMe name
+    newTermShape = FreeCAD.getDocument(docName).getObject("Cut000").Shape.copy()
+    newTermObj = App.activeDocument().addObject("Part::Feature",cutMe)
+    newTermObj.Shape = newTermShape
+
+    # Remove the cut itself
+    App.getDocument(docName).removeObject("Cut000")
+
+    return 0
+
+
+###################################################################
+# FC3DM_CutObjectWithToolsAndKeepTools()
+#	Function to cut an object with a list of tool objects, all in one
+# boolean operation, and keep the tool objects when we're all done.
+# See FC3DM_CutShapeWithTools() for how this falls back to one cut per tool.
+###################################################################
+def FC3DM_CutObjectWithToolsAndKeepTools(App, Gui,
+                                         docName, cutMe, cuttingTools):
+
+    FC3DM_WriteToDebugFile("Cutting " + str(len(cuttingTools)) + " tools out of " + cutMe + " at once")
+
+    # Cut in memory
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, cutMe,
+                             "cut", (), [cutMe] + cuttingTools)
+        return 0
+
+    # Collect the tool shapes
+    tools = []
+    for cuttingTool in cuttingTools:
+        tools.append(FC3DM_GetObjectShape(App, Gui, docName, cuttingTool))
+
+    # Perform the cut and replace cutMe with the result
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    FC3DM_CountTraceOp("cut")
+    newTermShape = FC3DM_CutShapeWithTools(FC3DM_GetObjectShape(App, Gui, docName, cutMe), tools)
+    FC3DM_RemoveObject(App, Gui, docName, cutMe)
+    FC3DM_SetObjectShape(App, Gui, docName, cutMe, newTermShape)
+    App.ActiveDocument.recompute()
+
+    return 0
+
+
+###################################################################
+# FC3DM_CutObjectWithToolAndDiscardTool
+#	Function to cut an object with a tool object, and discard
+# tool object when we're all done.
+###################################################################
+def FC3DM_CutObjectWithToolAndDiscardTool(App, Gui,
+                                          docName, cutMe, cuttingTool):
+
+    # Call FC3DM_CutObjectWithToolAndKeepTool() to do all the real work
+    FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
+                                       docName, cutMe, cuttingTool)
+
+    # Remove the tool
+    FC3DM_RemoveObject(App, Gui, docName, cuttingTool)
+
+    return 0
+    
+
+
+###################################################################
+# FC3DM_TranslateObjectAndRotateAboutZ()
+#	Function to translate an object in x,y and then rotate it about Z axis.
+###################################################################
+def FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
+                                         docName, rotMe,
+                                         x, y, rotDeg):
+
+    # Convert to radians
+    rot = math.radians(rotDeg)
+
+    # Rotate about the Z-axis.  Do the specified x,y translations.
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    FC3DM_SetObjectPlacement(App, Gui,
+                             docName, rotMe, App.Placement(App.Vector(x,y,0),App.Rotation(0,0,math.sin(rot/2),math.cos(rot/2))))
+
+    return 0
+
+
+###################################################################
+# FC3DM_RotateObjectAboutZ()
+#	Function to rotate an object about Z axis.
+###################################################################
+def FC3DM_RotateObjectAboutZ(App, Gui,
+                             docName, rotMe, rotDeg):
+
+    # Call FC3DM_TranslateObjectAndRotateAboutZ() to do all the real work
+    FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
+                                         docName, rotMe,
+                                         0, 0, rotDeg)
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateBox()
+#	Function to create and place a box.
+#
+# Parameter names are per Mentor LP Wizard tool:
+# L == width of body
+# W == length of body
+# H == height of body
+# K == standoff height of body
+#
+# Other parameters
+# x == x coordinate of body
+# y == y coordinate of body
+# rotDeg == rotation about Z axis, in degrees
+###################################################################
+def FC3DM_CreateBox(App, Gui,
+                    L, W, H, K,
+                    x, y, rotDeg, 
+                    docName,
+                    bodyName):
+    
+    # Constant pi
+    pi = 3.141592654
+
+    # Compute initial rotation about z axis
+    rot = math.radians(rotDeg)
+
+    # Create box in memory
+    if (inMemoryShapes):
+        placement = App.Placement(App.Vector(x, y, K),App.Rotation(0,0,math.sin(rot/2),math.cos(rot/2)))
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, bodyName,
+                             "box", (L, W, (H-K), FC3DM_PlacementToTuple(placement)), [])
+        return 0
+
+    # Create box to model IC body
+    App.ActiveDocument.addObject("Part::Box",bodyName)
+    App.ActiveDocument.recompute()
+    FC3DM_ViewFit(App, Gui)
+
+    # Set body size
+    FreeCAD.getDocument(docName).getObject(bodyName).Length = L
+    FreeCAD.getDocument(docName).getObject(bodyName).Width = W
+    FreeCAD.getDocument(docName).getObject(bodyName).Height = (H-K)
+
+    # Center the body at (0,0), set standoff height, and set initial rotation about Z-axis
+    FreeCAD.getDocument(docName).getObject(bodyName).Placement = App.Placement(App.Vector(x, y, K),App.Rotation(0,0,math.sin(rot/2),math.cos(rot/2)))
+    
+    return 0
+
+
+###################################################################
+# FC3DM_CreateAndCenterBox()
+#	Function to create and center a box
+#
+# Parameter names are per Mentor LP Wizard tool:
+# L == width of body
+# W == length of body
+# H == height of body
+# K == standoff height of body
+#
+# Other parameters:
+# rotDeg == rotation about Z axis, in degrees
+###################################################################
+def FC3DM_CreateAndCenterBox(App, Gui,
+                             L, W, H, K,
+                             rotDeg, 
+                             docName,
+                             bodyName):
+    
+    # Compute x and y coordinates
+    # FIXME:  Do we have to account for rotation as we do this???
+    x = -1*(L/2)
+    y = -1*(W/2)
+
+    # Call FC3DM_CreateBox() to do all the real work.
+    FC3DM_CreateBox(App, Gui,
+                    L, W, H, K,
+                    x, y, rotDeg, 
+                    docName,
+                    bodyName)
+    
+    return 0
+
+
+###################################################################
+# FC3DM_CreateCylinderVert()
+#	Function to create a vertical (oriented in Z-axis) cylinder.
+###################################################################
+def FC3DM_CreateCylinderVert(App, Gui,
+                             docName, cylName, x, y, z, radius, height):
+
+    # Create cylinder in memory
+    if (inMemoryShapes):
+        placement = App.Placement(App.Vector(x,y,z),App.Rotation(0,0,0,1))
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, cylName,
+                             "cylinder", (radius, height, FC3DM_PlacementToTuple(placement)), [])
+        return 0
+
+    FC3DM_ActivateWorkbench(App, Gui, "PartWorkbench")
+    App.ActiveDocument.addObject("Part::Cylinder",cylName)
+    App.ActiveDocument.recompute()
+    FC3DM_ViewFit(App, Gui)
+    FreeCAD.getDocument(docName).getObject(cylName).Radius = radius
+    FreeCAD.getDocument(docName).getObject(cylName).Height = height
+    FreeCAD.getDocument(docName).getObject(cylName).Placement = App.Placement(App.Vector(x,y,z),App.Rotation(0,0,0,1))
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateMoldedBodyWithCuts()
+#	Function to create a molded IC body, with its mold angle and pin 1
+# chamfer, by cutting rotated boxes away from each side of a box.
+#
+# See FC3DM_CreateIcBody() for parameter names.
+###################################################################
+def FC3DM_CreateMoldedBodyWithCuts(App, Gui,
+                                   A, B, H, K, maDeg, Hpph, Hppl, P1chamferOffset,
+                                   docName,
+                                   bodyName):
+
+    # Constant pi
+    pi = 3.141592654
+
+    # Mold angle (in radians)
+    ma = math.radians(maDeg)
+
+    # Chamfer angle in degrees and radians
+    caDeg = 45
+    ca = math.radians(caDeg)
+
+    # The pin 1 chamfer is referenced to the cut-away body, not at the rectangular prism prior to all the cuts.
+    # moldOffset === offset due to mold angle
+    # tan (maDeg) = moldOffset / (H-Hpph)
+    # moldOffset = (H-Hpph) * tan(maDeg)
+    moldOffset = (H-Hpph) * math.tan(ma)
+
+    # Prepare to call FC3DM_CreateBox() to create a box to for the IC body
+    # Choose initial rotation of 90 degrees about z axis
+    # We want pin 1 to be in the upper left corner to match the assumptions in Mentor LP Wizard
+    lBox = B
+    wBox = A
+    xBox = 1*(A/2)
+    yBox = -1*(B/2)
+    rotDeg = 90.0
+    FC3DM_CreateBox(App, Gui,
+                    lBox, wBox, H, K,
+                    xBox, yBox, rotDeg, 
+                    docName,
+                    bodyName)
+    
+    # Useless cut to reset the coordinates of the body
+    FC3DM_CutWithBox(App, Gui,
+                     docName, bodyName,
+                     A, H-K, H-K, -1*(A/2), B/2, K,
+                     0, 0, 0, 0)
+
+    ## Make 2 cuts to each side of body, to model mold angle
+    # Only do the cuts if we have a mold angle
+    if (maDeg > 0):    
+
+        # Perform a cut at the north side of the IC body (pivot point high)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hpph,
+                         math.sin(ma/2),0,0,math.cos(ma/2))
+
+        # Perform a cut at the north side of the IC body (pivot point low)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hppl,
+                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+
+
+        # Rotate the IC body 180 degrees about the z axis
+        FC3DM_RotateObjectAboutZ(App, Gui,
+                                 docName, bodyName, 180)
+
+        # Perform a cut at the north side of the IC body (pivot point high)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hpph,
+                         math.sin(ma/2),0,0,math.cos(ma/2))
+
+        # Perform a cut at the north side of the IC body (pivot point low)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hppl,
+                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+
+
+        # Rotate the IC body 90 degrees about the z axis
+        FC3DM_RotateObjectAboutZ(App, Gui,
+                                 docName, bodyName, 90)
+
+        # Perform a cut at the north side of the IC body (pivot point high)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hpph,
+                         math.sin(ma/2),0,0,math.cos(ma/2))
+
+        # Perform a cut at the north side of the IC body (pivot point low)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hppl,
+                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+
+    
+        # Rotate the IC body 180 degrees about the z axis
+        FC3DM_RotateObjectAboutZ(App, Gui,
+                                 docName, bodyName, 180)
+
+        # Perform a cut at the north side of the IC body (pivot point high)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hpph,
+                         math.sin(ma/2),0,0,math.cos(ma/2))
+
+
+        # See if we need to do the pin 1 chamfer on the body
+        if (P1chamferOffset > 0):
+
+            # TODO:  Add sanity check to ensure that the chamfer doesn't cut into the body below the
+            # level of where the top-most part of the pin enters the body.  If it does, then we
+            # would break our underlying assumption that the pins are symmetric side-to-side.
+            # Detect this and abort on error!
+
+            # Perform a cut at the north side of the IC body (chamfer on pin 1 long side of body)
+            FC3DM_CutWithBox(App, Gui,
+                             docName, bodyName,
+                             B, B, B, -1*(B/2), (1*(A/2) - moldOffset - P1chamferOffset), H,
+                             math.sin(-1*(ca/2)),0,0,math.cos(ca/2))
+
+        # Perform a cut at the north side of the IC body (pivot point low)
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - 2*deltaForBodyCutsPosition, 1*(A/2), Hppl,
+                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+
+    
+        # Do final rotation of the IC body 90 degrees about the z axis
+        FC3DM_RotateObjectAboutZ(App, Gui,
+                                 docName, bodyName, 90)
+
+    # endif (maDeg > 0)
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateMoldedBodyWithLoft()
+#	Function to create the same molded IC body as
+# FC3DM_CreateMoldedBodyWithCuts(), as one ruled loft through its cross
+# sections (see FC3DM_MakeMoldedBody()), instead of 8 boolean cuts.
+# The pin 1 chamfer is then cut with the same box as there.
+#
+# See FC3DM_CreateIcBody() for parameter names.
+###################################################################
+def FC3DM_CreateMoldedBodyWithLoft(App, Gui,
+                                   A, B, H, K, maDeg, Hpph, Hppl, P1chamferOffset,
+                                   docName,
+                                   bodyName):
+
+    # Create the body in memory, or as a Part::Feature in the document
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, bodyName,
+                             "moldedBody", (A, B, H, K, maDeg, Hpph, Hppl), [])
+
+    else:
+        FC3DM_SetObjectShape(App, Gui,
+                             docName, bodyName, FC3DM_MakeMoldedBody(App, A, B, H, K, maDeg, Hpph, Hppl))
+
+    # Like FC3DM_CreateMoldedBodyWithCuts(), only chamfer if we have a mold angle
+    if ( (maDeg > 0) and (P1chamferOffset > 0) ):
+
+        # Chamfer angle in radians, and offset due to mold angle
+        ca = math.radians(45)
+        moldOffset = (H-Hpph) * math.tan(math.radians(maDeg))
+
+        # FC3DM_CreateMoldedBodyWithCuts() cuts the chamfer before the final 90 degree
+        # rotation of the body about the z axis, so rotate its cutting box to match.
+        rotZ = App.Rotation(App.Vector(0,0,1), 90)
+        rot = rotZ.multiply(App.Rotation(math.sin(-1*(ca/2)),0,0,math.cos(ca/2)))
+        corner = rotZ.multVec(App.Vector(-1*(B/2), (1*(A/2) - moldOffset - P1chamferOffset), H))
+
+        # Perform a cut at the pin 1 long side of the IC body
+        FC3DM_CutWithBox(App, Gui,
+                         docName, bodyName,
+                         B, B, B, corner.x, corner.y, corner.z,
+                         rot.Q[0], rot.Q[1], rot.Q[2], rot.Q[3])
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateIcBody()
+# 	Function to create an IC body
+#
+# Parameter names are per Mentor LP Wizard tool:
+# A == width of body
+# B == length of body
+# H == height of body
+# K == standoff height of body
+#
+# Other parameters:
+# maDeg == mold angle in degrees
+# Hpph == height of high pivot point
+# Hppl == height of low pivot point
+# Frbody == fillet radius (for top and bottom faces)
+# P1markOffset == Offset in X and Y from pin1 corner to start of pin 1 marker
+# bodyBuilder == "cuts" (the default) to cut the mold angle away from a box,
+#  or "loft" to loft the body through its cross sections
+###################################################################
+def FC3DM_CreateIcBody(App, Gui,
+                       parms,
+                       docName):
+
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcBody()")
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    A = parms["A"]
+    B = parms["B"]
+    H = parms["H"]
+    K = parms["K"]
+    maDeg = parms["maDeg"]
+    Hpph = parms["Hpph"]
+    Hppl = parms["Hppl"]
+    Frbody = parms["Frbody"]
+    P1markOffset = parms["P1markOffset"]
+    P1markRadius = parms["P1markRadius"]
+    P1markIndent = parms["P1markIndent"]
+    markHeight = parms["markHeight"]
+    bodyName = parms["bodyName"]
+    pin1MarkName = parms["pin1MarkName"]
+    newModelName = parms["newModelName"]
+
+    # Figure out the footprintType for the current IC model.
+    # Do this by extracting just the leading characters in the newModelName.
+    # footprintType = echo $newModelName | sed 's/[0-9]+.*//g'
+    footprintType = re.sub('[0-9]+.*', '', newModelName)
+    # This is a derived parm. All derived parms should be excluded when writing the log file in FC3DM_DescribeObjectsToLogFile()
+    parms["footprintType"] = footprintType
+    print footprintType
+
+    print "docName is :" + docName + ":"
+    print "bodyName is:" + bodyName + ":"
+    print "B is       :" + str(B) + ":"
+
+
+    # See if this package has an EP (exposed pad)
+    if ("Tt" in parms):
+
+        # Flag that this package has an EP
+        hasEp = True
+
+        # Enforce that the body is not allowed to go all the way to the PCB surface.
+        # This is necessary in order to get the coloring right for pins vs. body.
+        K = max(K, tinyDeltaForQfn)
+        parms["K"] = K        
+
+    else:
+        hasEp = False
+
+    # Store whether or not we have an EP pad.
+    # This is a derived parm. All derived parms should be excluded when writing the log file in FC3DM_DescribeObjectsToLogFile()
+    parms["hasEp"] = hasEp
+
+    
+    # For SOIC packages, chamfer the upper long edge along pin 1        
+    if (footprintType == "SOIC"):
+
+        # Retrieve chamfer offset
+        P1chamferOffset = parms["P1chamferOffset"]
+
+    # Handle QFN packages.
+    elif (footprintType == "QFN"):
+
+        # Set for no pin 1 chamfer
+        P1chamferOffset = 0
+
+        # Enforce that the body is not allowed to go all the way to the PCB surface.
+        # This is necessary in order to get the coloring right for pins vs. body.
+        K = max(K, tinyDeltaForQfn)
+        parms["K"] = K        
+
+    # Other packages have no chamfer of the body upper long edge along pin 1        
+    else:
+        P1chamferOffset = 0
+
+    # Mold angle (in radians)
+    ma = math.radians(maDeg)
+
+    # The pin 1 marker is referenced to the cut-away body, not at the rectangular prism prior to all the cuts.
+    # moldOffset === offset due to mold angle
+    # tan (maDeg) = moldOffset / (H-Hpph)
+    # moldOffset = (H-Hpph) * tan(maDeg)
+    moldOffset = (H-Hpph) * math.tan(ma)
+
+    # Configure active document
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+
+    # The body and pin 1 marker depend on nothing but these inputs (after the adjustments
+    # to K and P1chamferOffset above), so see if we have built them before
+    bodyInputs = {"A" : A, "B" : B, "H" : H, "K" : K, "maDeg" : maDeg, "Hpph" : Hpph, "Hppl" : Hppl,
+                  "Frbody" : Frbody, "P1markOffset" : P1markOffset, "P1markRadius" : P1markRadius,
+                  "P1markIndent" : P1markIndent, "markHeight" : markHeight, "P1chamferOffset" : P1chamferOffset,
+                  "bodyBuilder" : parms.get("bodyBuilder", "cuts")}
+    if (FC3DM_FetchCachedShapes(App, Gui,
+                                parms,
+                                docName, "icBody", bodyInputs, [bodyName, pin1MarkName])):
+        return 0
+
+    # Build the molded body, with its mold angle and pin 1 chamfer
+    bodyBuilder = parms.get("bodyBuilder", "cuts")
+    if (bodyBuilder == "cuts"):
+        FC3DM_CreateMoldedBodyWithCuts(App, Gui,
+                                       A, B, H, K, maDeg, Hpph, Hppl, P1chamferOffset,
+                                       docName,
+                                       bodyName)
+
+    elif (bodyBuilder == "loft"):
+        FC3DM_CreateMoldedBodyWithLoft(App, Gui,
+                                       A, B, H, K, maDeg, Hpph, Hppl, P1chamferOffset,
+                                       docName,
+                                       bodyName)
+
+    else:
+        FC3DM_WriteToDebugFile("Abort message:  Unsupported bodyBuilder " + bodyBuilder + ".  Expected \"cuts\" or \"loft\".", logError)
+        FC3DM_MyExit(-1)
+
+    ## Attempt to analyze the faces in the body, to find which ones to fillet.
+    # Loop over all the faces in this pin.
+    # (Skip this when deferring shapes, since it would force the body to be evaluated early.)
+    if (not deferredShapes):
+        print("Here are the edges!")
+        numEdges = len(FC3DM_GetObjectShape(App, Gui, docName, bodyName).Edges)
+        print(" Number of edges is " + str(numEdges))
+
+    # Workaround for the fact that edge.Name doesn't work.
+    # Since we now know the number of edges, and we know FC's naming convention, we shall
+    # iterate through the edges by name, rather than by reference.
+#    for edgeNum in range(1, numEdges):
+
+#        edgeName = "Edge" + str(edgeNum)
+#        print("Examining " + edgeName)
+
+#        edge = App.ActiveDocument.getObject(edgeName)
+
+
+    # Attempt to iterate over all the edges in the shape.
+    # For each edge, analyze its vertexes and find ones that are on the top or bottom faces.
+    # Then select such edges for filleting.
+    # The problem is that I can't find a way to extract the edge name.
+    # Thus, this is currently useless.
+    if (not deferredShapes):
+        for edge in FC3DM_GetObjectShape(App, Gui, docName, bodyName).Edges:
+            print edge #.PropertiesList #Label #str(edge)
+
+            # Loop over all the vertexes in this edge
+            for vertex in edge.Vertexes:
+
+                # Write this vertex
+                print(str(vertex.Point))
+
+    # endfor loop over edges            
+
+    # If we had a pin 1 chamfer, we only have 7 edges to fillet, not 8.
+    if (P1chamferOffset > 0):
+
+        # Set the faces that need to be filleted
+        edges=["Edge4","Edge6","Edge9","Edge11","Edge14","Edge17","Edge21"]
+
+    else:
+
+        # Set the faces that need to be filleted
+        edges=["Edge4","Edge6","Edge14","Edge11","Edge9","Edge17","Edge19","Edge20"]
+
+    ## Fillet all non-chamfered edges on the top & bottom faces
+    # Note:  Do them all at once, because I've had a hard time with finding edge names on
+    # the top face after filleting the bottom face, and vice versa.
+    # TODO:  This is currently hardcoded!
+    # TODO:  This must be revisited for BGA, etc.!
+    # Only do the filleting if we have a mold angle
+    #if ( (maDeg > 0) and (footprintType <> "SOIC") ):    
+    #
+    #    FC3DM_FilletObjectEdges(App, Gui,
+    #                            docName, bodyName, edges, Frbody)
+
+
+    ## Prepare to make pin 1 marker
+
+    # Create a cylinder to use for cutting out for pin 1 marker
+    cylName = "CylCuttingTool"
+    FC3DM_CreateCylinderVert(App, Gui,
+                             docName, cylName, (-1*(A/2))+moldOffset+P1chamferOffset+Frbody+P1markOffset+P1markRadius, (B/2)-moldOffset-Frbody-P1markOffset-P1markRadius, (H-P1markIndent), P1markRadius, H)
+
+    # Use this dummy cylinder to cut into the IC body
+    FC3DM_CutObjectWithToolAndDiscardTool(App, Gui,
+                                          docName, bodyName, cylName)
+
+    # Apply pin 1 marker ink inside cut
+    FC3DM_CreateCylinderVert(App, Gui,
+                             docName, pin1MarkName, (-1*(A/2))+moldOffset+P1chamferOffset+Frbody+P1markOffset+P1markRadius, (B/2)-moldOffset-Frbody-P1markOffset-P1markRadius, (H-P1markIndent), P1markRadius, markHeight)
+
+    # Remember the body for the next package that has the same body, eg. with another pinout
+    FC3DM_StoreCachedShapes(App, Gui,
+                            parms,
+                            docName, "icBody", bodyInputs, [bodyName, pin1MarkName])
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateGullwingPinWithCuts()
+#	Function to create an east side gullwing template pin, by cutting
+# filleted boxes away from a box, filleting its outer bends, and cutting
+# away the part of the pin that is within the IC body.
+#
+# See FC3DM_CreateIcPinGullwing() for parameter names.
+###################################################################
+def FC3DM_CreateGullwingPinWithCuts(App, Gui,
+                                    L, A, T, W, Tp, Fr, Hpe, maDeg,
+                                    docName,
+                                    pinName):
+
+    # Prepare to call FC3DM_CreateBox() to create a box for the template pin
+    FC3DM_WriteToDebugFile("About to create box for template pin")
+    maRad = math.radians(maDeg)
+    x = A/2.0 -  (Tp*math.tan(maRad))
+    y = -1*(W/2)
+    H = (Hpe + (Tp/2.0))
+    K = 0.0
+    rotDeg = 0.0
+    boxLength = (L/2.0) - (A/2.0) + (Tp*math.tan(maRad))
+    FC3DM_WriteToDebugFile("boxLength: " + str(boxLength))
+    FC3DM_CreateBox(App, Gui,
+                    boxLength, W, H, K,
+                    x, y, rotDeg, 
+                    docName,
+                    pinName)
+    
+    # Cut away top-right part of the IC pin solid
+    edges=["Edge4"]
+    radius=0.3*Fr	# FIXME:  How to compute the inner radius (here) as a function of outer radius (Fr)???  (FC3DM_MakeGullwingPin() uses Fr-Tp.)
+    FC3DM_CutWithFilletedBox(App, Gui,
+                             docName, pinName,
+                             L, L, L, (L/2)-T+Tp, -1*(W/2), Tp,
+                             0, 0, 0, 0,
+                             edges, radius)
+    
+    # Cut away lower-left part of the IC pin solid
+    FC3DM_WriteToDebugFile("About to cut lower-left part of the IC pin solid")
+    edges=["Edge6"]
+    FC3DM_CutWithFilletedBox(App, Gui,
+                             docName, pinName,
+                             (L/2)-T, W, Hpe-(Tp/2.0), 0, -1*(W/2), 0,
+                             0, 0, 0, 0,
+                             edges, radius)
+
+    # Fillet (round) some of the gullwing pin edges
+    FC3DM_WriteToDebugFile("About to fillet gullwing pin edges")
+    edges=["Edge4","Edge30"]
+    FC3DM_FilletObjectEdges(App, Gui,
+                            docName, pinName, edges, Fr)
+
+    FC3DM_WriteToDebugFile("About to cut gullwing pin that exists within IC body")
+
+    ## Before we were using FC3DM_CutWithToolAndKeepTool() to perform this cut but we were experiencing unknown problems with a handful of packages
+    ## The following process relies on the sanity check that we did up front.
+
+    FC3DM_WriteToDebugFile("A is: " + str(A) + " W is: " + str(W) + " Hpe is: " + str(Hpe) + " Tp is: " + str(Tp))
+    FC3DM_WriteToDebugFile("A/2.0 is: " + str(A/2.0) + "-(W/2.0) is: " + str(-(W/2.0)) + " Hpe - Tp/2.0 is: " + str( Hpe - Tp/2.0))
+    FC3DM_WriteToDebugFile("maRad: " + str(maRad))
+
+    # Create a box that will be used to cut the pin so that the pin does not over lap with the body
+    FC3DM_CreateBox(App, Gui,
+                    A, A, A, Hpe - (Tp/2.0),
+                    A/2.0, -(W/2.0), 0, 
+                    docName, "Cutter")
+
+    # Rotate the box just created
+    FC3DM_RotateObjectAboutAxis(App, Gui,
+                                docName, "Cutter", -90 - maDeg,
+                                Base.Vector(A/2.0, -(W/2.0), Hpe - (Tp/2.0)), Base.Vector(0,1,0))
+
+    # Cutting the pin with the box just created so that the pin can fuse with the body later
+    FC3DM_CutWithSpecifiedObject(App, Gui,
+                                 docName, pinName, "Cutter")
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateGullwingPinWithSweep()
+#	Function to create the same east side gullwing template pin as
+# FC3DM_CreateGullwingPinWithCuts(), by sweeping its cross section along
+# its centerline in one operation (see FC3DM_MakeGullwingPin()).  This
+# needs no booleans, and no fillets of edges picked by number.
+#
+# See FC3DM_CreateIcPinGullwing() for parameter names.
+###################################################################
+def FC3DM_CreateGullwingPinWithSweep(App, Gui,
+                                     L, A, T, W, Tp, Fr, Hpe, maDeg,
+                                     docName,
+                                     pinName):
+
+    FC3DM_WriteToDebugFile("About to sweep template pin")
+
+    # Create the pin in memory, or as a Part::Feature in the document
+    if (inMemoryShapes):
+        FC3DM_RecordObjectOp(App, Gui,
+                             docName, pinName,
+                             "gullwingPin", (A, L, T, W, Tp, Fr, Hpe, maDeg), [])
+
+    else:
+        FC3DM_SetObjectShape(App, Gui,
+                             docName, pinName, FC3DM_MakeGullwingPin(App, A, L, T, W, Tp, Fr, Hpe, maDeg))
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateIcPinGullwing()
+#	Function to create a gullwing IC pin.
+#
+# Parameter names are per Mentor LP Wizard tool:
+# L == Overall component width (pin tip to pin tip)
+# A == Overall body width
+# B == Overall body length
+# W == Pin width
+# T == Pin landing length
+#
+# Other parameters:
+# Tp == Pin thickness (z dimension)
+# Fr == Fillet radius for pin edges
+# Hpe == Height of pin entry to body (center)
+# pinBuilder == "cuts" (the default) to cut the pin out of a box,
+#  or "sweep" to sweep its cross section along its centerline
+###################################################################
+def FC3DM_CreateIcPinGullwing(App, Gui,
+                              parms,
+                              docName):
+                
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinGullwing()")
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    L = parms["L"]
+    A = parms["A"]
+    B = parms["B"]
+    W = parms["W"]
+    T = parms["T"]
+    K = parms["K"]
+    Tp = parms["Tp"]
+    Fr = parms["Fr"]
+    Hpe = parms["Hpe"]
+    maDeg = parms["maDeg"]
+    Hpph = parms["Hpph"]
+    Hppl = parms["Hppl"]
+    pinName = parms["pinName"]
+    bodyName = parms["bodyName"]
+    footprintType = parms["footprintType"]
+    
+    pinTemplateNorth = "pinTemplateNorth"
+    maRad = math.radians(maDeg)
+    
+    # Configure active document
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+
+    ## Below, we will cut away the part of the pin that is within the IC body.
+    ## That process makes the assumption that the pin starts and ends within the upper mold angle cut in the z direction. If this condition is not met, the script will abort.
+
+    # Sanity check to validate our assumption
+    if ((Hpe - (Tp/2.0)) < Hpph ):
+        FC3DM_WriteToDebugFile("Abort message: In FC3DM_CreateIcPinGullwing(), lower entry point of pin is below mold angle cut. This violates the assumption that the pin will enter the body above the mold angle cut.", logError)
+        FC3DM_MyExit(-1)
+
+    # The template pins depend on nothing but these inputs, so see if we have built them before
+    templateNames = [pinName]
+    pinInputs = {"L" : L, "A" : A, "W" : W, "T" : T, "Tp" : Tp, "Fr" : Fr, "Hpe" : Hpe, "maDeg" : maDeg,
+                 "pinBuilder" : parms.get("pinBuilder", "cuts")}
+    if ( footprintType == "QFP" ):
+        templateNames.append(pinTemplateNorth)
+        pinInputs["B"] = B
+
+    if (FC3DM_FetchCachedShapes(App, Gui,
+                                parms,
+                                docName, "gullwingPin", pinInputs, templateNames)):
+
+        # Color template pins red.  FIXME--remove this!
+        for templateName in templateNames:
+            FC3DM_SetObjectColor(App, Gui, docName, templateName, (1.00,0.00,0.00))
+
+        return 0
+
+    # Build the east side template pin
+    pinBuilder = parms.get("pinBuilder", "cuts")
+    if (pinBuilder == "cuts"):
+        FC3DM_CreateGullwingPinWithCuts(App, Gui,
+                                        L, A, T, W, Tp, Fr, Hpe, maDeg,
+                                        docName,
+                                        pinName)
+
+    elif (pinBuilder == "sweep"):
+        FC3DM_CreateGullwingPinWithSweep(App, Gui,
+                                         L, A, T, W, Tp, Fr, Hpe, maDeg,
+                                         docName,
+                                         pinName)
+
+    else:
+        FC3DM_WriteToDebugFile("Abort message:  Unsupported pinBuilder " + pinBuilder + ".  Expected \"cuts\" or \"sweep\".", logError)
+        FC3DM_MyExit(-1)
+
+    # Zoom in on pin model
+    FC3DM_ViewFit(App, Gui)
+
+
+    ## Copy this to give us a template north side IC pin
+    if ( footprintType == "QFP" ):
+        FC3DM_WriteToDebugFile("Copying the east side template pin to create a north side template pin")
+        if (A <> B):
+            FC3DM_WriteToDebugFile("Package is rectangular")
+            y = (B/2.0) - (A/2.0)
+        else:
+            FC3DM_WriteToDebugFile("Package is square")
+            y = 0.0
+            
+        x = 0.0   
+        rotDeg = 90.0
+        FC3DM_WriteToDebugFile("Dumping params to debug file: " + str(x) + " "  + str(y) + " " + str(rotDeg) + " " + docName + " " + pinName + " " + pinTemplateNorth)
+        FC3DM_CopyObject(App, Gui,
+                         x, y, rotDeg,
+                         docName,
+                         pinName,
+                         pinTemplateNorth)
+        FC3DM_WriteToDebugFile("Back from copying template pin to north side")
+        
+
+        
+        # Perform a useless cut on the north side pin so that the coordinates are reset
+        FC3DM_CreateBox(App, Gui,
+                        A, A, A, 0,
+                        W/2.0, B/2.0 -( Tp*(math.tan(maRad))), 0, 
+                        docName, "Cutter")
+        
+        FC3DM_CutWithSpecifiedObject(App, Gui,
+                                     docName, pinTemplateNorth, "Cutter")
+        
+        # Color north pin red.  FIXME--remove this!
+        FC3DM_WriteToDebugFile("Changing the north template gullwing pin red...")
+        FC3DM_SetObjectColor(App, Gui, docName, pinTemplateNorth, (1.00,0.00,0.00))
+        
+        
+    
+    # Remember these template pins for the next package that has the same pin geometry
+    FC3DM_StoreCachedShapes(App, Gui,
+                            parms,
+                            docName, "gullwingPin", pinInputs, templateNames)
+
+    # Color east pin red.  FIXME--remove this!
+    FC3DM_WriteToDebugFile("Changing the east template gullwing pin red...")
+    FC3DM_SetObjectColor(App, Gui, docName, pinName, (1.00,0.00,0.00))
+    
+    return 0
+
+
+###################################################################
+# FC3DM_CreateIcPinQfn()
+#	Function to create a QFN IC pin.
+#
+# Parameter names are per Mentor LP Wizard tool:
+# L == Overall component width (pin tip to pin tip)
+# W == Pin width
+# T == Pin landing length
+#
+# Other parameters:
+# Tp == Pin thickness (z dimension)
+###################################################################
+def FC3DM_CreateIcPinQfn(App, Gui,
+                         parms,
+                         docName):
+                
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinQfn()")
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    L = parms["L"]
+    A = parms["A"]
+    B = parms["B"]
+    W = parms["W"]
+    T = parms["T"]
+    Tp = parms["Tp"]
+    hasDshapePads = parms["hasDshapePads"]
+    pinName = parms["pinName"]
+    bodyName = parms["bodyName"]
+
+    pinTemplateEast = pinName
+    pinTemplateNorth = "pinTemplateNorth"
+    
+    # Configure active document
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+
+    # The template pins depend on nothing but these inputs, so see if we have built them before
+    pinInputs = {"L" : L, "A" : A, "B" : B, "W" : W, "T" : T, "Tp" : Tp, "hasDshapePads" : hasDshapePads}
+    if (FC3DM_FetchCachedShapes(App, Gui,
+                                parms,
+                                docName, "qfnPin", pinInputs, [pinTemplateEast, pinTemplateNorth])):
+
+        # Color pins.  FIXME--remove this!
+        FC3DM_SetObjectColor(App, Gui, docName, pinName, (1.00,0.00,0.00))
+        FC3DM_SetObjectColor(App, Gui, docName, pinTemplateNorth, (0.00,0.00,1.00))
+
+        return 0
+
+    # Prepare to call FC3DM_CreateBox() to create a box for the template pin
+    FC3DM_WriteToDebugFile("About to create box for template pin")
+    xBox = ((L/2)-T)
+    yBox = -1*(W/2)
+    H = Tp
+    K = 0.0
+    rotDeg = 0.0
+    FC3DM_CreateBox(App, Gui,
+                    L, W, H, K,
+                    xBox, yBox, rotDeg, 
+                    docName,
+                    pinName)
+
+    # See if we need to fillet to create D-shaped pins
+    if (hasDshapePads <> 0):
+
+        FC3DM_WriteToDebugFile("QFN has D-shape pads")
+        
+        # Set the faces that need to be filleted
+        edges=["Edge1", "Edge3"]
+
+        # Compute fillet radius.
+        # We must subtract a small amount or else the filleting operation fails.
+        Fr = (W/2) - 0.00001
+
+        # Do the filleting
+        FC3DM_FilletObjectEdges(App, Gui,
+                                docName, pinName, edges, Fr)
+
+    # Perform an unnecessary cut just to reset the baseline location for this pin.
+    # Allow the pins to extend ever so slightly beyond the body in x, so that after all is said
+    # and done, we can distinguish body vs. pin for purposes of coloring the fusion.
+    FC3DM_CutWithBox(App, Gui,
+                     docName, pinName,
+                     L, W, W, (L/2)+tinyDeltaForQfn, -1*(W/2), 0,
+                     0, 0, 0, 0)
+
+    ## Copy this to give us a template north side IC pin
+    FC3DM_WriteToDebugFile("Copying the east side template pin to create a north side template pin")
+    if (A <> B):
+        y = (B/2.0) - (A/2.0)
+    else:
+        y = 0.0
+        
+    x = 0.0   
+    rotDeg = 90.0
+    FC3DM_CopyObject(App, Gui,
+                     x, y, rotDeg,
+                     docName,
+                     pinTemplateEast,
+                     pinTemplateNorth)
+
+    # Perform an unnecessary cut just to reset the baseline location for this pin.
+    FC3DM_CutWithBox(App, Gui,
+                    docName, pinTemplateNorth,
+                    W, L, T, -1*(W/2), (B/2)+tinyDeltaForQfn, 0.0, 
+                    0, 0, 0, 0)
+
+    # Zoom in on pin model
+    FC3DM_ViewFit(App, Gui)
+
+    # Remember these template pins for the next package that has the same pin geometry
+    FC3DM_StoreCachedShapes(App, Gui,
+                            parms,
+                            docName, "qfnPin", pinInputs, [pinTemplateEast, pinTemplateNorth])
+
+    # Color pin red.  FIXME--remove this!
+    FC3DM_SetObjectColor(App, Gui, docName, pinName, (1.00,0.00,0.00))
+    FC3DM_SetObjectColor(App, Gui, docName, pinTemplateNorth, (0.00,0.00,1.00))
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateIcPinEp()
+#	Function to create an exposed pad (EP) underneath the IC body.
+#
+# Other parameters:
+# Tp == Pin thickness (z dimension)
+###################################################################
+def FC3DM_CreateIcPinEp(App, Gui,
+                        parms,
+                        length, width, x, y,
+                        epName,
+                        pinType,
+                        docName):
+                
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinEp()")
+
+    # Assume that the EP does not have rounded corners
+    roundedCorners = False
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    Tp = parms["Tp"]
+    bodyName = parms["bodyName"]
+    Ft = parms["Ft"] #pkgDimsEpChamfer
+    Rt = parms["Rt"] #pkgDimsEpCornerRadius
+    
+    if ("epPin1ChamferRadius" in parms):
+        epPin1ChamferRadius = parms["epPin1ChamferRadius"]
+    else:
+        epPin1ChamferRadius = 0.0
+
+	# If there are different types of EPs in this component, extract the parameters from parms
+    if (pinType.startswith("Type")):
+        Ft = parms[pinType + "_Ft"]
+        Rt = parms[pinType + "_Rt"]
+        epPin1ChamferRadius = parms[pinType + "_epPin1ChamferRadius"]
+
+    FC3DM_WriteToDebugFile("Ep length: " + str(length))
+    FC3DM_WriteToDebugFile("Ep width: " + str(width))
+    FC3DM_WriteToDebugFile("Ep chamfer: " + str(Ft))
+    FC3DM_WriteToDebugFile("Ep corner radius: " + str(Rt))
+    FC3DM_WriteToDebugFile("Ep chamfer radius: " + str(epPin1ChamferRadius))
+    
+    # Prepare parameters for FC3DM_CreateBox()
+    FC3DM_WriteToDebugFile("Creating box for EP...")
+    L = length
+    W = width
+    xBox = (-1*(W/2) + x)
+    yBox = (-1*(L/2) + y)
+    H = Tp
+    K = 0.0
+    rotDeg = 0.0
+    FC3DM_CreateBox(App, Gui,
+                    W, L, H, K,
+                    xBox, yBox, rotDeg, 
+                    docName,
+                    epName)
+
+    if (Rt > 0.0):
+        FC3DM_WriteToDebugFile("About to fillet EP corners")
+        FC3DM_WriteToDebugFile("EP corner radius is: " + str(Rt))
+        
+        # Select the edges to be filleted. If there is not a pin 1 chamfer, we will
+        # fillet all the edges. Otherwise, we will fillet all the edges except for
+        # the pin 1 chamfer edge
+        if ((Ft > 0.0) or (epPin1ChamferRadius > 0.0)):
+            edges = ["Edge1", "Edge5", "Edge7"]
+        else:
+            edges = ["Edge1", "Edge3", "Edge5", "Edge7"]
+
+        # Call FC3DM_FilletObjectEdges to actually do the filleting
+        FC3DM_FilletObjectEdges(App, Gui,
+                                docName, epName, edges, Rt)
+        
+        FC3DM_WriteToDebugFile("Back from FC3DM_FilletObjectEdges()")
+
+    # Sanity check: Ft and epPin1ChamferRadius cannot both be greater than 0.0
+    if ( (Ft > 0.0) and (epPin1ChamferRadius > 0.0) ):
+        FC3DM_WriteToDebugFile("Both Ft and epPin1ChamferRadius are greater than zero!")
+        FC3DM_MyExit(-1)
+
+    # See if we need to chamfer the pin 1 edge of the EP
+    if (Ft > 0.0) :
+
+        FC3DM_WriteToDebugFile("About to chamfer EP")
+        FC3DM_WriteToDebugFile("Chamfer dimension is: " + str(Ft))
+        
+        # Select a priori the edge that needs to be chamfered (determined experimentally).
+        # The pin 1 chamfer edge is the same regardless of whether or not the EP corners
+        # were filleted. 
+        edges=["Edge3"]
+            
+        # Call FC3DM_ChamferObjectEdges() to actually do the chamfering
+        FC3DM_ChamferObjectEdges(App, Gui,
+                                 docName, epName, edges, Ft)
+        
+        FC3DM_WriteToDebugFile("Back from FC3DM_ChamferObjectEdges()")
+
+    # If the EP has a rounded pin 1 chamfer, cut the EP with a cylinder of the specified radius
+    elif ( epPin1ChamferRadius > 0.0 ) :
+
+        FC3DM_WriteToDebugFile("About the chamfer EP using rounded chamfer")
+        FC3DM_WriteToDebugFile("epPin1ChamferRadius is: " + str(epPin1ChamferRadius))
+        
+        # Create a cylinder to use for cutting out for pin 1 marker
+        cylName = "Cutter"
+        FC3DM_CreateCylinderVert(App, Gui,
+                                 docName, cylName, x - (W/2.0), y + L/2.0, 0, epPin1ChamferRadius, Tp)
+        # FC3DM_WriteToDebugFile("Back from FC3DM_CreateCylinderVert()")
+        
+        FC3DM_CutWithSpecifiedObject(App, Gui,
+                                     docName, epName, cylName)
+        FC3DM_WriteToDebugFile("Back from FC3DM_CutWithSpecifiedObject()")
+    
+    # Zoom in on pin model
+    FC3DM_ViewFit(App, Gui)
+
+    # Color pin red.  FIXME--remove this!
+    FC3DM_WriteToDebugFile("Coloring the EP red")
+    FC3DM_SetObjectColor(App, Gui, docName, epName, (1.00,0.00,0.00))
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateIcPins()
+#	Function to create all gullwing IC pins.
+###################################################################
+def FC3DM_CreateIcPins(App, Gui,
+                       parms, pinNames,
+                       docName):
+                
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPins()")
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    pinTemplateEast = parms["pinName"]
+    pinTemplateNorth = "pinTemplateNorth"
+    bodyName = parms["bodyName"]
+    footprintType = parms["footprintType"]
+    hasEp = parms["hasEp"]
+
+    # QFN pins and EPs that must be cut out of the body.  We cut them all at once, after creating them.
+    bodyCutTools = []
+
+    # Retrieve EP parameters if needed
+    if (hasEp):
+        FC3DM_WriteToDebugFile("Footprint has an EP")
+        Tt = parms["Tt"] # pkgDimsEpLengthMax
+        Wt = parms["Wt"] # pkgDimsEpWidthMax
+        Ft = parms["Ft"] # pkgDimsEpChamfer
+        Rt = parms["Rt"] # pkgDimsEpCornerRad
+
+    print("Hello from FC3DM_CreateIcPins()!")
+
+    ## Call the appropriate function to create the prototype IC pin
+    # Handle Gullwing ICs        
+    if ( (footprintType == "SOP") or (footprintType == "SOIC") or (footprintType == "SOT") or (footprintType == "QFP") ):
+
+        # Call CreateIcPin() to create template east side Gullwing IC pin
+        FC3DM_CreateIcPinGullwing(App, Gui,
+                                  parms,
+                                  docName)
+
+    # Handle QFN ICs        
+    elif (footprintType == "QFN"):
+
+        # Call CreateIcPinQfn() to create template east side and north side QFN IC pins
+        FC3DM_CreateIcPinQfn(App, Gui,
+                             parms,
+                             docName)
+
+    # Else unsupported!
+    else:
+        print("Unsupported footprintType " + footprintType)
+        FC3DM_WriteToDebugFile("Abort message: Footprint type is unsupported!", logError)
+        FC3DM_MyExit(-1)
+
+    FC3DM_WriteToDebugFile("Back from creating template IC pin")
+    print("Back from creating template IC pin.")
+
+
+    # Configure active document
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+
+    # The pin rows were parsed and checked (already sorted by pin name) when we read the ini files.
+    pinTable = parms["pinTable"]
+    pinNames.extend(pinTable["names"])
+
+    print("pinNames is:")
+    print(pinNames)
+
+    FC3DM_WriteToDebugFile("Examining pin types")
+    # Loop over all the pins.
+    for i in range(len(pinNames)):
+
+        # Pin row format is "type, side, x, y"
+        pin = pinNames[i]
+        lis = [pinTable["types"][i], pinTable["sides"][i]]
+
+        ## Examine pin type
+        if ( (lis[0] == "Gullwing") or (lis[0] == "QFN") ):
+
+            ## Get pin x & y coordinates
+            x = pinTable["x"][i]
+            y = pinTable["y"][i]
+
+            ## Examine pin side
+            # Look for an east side pin.
+            if (lis[1] == "East"):
+                FC3DM_WriteToDebugFile("Found east pin")
+                # Our template pin was created on the east side, so no rotation required.
+                rotDeg = 0.0
+
+                # Currently we're ignoring this datum from the ini file.
+                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
+                x = 0.0
+
+                ## Copy template pin to the commanded location
+                FC3DM_CopyObject(App, Gui,
+                                 x, y, rotDeg,
+                                 docName,
+                                 pinTemplateEast,
+                                 pin)
+                
+            # Else see if this is a west side pin.
+            elif (lis[1] == "West"):
+
+                FC3DM_WriteToDebugFile("Found west pin")
+                # Our template pin was created on the east side, so rotate 180 degrees
+                rotDeg = 180.0
+
+                # Currently we're ignoring this datum from the ini file.
+                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
+                x = 0.0
+
+                ## Copy template pin to the commanded location
+                FC3DM_CopyObject(App, Gui,
+                                 x, y, rotDeg,
+                                 docName,
+                                 pinTemplateEast,
+                                 pin)
+                
+            # Else see if this is a north side pin.
+            elif (lis[1] == "North"):
+
+                FC3DM_WriteToDebugFile("Found north pin")
+                # Our template pin was created on the north side, so no rotation
+                rotDeg = 0.0
+
+                # Currently we're ignoring this datum from the ini file.
+                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
+                y = 0.0
+
+                ## Copy template pin to the commanded location
+                FC3DM_CopyObject(App, Gui,
+                                 x, y, rotDeg,
+                                 docName,
+                                 pinTemplateNorth,
+                                 pin)
+                
+            # Else see if this is a south side pin.
+            elif (lis[1] == "South"):
+
+                FC3DM_WriteToDebugFile("Found south pin")
+                # Our template pin was created on the south side, so rotate 180 degrees!
+                rotDeg = 180.0
+
+                # Currently we're ignoring this datum from the ini file.
+                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
+                y = 0.0
+
+                ## Copy template pin to the commanded location
+                FC3DM_CopyObject(App, Gui,
+                                 x, y, rotDeg,
+                                 docName,
+                                 pinTemplateNorth,
+                                 pin)
+                
+            # Else unsupported!
+            else:
+                print("Unsupported pin side " + lis[1])
+                FC3DM_WriteToDebugFile("Abort message: Pin side was not north, south, east or west. Current pin side is unsupported", logError)
+                FC3DM_MyExit(-1)
+
+            ## For certain package types, we need to cut the pin out of the body
+            if (lis[0] == "QFN"):
+                bodyCutTools.append(pin)
+
+        # endif is gullwing or QFN
+
+        # Handle EP pin type
+        elif (lis[1] == "Ep"):
+
+            ## Get pin x & y coordinates
+            x = pinTable["x"][i]
+            y = pinTable["y"][i]
+
+            # Set the name of the EP to whatever was used in the ini file
+            epName = pin
+			# If there are different types of EPs, handle them as defined in the ini file
+            if (lis[0].startswith("Type")):
+
+                # Pull the length and width of the split EP from parms
+                # Note: There should never be situations where parms["Tt"] and parms["TypeEP?_Tt"] are used. Currently no check for this. 
+                Tt = parms[lis[0] + "_Tt"]
+                Wt = parms[lis[0] + "_Wt"]
+
+                # Set the pin type to whatever was used in the ini file
+                pinType = lis[0]
+			
+			# Otherwise, proceed as usual (using Tt, Wt, Ft, and Rt) as defined in the ini file
+            else:
+
+                # Set the pin type to whatever was used in the ini file
+                pinType = lis[0]
+                
+            # Call FC3DM_CreateIcPinEp() to create EP pin from scratch
+            FC3DM_CreateIcPinEp(App, Gui, 
+								parms,
+                                Tt, Wt, x, y,
+                                epName,
+                                pinType,
+                                docName)
+
+            # Cut the body with the EP pin and keep both
+            bodyCutTools.append(epName)
+
+
+        # Else unknown pin type.  Abort
+        else:
+            print("Unsupported pin type " + lis[0])
+            FC3DM_WriteToDebugFile("Abort message: Pin type is unsupported", logError)
+            FC3DM_MyExit(-1)
+
+
+    # end loop over all the pin names.
+
+    ## Cut all the QFN pins and EPs out of the body, keeping the pins and EPs.
+    # Do this with one boolean operation, unless the ini file asks for the old one cut per pin.
+    if (len(bodyCutTools) > 0):
+
+        if (parms.get("batchBodyCuts", 1) != 0):
+            FC3DM_CutObjectWithToolsAndKeepTools(App, Gui,
+                                                 docName, bodyName, bodyCutTools)
+
+        else:
+            for tool in bodyCutTools:
+                FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
+                                                   docName, bodyName, tool)
+
+    # Remove the pin template object(s)
+    FC3DM_RemoveObject(App, Gui, docName, pinTemplateEast)
+
+    if ( (footprintType == "QFN") or (footprintType == "QFP") ):
+        FC3DM_RemoveObject(App, Gui, docName, pinTemplateNorth)
+
+    return 0
+
+
+###################################################################
+# FC3DM_CreateChipResistor()
+#	Function to create the body, terminations, and overmold of a chip
+# resistor.  The termination names are appended to pinNames.
+#
+# The overmold plays the part of pin1Mark for FC3DM_FuseSetOfObjects()
+# and FC3DM_DescribeObjectsToLogFile().
+###################################################################
+def FC3DM_CreateChipResistor(App, Gui,
+                             parms, pinNames,
+                             docName):
+
+    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateChipResistor()")
+
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    bodyName = parms["bodyName"]
+    moldName = parms["moldName"]
+    pin1Name = parms["pin1Name"]
+    pin2Name = parms["pin2Name"]
+
+    # Setup parameters related to the chip component body
+    L = parms["L"] 		# Length of chip resistor
+    W = parms["W"] 		# Width of chip resistor
+    T = parms["T"] 		# Distance from furthest length to end of termination
+    H = parms["H"] 		# Height of chip resistor
+    K = parms["K"] 		# Should be 0 always
+    termThickness = parms["termThickness"]
+
+    # Tweak these to reflect only the white substrate
+    bodyH = H-(termThickness)
+    bodyL = L-(2*termThickness)
+    bodyK = termThickness
+
+    # Create a box to represent the white substrate of the SMT fuse
+    rotDeg = 0
+    FC3DM_CreateAndCenterBox(App, Gui,
+                             bodyL, W, bodyH, bodyK,
+                             rotDeg, 
+                             docName,
+                             bodyName)
 
-        # Perform a cut at the north side of the IC body (pivot point high)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hpph,
-                         math.sin(ma/2),0,0,math.cos(ma/2))
 
-        # Perform a cut at the north side of the IC body (pivot point low)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         A + deltaForBodyCutsLength, A, A, -1*(A/2) - deltaForBodyCutsPosition, 1*(B/2), Hppl,
-                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+    # Create left side chip component termination
+    termL = T
+    termX = -1*(L/2)
+    termY = -1*(W/2)
+    FC3DM_CreateBox(App, Gui,
+                    termL, W, H, K,
+                    termX, termY, rotDeg, 
+                    docName,
+                    pin1Name)
+    
+    # Cut out the part of the termination that overlaps with the body
+    FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
+                                       docName, pin1Name, bodyName)
 
+    # Fillet the outside edges of this termination
+    edges = ["Edge2","Edge4"]
+    radius = (termThickness)
+    FC3DM_FilletObjectEdges(App, Gui,
+                            docName, pin1Name, edges, radius)
 
-        # Rotate the IC body 90 degrees about the z axis
-        FC3DM_RotateObjectAboutZ(App, Gui,
-                                 docName, bodyName, 90)
+    # Copy pin 1 to pin 2
+    FC3DM_CopyObject(App, Gui,
+                     0, 0, 180, 
+                     docName,
+                     pin1Name,
+                     pin2Name)
+
+    # Create a box to represent the overmold
+    moldL = L-(2*T)
+    moldH = bodyH + (termThickness)
+    moldK = bodyH
+    rotDeg = 0
+    FC3DM_CreateAndCenterBox(App, Gui,
+                             moldL, W, moldH, moldK,
+                             rotDeg, 
+                             docName,
+                             moldName)
 
-        # Perform a cut at the north side of the IC body (pivot point high)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hpph,
-                         math.sin(ma/2),0,0,math.cos(ma/2))
+    # Report our terminations as pins
+    pinNames.append(pin1Name)
+    pinNames.append(pin2Name)
 
-        # Perform a cut at the north side of the IC body (pivot point low)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hppl,
-                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+    return 0
 
+
+###################################################################
+# FC3DM_CopyObject()
+#	Function to copy a FreeCAD object, then translate in x,y
+# and rotate in z.
+###################################################################
+def FC3DM_CopyObject(App, Gui,
+                     x, y, rotDeg,
+                     docName,
+                     objName,
+                     newObjName):
     
-        # Rotate the IC body 180 degrees about the z axis
-        FC3DM_RotateObjectAboutZ(App, Gui,
-                                 docName, bodyName, 180)
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
 
-        # Perform a cut at the north side of the IC body (pivot point high)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - deltaForBodyCutsPosition, 1*(A/2), Hpph,
-                         math.sin(ma/2),0,0,math.cos(ma/2))
+    # Copy the object.  In memory, the copy just refers to the same graph node.
+    if ((docName, objName) in objectNodes):
+        objectNodes[(docName, newObjName)] = objectNodes[(docName, objName)]
 
+    else:
+        newTermShape = FreeCAD.getDocument(docName).getObject(objName).Shape.copy()
+        newTermObj = App.activeDocument().addObject("Part::Feature",newObjName)
+        newTermObj.Shape = newTermShape
 
-        # See if we need to do the pin 1 chamfer on the body
-        if (P1chamferOffset > 0):
+    # Translate the copy in x,y and rotate about the z axis as needed.
+    FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
+                                         docName, newObjName,
+                                         x, y, rotDeg)
 
-            # TODO:  Add sanity check to ensure that the chamfer doesn't cut into the body below the
-            # level of where the top-most part of the pin enters the body.  If it does, then we
-            # would break our underlying assumption that the pins are symmetric side-to-side.
-            # Detect this and abort on error!
+    # Copy the original object's color to the new object
+    Color = FC3DM_GetObjectColor(App, Gui, docName, objName)
+    if (Color != None):
+        FC3DM_SetObjectColor(App, Gui, docName, newObjName, Color)
+    
+    return 0
 
-            # Perform a cut at the north side of the IC body (chamfer on pin 1 long side of body)
-            FC3DM_CutWithBox(App, Gui,
-                             docName, bodyName,
-                             B, B, B, -1*(B/2), (1*(A/2) - moldOffset - P1chamferOffset), H,
-                             math.sin(-1*(ca/2)),0,0,math.cos(ca/2))
 
-        # Perform a cut at the north side of the IC body (pivot point low)
-        FC3DM_CutWithBox(App, Gui,
-                         docName, bodyName,
-                         B + deltaForBodyCutsLength, B, B, -1*(B/2) - 2*deltaForBodyCutsPosition, 1*(A/2), Hppl,
-                         math.sin(((3*pi)/4)-(ma/2)),0,0,math.cos(((3*pi)/4)-(ma/2)))
+###################################################################
+# FC3DM_SaveAndExport()
+#	Function to save a FreeCAD native CAD file, as well as export
+# the specified objects to a STEP file.
+#
+# Once the STEP file is written, the finished model is stored in the model
+# cache (if modelCacheDir is not "") and its manifest is written, since both
+# need the STEP file.  If the background export thread is running (see
+# FC3DM_StartExportThread()), all that is left to it, and we return as soon
+# as the native file is saved.
+###################################################################
+def FC3DM_SaveAndExport(App, Gui,
+                        docName,
+                        parms,
+                        objNameList,
+                        result,
+                        modelCacheDir):
+
+    FC3DM_WriteToDebugFile("Hello from FC3DM_SaveAndExport()")
 
+    # Extract relevant parameter values from parms associative array
+    # TODO:  Currently no error checking!
+    newModelPathNameExt = parms["newModelPathNameExt"]
+    newStepPathNameExt = parms["newStepPathNameExt"]
+
+    # Turn any in-memory shapes into document objects, now that we need them
+    FC3DM_MaterializeObjects(App, Gui,
+                             docName)
+
+    ## Save to disk in native format.  Once is enough.
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+    App.getDocument(docName).FileName = newModelPathNameExt
+    App.getDocument(docName).Label = docName
+    App.getDocument(docName).save()
     
-        # Do final rotation of the IC body 90 degrees about the z axis
-        FC3DM_RotateObjectAboutZ(App, Gui,
-                                 docName, bodyName, 90)
+    ## Export to STEP
+    # Create list of objects, starting with object names
+    objs=[]
+    for i in objNameList:
+        
+        objs.append(FreeCAD.getDocument(docName).getObject(i))
 
-    # endif (maDeg > 0)
+    # Apply our recorded colors to what we will export
+    (exporter, exportObjs, exportDocName) = FC3DM_PrepareStepExport(App, Gui,
+                                                                    docName, objs)
+    del objs
 
-    ## Attempt to analyze the faces in the body, to find which ones to fillet.
-    # Loop over all the faces in this pin.
-    print("Here are the edges!")
-    numEdges = len(App.ActiveDocument.getObject(bodyName).Shape.Edges)
-    print(" Number of edges is " + str(numEdges))
+    # Everything else is done by FC3DM_RunExportJob(), from here or from the export thread
+    job = {"docName" : docName,
+           "exportDocName" : exportDocName,
+           "exporter" : exporter,
+           "objs" : exportObjs,
+           "stepPathNameExt" : newStepPathNameExt,
+           "compressStep" : (parms.get("compressStep", 0) != 0),
+           "parms" : parms,
+           "modelCacheDir" : modelCacheDir,
+           "cacheResults" : {"geometryHash" : result["geometryHash"],
+                             "faceCount" : result["faceCount"],
+                             "fingerprint" : parms["fingerprint"]},
+           "result" : result,
+           "timings" : {},
+           "error" : None,
+           "done" : threading.Event()}
+
+    if ( (exportThread != None) and (parms.get("backgroundExport", 1) != 0) ):
+        FC3DM_WriteToDebugFile("Handing STEP export of " + newStepPathNameExt + " to the export thread.", logInfo)
+        exportJobs.append(job)
+        exportQueue.put(job)
 
-    # Workaround for the fact that edge.Name doesn't work.
-    # Since we now know the number of edges, and we know FC's naming convention, we shall
-    # iterate through the edges by name, rather than by reference.
-#    for edgeNum in range(1, numEdges):
+    else:
+        FC3DM_RunExportJob(job)
+        FC3DM_FinishExportJob(App, Gui,
+                              job)
 
-#        edgeName = "Edge" + str(edgeNum)
-#        print("Examining " + edgeName)
+        # There's no sense going on without our STEP file
+        if (job["error"] != None):
+            FC3DM_WriteToDebugFile("Abort message:  Unable to export STEP file " + newStepPathNameExt + ":  " + job["error"], logError)
+            FC3DM_MyExit(-1)
 
-#        edge = App.ActiveDocument.getObject(edgeName)
+    return 0
 
 
-    # Attempt to iterate over all the edges in the shape.
-    # For each edge, analyze its vertexes and find ones that are on the top or bottom faces.
-    # Then select such edges for filleting.
-    # The problem is that I can't find a way to extract the edge name.
-    # Thus, this is currently useless.
-    for edge in App.ActiveDocument.getObject(bodyName).Shape.Edges:
-        print edge #.PropertiesList #Label #str(edge)
+###################################################################
+# FC3DM_PrepareStepExport()
+#	Function to get a list of objects ready to export to a STEP file,
+# with the colors that we have recorded for them.  Returns the export
+# module to use, the objects to hand it, and the name of the temporary
+# document holding those objects ("" if none).
+#
+# The FreeCADs that we run in (python 2) keep colors on the GUI view
+# objects.  With a GUI, ImportGui exports them as is.  Without a GUI, we
+# bring up the GUI modules without a main window and copy the objects to a
+# temporary document, so that the copies get view objects to color.  If
+# even that is not possible, we export without colors (and say so).
+###################################################################
+def FC3DM_PrepareStepExport(App, Gui,
+                            docName, objs):
 
-        # Loop over all the vertexes in this edge
-        for vertex in edge.Vertexes:
-            
-            # Write this vertex
-            print(str(vertex.Point))
+    # With a GUI, just export
+    if (Gui != None):
+        import ImportGui
+        return (ImportGui, objs, "")
 
-    # endfor loop over edges            
+    # Try to set up the GUI modules without a main window
+    try:
+        # (setupWithoutGUI() does nothing if the GUI modules are already set up)
+        import FreeCADGui
+        FreeCADGui.setupWithoutGUI()
+        import ImportGui
+        haveImportGui = True
+    except Exception:
+        haveImportGui = False
 
-    # If we had a pin 1 chamfer, we only have 7 edges to fillet, not 8.
-    if (P1chamferOffset > 0):
+    # If we can't have ImportGui, export plain geometry
+    if (not haveImportGui):
+        FC3DM_WriteToDebugFile("Warning:  Unable to load ImportGui without a GUI.  Exporting STEP file without colors!", logWarning)
+        import Import
+        return (Import, objs, "")
 
-        # Set the faces that need to be filleted
-        edges=["Edge4","Edge6","Edge9","Edge11","Edge14","Edge17","Edge21"]
+    # Copy objects to a temporary document, so that they get view objects to color
+    exportDoc = App.newDocument(docName + "_export")
+    exportObjs = []
+    exportCopies = {}
+    for obj in objs:
 
-    else:
+        exportObjs.append(FC3DM_CopyObjectForExport(App, FreeCADGui,
+                                                    docName, exportDoc, obj, exportCopies))
 
-        # Set the faces that need to be filleted
-        edges=["Edge4","Edge6","Edge14","Edge11","Edge9","Edge17","Edge19","Edge20"]
+    exportDoc.recompute()
 
-    ## Fillet all non-chamfered edges on the top & bottom faces
-    # Note:  Do them all at once, because I've had a hard time with finding edge names on
-    # the top face after filleting the bottom face, and vice versa.
-    # TODO:  This is currently hardcoded!
-    # TODO:  This must be revisited for BGA, etc.!
-    # Only do the filleting if we have a mold angle
-    #if ( (maDeg > 0) and (footprintType <> "SOIC") ):    
-    #
-    #    FC3DM_FilletObjectEdges(App, Gui,
-    #                            docName, bodyName, edges, Frbody)
+    return (ImportGui, exportObjs, exportDoc.Name)
 
 
-    ## Prepare to make pin 1 marker
+###################################################################
+# FC3DM_WriteStepFile()
+#	Function to export a list of objects to a STEP file, with the given
+# export module (see FC3DM_PrepareStepExport()).
+#
+# If compressStep is True, the STEP file is gzip compressed (ISO 10303-21
+# "STEP-Z", as FreeCAD and KiCad read it), and stepPathNameExt should end
+# with ".stpZ".  The exporter writes a plain STEP file next to it first,
+# since it picks the file format from the extension.
+###################################################################
+def FC3DM_WriteStepFile(exporter, objs, stepPathNameExt, compressStep):
 
-    # Create a cylinder to use for cutting out for pin 1 marker
-    cylName = "CylCuttingTool"
-    FC3DM_CreateCylinderVert(App, Gui,
-                             docName, cylName, (-1*(A/2))+moldOffset+P1chamferOffset+Frbody+P1markOffset+P1markRadius, (B/2)-moldOffset-Frbody-P1markOffset-P1markRadius, (H-P1markIndent), P1markRadius, H)
+    # Plain STEP file
+    if (not compressStep):
+        exporter.export(objs,stepPathNameExt)
+        return 0
 
-    # Use this dummy cylinder to cut into the IC body
-    FC3DM_CutObjectWithToolAndDiscardTool(App, Gui,
-                                          docName, bodyName, cylName)
+    # Export to a plain STEP file, then compress that.  Leave out the name and time
+    # in the gzip header, so that the same STEP file always compresses the same.
+    plainPathNameExt = os.path.splitext(stepPathNameExt)[0] + ".step"
+    exporter.export(objs,plainPathNameExt)
 
-    # Apply pin 1 marker ink inside cut
-    FC3DM_CreateCylinderVert(App, Gui,
-                             docName, pin1MarkName, (-1*(A/2))+moldOffset+P1chamferOffset+Frbody+P1markOffset+P1markRadius, (B/2)-moldOffset-Frbody-P1markOffset-P1markRadius, (H-P1markIndent), P1markRadius, markHeight)
+    plainFileP = open(plainPathNameExt, "rb")
+    stepFileP = open(stepPathNameExt, "wb")
+    gzipFileP = gzip.GzipFile(filename="", mode="wb", compresslevel=6, fileobj=stepFileP, mtime=0)
+    shutil.copyfileobj(plainFileP, gzipFileP, 1024*1024)
+    gzipFileP.close()
+    stepFileP.close()
+    plainFileP.close()
+
+    os.remove(plainPathNameExt)
 
     return 0
 
 
 ###################################################################
-# FC3DM_CreateIcPinGullwing()
-#	Function to create a gullwing IC pin.
-#
-# Parameter names are per Mentor LP Wizard tool:
-# L == Overall component width (pin tip to pin tip)
-# A == Overall body width
-# B == Overall body length
-# W == Pin width
-# T == Pin landing length
+# FC3DM_RunExportJob()
+#	Function to write the STEP file for a job made by FC3DM_SaveAndExport(),
+# then store the finished model in the model cache and write its manifest.
 #
-# Other parameters:
-# Tp == Pin thickness (z dimension)
-# Fr == Fillet radius for pin edges
-# Hpe == Height of pin entry to body (center)
+# This may run in the export thread, so it only touches the job dict.
+# It records the time each stage takes in job["timings"], and anything
+# that went wrong in job["error"], for FC3DM_FinishExportJob() to report.
 ###################################################################
-def FC3DM_CreateIcPinGullwing(App, Gui,
-                              parms,
-                              docName):
-                
-    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinGullwing()")
+def FC3DM_RunExportJob(job):
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    L = parms["L"]
-    A = parms["A"]
-    B = parms["B"]
-    W = parms["W"]
-    T = parms["T"]
-    K = parms["K"]
-    Tp = parms["Tp"]
-    Fr = parms["Fr"]
-    Hpe = parms["Hpe"]
-    maDeg = parms["maDeg"]
-    Hpph = parms["Hpph"]
-    Hppl = parms["Hppl"]
-    pinName = parms["pinName"]
-    bodyName = parms["bodyName"]
-    footprintType = parms["footprintType"]
-    
-    pinTemplateNorth = "pinTemplateNorth"
-    
-    # Configure active document
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+    stageTime = time.time()
 
-    # Prepare to call FC3DM_CreateBox() to create a box for the template pin
-    FC3DM_WriteToDebugFile("About to create box for template pin")
-    maRad = math.radians(maDeg)
-    x = A/2.0 -  (Tp*math.tan(maRad))
-    y = -1*(W/2)
-    H = (Hpe + (Tp/2.0))
-    K = 0.0
-    rotDeg = 0.0
-    boxLength = (L/2.0) - (A/2.0) + (Tp*math.tan(maRad))
-    FC3DM_WriteToDebugFile("boxLength: " + str(boxLength))
-    FC3DM_CreateBox(App, Gui,
-                    boxLength, W, H, K,
-                    x, y, rotDeg, 
-                    docName,
-                    pinName)
-    
-    # Cut away top-right part of the IC pin solid
-    edges=["Edge4"]
-    radius=0.3*Fr	# FIXME:  How to compute the inner radius (here) as a function of outer radius (Fr)???
-    FC3DM_CutWithFilletedBox(App, Gui,
-                             docName, pinName,
-                             L, L, L, (L/2)-T+Tp, -1*(W/2), Tp,
-                             0, 0, 0, 0,
-                             edges, radius)
-    
-    # Cut away lower-left part of the IC pin solid
-    FC3DM_WriteToDebugFile("About to cut lower-left part of the IC pin solid")
-    edges=["Edge6"]
-    FC3DM_CutWithFilletedBox(App, Gui,
-                             docName, pinName,
-                             (L/2)-T, W, Hpe-(Tp/2.0), 0, -1*(W/2), 0,
-                             0, 0, 0, 0,
-                             edges, radius)
+    try:
+        FC3DM_WriteStepFile(job["exporter"], job["objs"], job["stepPathNameExt"], job["compressStep"])
+        now = time.time()
+        job["timings"]["exportStep"] = now - stageTime
+        stageTime = now
+
+        # Remember this model, in case we are asked to build it again
+        parms = job["parms"]
+        if (job["modelCacheDir"] != ""):
+            FC3DM_StoreInModelCache(job["modelCacheDir"], parms["modelCacheKey"], parms,
+                                    job["cacheResults"],
+                                    parms.get("modelCacheMaxBytes", modelCacheDefaultMaxBytes))
+            now = time.time()
+            job["timings"]["storeInModelCache"] = now - stageTime
+            stageTime = now
+
+        # Record what these files were built from, for FC3DM_preflight.py
+        FC3DM_WriteModelManifest(parms, parms["modelCacheKey"])
+
+    except Exception as e:
+        job["error"] = str(e).replace("\n", " ")
+        traceback.print_exc()
+
+    job["objs"] = None
+    job["done"].set()
 
-    # Fillet (round) some of the gullwing pin edges
-    FC3DM_WriteToDebugFile("About to fillet gullwing pin edges")
-    edges=["Edge4","Edge30"]
-    FC3DM_FilletObjectEdges(App, Gui,
-                            docName, pinName, edges, Fr)
+    return 0
 
-    FC3DM_WriteToDebugFile("About to cut gullwing pin that exists within IC body")
 
-    ## Before we were using FC3DM_CutWithToolAndKeepTool() to perform this cut but we were experiencing unknown problems with a handful of packages
-    ## The following process makes the assumption that the pin starts and ends within the upper mold angle cut in the z direction. If this condition is not met, the script will abort.
+###################################################################
+# FC3DM_FinishExportJob()
+#	Function to finish up a job once FC3DM_RunExportJob() is done with it:
+# close its temporary export document, and report its timings (and any
+# failure) in the model's result dict.
+###################################################################
+def FC3DM_FinishExportJob(App, Gui,
+                          job):
 
-    # Sanity check to validate our assumption
-    if ((Hpe - (Tp/2.0)) < Hpph ):
-        FC3DM_WriteToDebugFile("Abort message: In FC3DM_CreateIcPinGullwing(), lower entry point of pin is below mold angle cut. This violates the assumption that the pin will enter the body above the mold angle cut.")
-        FC3DM_MyExit(-1)
+    if ( (job["exportDocName"] != "") and (job["exportDocName"] in App.listDocuments()) ):
+        App.closeDocument(job["exportDocName"])
+
+    result = job["result"]
+    if ("timings" in result):
+        result["timings"].update(job["timings"])
+
+    if (job["error"] != None):
+        result["rc"] = -1
+        result["message"] = "Exception in STEP export: " + job["error"]
+
+    return 0
 
-    FC3DM_WriteToDebugFile("A is: " + str(A) + " W is: " + str(W) + " Hpe is: " + str(Hpe) + " Tp is: " + str(Tp))
-    FC3DM_WriteToDebugFile("A/2.0 is: " + str(A/2.0) + "-(W/2.0) is: " + str(-(W/2.0)) + " Hpe - Tp/2.0 is: " + str( Hpe - Tp/2.0))
-    FC3DM_WriteToDebugFile("maRad: " + str(maRad))
 
-    # Create a box that will be used to cut the pin so that the pin does not over lap with the body
-    FC3DM_CreateBox(App, Gui,
-                    A, A, A, Hpe - (Tp/2.0),
-                    A/2.0, -(W/2.0), 0, 
-                    docName, "Cutter")
+###################################################################
+# FC3DM_ExportThread()
+#	Function run by the background export thread.  Runs the jobs from
+# the queue, until it gets None.
+###################################################################
+def FC3DM_ExportThread(queue):
 
-    # Rotate the box just created
-    Draft.rotate(FreeCAD.getDocument(docName).getObject("Cutter"), -90 - maDeg, Base.Vector(A/2.0, -(W/2.0), Hpe - (Tp/2.0)), Base.Vector(0,1,0))
+    while (True):
+        job = queue.get()
+        if (job == None):
+            return 0
 
-    # Cutting the pin with the box just created so that the pin can fuse with the body later
-    FC3DM_CutWithSpecifiedObject(App, Gui,
-                                 docName, pinName, "Cutter")
+        FC3DM_RunExportJob(job)
 
-    # Zoom in on pin model
-    Gui.SendMsgToActiveView("ViewFit")
 
+###################################################################
+# FC3DM_StartExportThread()
+#	Function to start the background export thread, so that writing one
+# model's STEP file overlaps with building the next model.
+#
+# FreeCAD documents are not thread safe, so everything that touches them,
+# other than the export itself, stays on the geometry (main) thread:  the
+# documents of exported models are closed by FC3DM_ReapExportJobs().
+# FreeCAD holds the python lock while it runs the exporter, so the two
+# threads take turns at FreeCAD itself.  What overlaps with building the
+# next model is compressing the STEP file, copying the model to the model
+# cache, and the disk writes.
+# Only used without a GUI.  Call FC3DM_StopExportThread() when done.
+###################################################################
+def FC3DM_StartExportThread():
 
-    ## Copy this to give us a template north side IC pin
-    if ( footprintType == "QFP" ):
-        FC3DM_WriteToDebugFile("Copying the east side template pin to create a north side template pin")
-        if (A <> B):
-            FC3DM_WriteToDebugFile("Package is rectangular")
-            y = (B/2.0) - (A/2.0)
-        else:
-            FC3DM_WriteToDebugFile("Package is square")
-            y = 0.0
-            
-        x = 0.0   
-        rotDeg = 90.0
-        FC3DM_WriteToDebugFile("Dumping params to debug file: " + str(x) + " "  + str(y) + " " + str(rotDeg) + " " + docName + " " + pinName + " " + pinTemplateNorth)
-        FC3DM_CopyObject(App, Gui,
-                         x, y, rotDeg,
-                         docName,
-                         pinName,
-                         pinTemplateNorth)
-        FC3DM_WriteToDebugFile("Back from copying template pin to north side")
-        
+    global exportQueue
+    global exportThread
+
+    if (exportThread != None):
+        return 0
+
+    exportQueue = Queue.Queue(exportQueueSize)
+    exportThread = threading.Thread(target=FC3DM_ExportThread, args=(exportQueue,))
+    exportThread.daemon = True
+    exportThread.start()
 
-        
-        # Perform a useless cut on the north side pin so that the coordinates are reset
-        FC3DM_CreateBox(App, Gui,
-                        A, A, A, 0,
-                        W/2.0, B/2.0 -( Tp*(math.tan(maRad))), 0, 
-                        docName, "Cutter")
-        
-        FC3DM_CutWithSpecifiedObject(App, Gui,
-                                     docName, pinTemplateNorth, "Cutter")
-        
-        # Color north pin red.  FIXME--remove this!
-        FC3DM_WriteToDebugFile("Changing the north template gullwing pin red...")
-        Gui.getDocument(docName).getObject(pinTemplateNorth).ShapeColor = (1.00,0.00,0.00)
-        
-        
-    
-    # Color east pin red.  FIXME--remove this!
-    FC3DM_WriteToDebugFile("Changing the east template gullwing pin red...")
-    Gui.getDocument(docName).getObject(pinName).ShapeColor = (1.00,0.00,0.00)
-    
     return 0
 
 
 ###################################################################
-# FC3DM_CreateIcPinQfn()
-#	Function to create a QFN IC pin.
-#
-# Parameter names are per Mentor LP Wizard tool:
-# L == Overall component width (pin tip to pin tip)
-# W == Pin width
-# T == Pin landing length
-#
-# Other parameters:
-# Tp == Pin thickness (z dimension)
+# FC3DM_StopExportThread()
+#	Function to wait for the background export thread to finish all its
+# jobs, then reap them (see FC3DM_ReapExportJobs()).
 ###################################################################
-def FC3DM_CreateIcPinQfn(App, Gui,
-                         parms,
-                         docName):
-                
-    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinQfn()")
+def FC3DM_StopExportThread(App, Gui):
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    L = parms["L"]
-    A = parms["A"]
-    B = parms["B"]
-    W = parms["W"]
-    T = parms["T"]
-    Tp = parms["Tp"]
-    hasDshapePads = parms["hasDshapePads"]
-    pinName = parms["pinName"]
-    bodyName = parms["bodyName"]
+    global exportQueue
+    global exportThread
 
-    pinTemplateEast = pinName
-    pinTemplateNorth = "pinTemplateNorth"
-    
-    # Configure active document
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+    if (exportThread == None):
+        return 0
 
-    # Prepare to call FC3DM_CreateBox() to create a box for the template pin
-    FC3DM_WriteToDebugFile("About to create box for template pin")
-    xBox = ((L/2)-T)
-    yBox = -1*(W/2)
-    H = Tp
-    K = 0.0
-    rotDeg = 0.0
-    FC3DM_CreateBox(App, Gui,
-                    L, W, H, K,
-                    xBox, yBox, rotDeg, 
-                    docName,
-                    pinName)
+    exportQueue.put(None)
+    exportThread.join()
+    exportQueue = None
+    exportThread = None
 
-    # See if we need to fillet to create D-shaped pins
-    if (hasDshapePads <> 0):
+    FC3DM_ReapExportJobs(App, Gui,
+                         True)
 
-        FC3DM_WriteToDebugFile("QFN has D-shape pads")
-        
-        # Set the faces that need to be filleted
-        edges=["Edge1", "Edge3"]
+    return 0
 
-        # Compute fillet radius.
-        # We must subtract a small amount or else the filleting operation fails.
-        Fr = (W/2) - 0.00001
 
-        # Do the filleting
-        FC3DM_FilletObjectEdges(App, Gui,
-                                docName, pinName, edges, Fr)
+###################################################################
+# FC3DM_IsExportPending()
+#	Function to see whether a document has been handed to the export
+# thread, and not yet reaped.
+###################################################################
+def FC3DM_IsExportPending(docName):
 
-    # Perform an unnecessary cut just to reset the baseline location for this pin.
-    # Allow the pins to extend ever so slightly beyond the body in x, so that after all is said
-    # and done, we can distinguish body vs. pin for purposes of coloring the fusion.
-    FC3DM_CutWithBox(App, Gui,
-                     docName, pinName,
-                     L, W, W, (L/2)+tinyDeltaForQfn, -1*(W/2), 0,
-                     0, 0, 0, 0)
+    for job in exportJobs:
+        if (job["docName"] == docName):
+            return True
 
-    ## Copy this to give us a template north side IC pin
-    FC3DM_WriteToDebugFile("Copying the east side template pin to create a north side template pin")
-    if (A <> B):
-        y = (B/2.0) - (A/2.0)
-    else:
-        y = 0.0
-        
-    x = 0.0   
-    rotDeg = 90.0
-    FC3DM_CopyObject(App, Gui,
-                     x, y, rotDeg,
-                     docName,
-                     pinTemplateEast,
-                     pinTemplateNorth)
+    return False
 
-    # Perform an unnecessary cut just to reset the baseline location for this pin.
-    FC3DM_CutWithBox(App, Gui,
-                    docName, pinTemplateNorth,
-                    W, L, T, -1*(W/2), (B/2)+tinyDeltaForQfn, 0.0, 
-                    0, 0, 0, 0)
 
-    # Zoom in on pin model
-    Gui.SendMsgToActiveView("ViewFit")
+###################################################################
+# FC3DM_ReapExportJobs()
+#	Function to finish up (see FC3DM_FinishExportJob()) the export jobs
+# that the export thread is done with, and close their documents.
+# If wait is True, waits for all jobs to be done first.
+###################################################################
+def FC3DM_ReapExportJobs(App, Gui,
+                         wait):
 
-    # Color pin red.  FIXME--remove this!
-    Gui.getDocument(docName).getObject(pinName).ShapeColor = (1.00,0.00,0.00)
-    Gui.getDocument(docName).getObject(pinTemplateNorth).ShapeColor = (0.00,0.00,1.00)
+    for job in list(exportJobs):
+
+        if (wait):
+            job["done"].wait()
+        elif (not job["done"].is_set()):
+            continue
+
+        exportJobs.remove(job)
+        FC3DM_FinishExportJob(App, Gui,
+                              job)
+        FC3DM_CloseDocument(App, Gui,
+                            job["docName"])
 
     return 0
 
 
 ###################################################################
-# FC3DM_CreateIcPinEp()
-#	Function to create an exposed pad (EP) underneath the IC body.
-#
-# Other parameters:
-# Tp == Pin thickness (z dimension)
+# FC3DM_CopyObjectForExport()
+#	Function to copy an object to the temporary export document used by
+# FC3DM_PrepareStepExport(), applying its recorded color.  Links are
+# copied as links to a (single) copy of their linked object, so that pin
+# instances stay instances in the STEP file.  copies maps names of
+# objects already copied to their copies.
 ###################################################################
-def FC3DM_CreateIcPinEp(App, Gui,
-                        parms,
-                        length, width, x, y,
-                        epName,
-                        pinType,
-                        docName):
-                
-    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPinEp()")
+def FC3DM_CopyObjectForExport(App, Gui,
+                              docName, exportDoc, obj, copies):
 
-    # Assume that the EP does not have rounded corners
-    roundedCorners = False
+    # See if we already copied this object
+    if (obj.Name in copies):
+        return copies[obj.Name]
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    Tp = parms["Tp"]
-    bodyName = parms["bodyName"]
-    Ft = parms["Ft"] #pkgDimsEpChamfer
-    Rt = parms["Rt"] #pkgDimsEpCornerRadius
-    
-    if ("epPin1ChamferRadius" in parms):
-        epPin1ChamferRadius = parms["epPin1ChamferRadius"]
-    else:
-        epPin1ChamferRadius = 0.0
+    if (obj.TypeId == "App::Link"):
+        linkedCopy = FC3DM_CopyObjectForExport(App, Gui,
+                                               docName, exportDoc, obj.LinkedObject, copies)
+        exportObj = exportDoc.addObject("App::Link", obj.Name)
+        exportObj.LinkedObject = linkedCopy
+        exportObj.Placement = obj.Placement
 
-	# If there are different types of EPs in this component, extract the parameters from parms
-    if (pinType.startswith("Type")):
-        Ft = parms[pinType + "_Ft"]
-        Rt = parms[pinType + "_Rt"]
-        epPin1ChamferRadius = parms[pinType + "_epPin1ChamferRadius"]
+    else:
+        exportObj = exportDoc.addObject("Part::Feature", obj.Name)
+        exportObj.Shape = obj.Shape
 
-    FC3DM_WriteToDebugFile("Ep length: " + str(length))
-    FC3DM_WriteToDebugFile("Ep width: " + str(width))
-    FC3DM_WriteToDebugFile("Ep chamfer: " + str(Ft))
-    FC3DM_WriteToDebugFile("Ep corner radius: " + str(Rt))
-    FC3DM_WriteToDebugFile("Ep chamfer radius: " + str(epPin1ChamferRadius))
-    
-    # Prepare parameters for FC3DM_CreateBox()
-    FC3DM_WriteToDebugFile("Creating box for EP...")
-    L = length
-    W = width
-    xBox = (-1*(W/2) + x)
-    yBox = (-1*(L/2) + y)
-    H = Tp
-    K = 0.0
-    rotDeg = 0.0
-    FC3DM_CreateBox(App, Gui,
-                    W, L, H, K,
-                    xBox, yBox, rotDeg, 
-                    docName,
-                    epName)
+        color = FC3DM_GetObjectColor(App, Gui, docName, obj.Name)
+        if (color != None):
+            FC3DM_ApplyObjectColor(Gui.getDocument(exportDoc.Name).getObject(exportObj.Name), color)
 
-    if (Rt > 0.0):
-        FC3DM_WriteToDebugFile("About to fillet EP corners")
-        FC3DM_WriteToDebugFile("EP corner radius is: " + str(Rt))
-        
-        # Select the edges to be filleted. If there is not a pin 1 chamfer, we will
-        # fillet all the edges. Otherwise, we will fillet all the edges except for
-        # the pin 1 chamfer edge
-        if ((Ft > 0.0) or (epPin1ChamferRadius > 0.0)):
-            edges = ["Edge1", "Edge5", "Edge7"]
-        else:
-            edges = ["Edge1", "Edge3", "Edge5", "Edge7"]
+    exportObj.Label = obj.Label
+    copies[obj.Name] = exportObj
 
-        # Call FC3DM_FilletObjectEdges to actually do the filleting
-        FC3DM_FilletObjectEdges(App, Gui,
-                                docName, epName, edges, Rt)
-        
-        FC3DM_WriteToDebugFile("Back from FC3DM_FilletObjectEdges()")
+    return exportObj
 
-    # Sanity check: Ft and epPin1ChamferRadius cannot both be greater than 0.0
-    if ( (Ft > 0.0) and (epPin1ChamferRadius > 0.0) ):
-        FC3DM_WriteToDebugFile("Both Ft and epPin1ChamferRadius are greater than zero!")
-        FC3DM_MyExit(-1)
 
-    # See if we need to chamfer the pin 1 edge of the EP
-    if (Ft > 0.0) :
+###################################################################
+# FC3DM_CloseDocument()
+#	Function to close a FreeCAD document (if it is open), so that
+# a long-lived interpreter does not accumulate finished models.
+###################################################################
+def FC3DM_CloseDocument(App, Gui,
+                        docName):
 
-        FC3DM_WriteToDebugFile("About to chamfer EP")
-        FC3DM_WriteToDebugFile("Chamfer dimension is: " + str(Ft))
-        
-        # Select a priori the edge that needs to be chamfered (determined experimentally).
-        # The pin 1 chamfer edge is the same regardless of whether or not the EP corners
-        # were filleted. 
-        edges=["Edge3"]
-            
-        # Call FC3DM_ChamferObjectEdges() to actually do the chamfering
-        FC3DM_ChamferObjectEdges(App, Gui,
-                                 docName, epName, edges, Ft)
-        
-        FC3DM_WriteToDebugFile("Back from FC3DM_ChamferObjectEdges()")
+    # See if this document is actually open
+    if (docName in App.listDocuments()):
 
-    # If the EP has a rounded pin 1 chamfer, cut the EP with a cylinder of the specified radius
-    elif ( epPin1ChamferRadius > 0.0 ) :
+        App.closeDocument(docName)
 
-        FC3DM_WriteToDebugFile("About the chamfer EP using rounded chamfer")
-        FC3DM_WriteToDebugFile("epPin1ChamferRadius is: " + str(epPin1ChamferRadius))
-        
-        # Create a cylinder to use for cutting out for pin 1 marker
-        cylName = "Cutter"
-        FC3DM_CreateCylinderVert(App, Gui,
-                                 docName, cylName, x - (W/2.0), y + L/2.0, 0, epPin1ChamferRadius, Tp)
-        # FC3DM_WriteToDebugFile("Back from FC3DM_CreateCylinderVert()")
-        
-        FC3DM_CutWithSpecifiedObject(App, Gui,
-                                     docName, epName, cylName)
-        FC3DM_WriteToDebugFile("Back from FC3DM_CutWithSpecifiedObject()")
-    
-    # Zoom in on pin model
-    Gui.SendMsgToActiveView("ViewFit")
+    # Forget the colors and visibility that we recorded for this document's objects
+    for key in objectColors.keys():
+        if (key[0] == docName):
+            del objectColors[key]
 
-    # Color pin red.  FIXME--remove this!
-    FC3DM_WriteToDebugFile("Coloring the EP red")
-    Gui.getDocument(docName).getObject(epName).ShapeColor = (1.00,0.00,0.00)
+    for key in objectVisibility.keys():
+        if (key[0] == docName):
+            del objectVisibility[key]
+
+    for key in objectNodes.keys():
+        if (key[0] == docName):
+            del objectNodes[key]
+
+    if (docName in objectGraphs):
+        del objectGraphs[docName]
 
     return 0
 
 
 ###################################################################
-# FC3DM_CreateIcPins()
-#	Function to create all gullwing IC pins.
+# FC3DM_GenerateIcModel()
+#	Function to create, describe, fuse, save, and export the 3D model
+# of one IC, as described by one component-specific ini file.
+#
+# This is the body of FC3DM_IC.py, packaged so that the batch runner
+# can build many models within a single FreeCAD process.
+# iniFileName may be "" to use the pointer in FC3DM_global.ini, or name a
+# bundle record (eg. "lib.jsonl#12"), in which case record may be that
+# record, as read by FC3DM_ReadBundle().
+# The result dict is filled in with the names of the generated files,
+# the wall clock time of each stage, and a hash of the fused geometry.
+#
+# If modelCacheDir is set, a model whose parms and generator code are
+# unchanged since it was last built is copied out of the model cache
+# instead (see FC3DM_cache.py), and result["fromCache"] is set.
+# Either way, a manifest is written for FC3DM_preflight.py to check.
 ###################################################################
-def FC3DM_CreateIcPins(App, Gui,
-                       parms, pinNames,
-                       docName):
-                
-    FC3DM_WriteToDebugFile("Hello from FC3DM_CreateIcPins()")
+def FC3DM_GenerateIcModel(App, Gui,
+                          scriptPath, iniFileName,
+                          result, record=None):
+
+    # Record how long each stage takes
+    timings = {}
+    result["timings"] = timings
+    stageTime = time.time()
+
+    ## Read ini files to get all our parameters.
+    parms = {}
+
+    # Read both the global and component-specific ini files.
+    FC3DM_ReadIniFiles(scriptPath, parms, iniFileName, record)
+
+    # Compute our parm hash (also our model cache key), before anything below adds to parms
+    parms["modelCacheKey"] = FC3DM_ComputeModelCacheKey(scriptPath, parms)
+    modelCacheDir = FC3DM_GetModelCacheDir(scriptPath, parms)
+
+    # Open the debug file
+    FC3DM_OpenDebugFile(parms)
+    stageTime = FC3DM_RecordStageTime(timings, "readIniFiles", stageTime)
+
+    # See if we already built this very model
+    if (modelCacheDir != ""):
+        cached = FC3DM_FetchFromModelCache(modelCacheDir, parms["modelCacheKey"], parms)
+        stageTime = FC3DM_RecordStageTime(timings, "fetchFromModelCache", stageTime)
+
+        if (cached != None):
+            FC3DM_WriteToDebugFile("Model cache hit for key " + parms["modelCacheKey"] + ".  Copied files from model cache.", logInfo)
+
+            # Report the files that we copied out, and what we recorded when we built them
+            result.setdefault("iniFileName", parms["iniFileName"])
+            result["newModelName"] = parms["newModelName"]
+            result["docName"] = parms["docName"]
+            result["newModelPathNameExt"] = parms["newModelPathNameExt"]
+            result["newStepPathNameExt"] = parms["newStepPathNameExt"]
+            result["logFilePathNameExt"] = parms["logFilePathNameExt"]
+            result.update(cached)
+            result["fromCache"] = True
+
+            # Record what these files were built from
+            parms["fingerprint"] = result.get("fingerprint", "")
+            FC3DM_WriteModelManifest(parms, parms["modelCacheKey"])
+
+            # Save and close debug file.
+            FC3DM_CloseDebugFile()
+
+            return 0
+
+    # Start tracing this model, if we were asked to
+    if (parms.get("trace", 0) != 0):
+        FC3DM_StartTrace(parms["newModelPath"] + parms["newModelName"] + ".trace.json", parms["docName"])
+
+    # The FC3DM_FuseSetOfObjects() and FC3DM_DescribeObjectsToLogFile() functions expect a "pin1MarkName",
+    # which chip resistors don't have.  But they do have a "moldName", so trick it.
+    isChipResistor = (parms.get("compType", "") == "chipResistor")
+    if (isChipResistor):
+        parms["pin1MarkName"] = parms["moldName"]
 
     # Extract relevant parameter values from parms associative array
     # TODO:  Currently no error checking!
-    pinTemplateEast = parms["pinName"]
-    pinTemplateNorth = "pinTemplateNorth"
+    pin1MarkName = parms["pin1MarkName"]
     bodyName = parms["bodyName"]
-    footprintType = parms["footprintType"]
-    hasEp = parms["hasEp"]
-
-    # Retrieve EP parameters if needed
-    if (hasEp):
-        FC3DM_WriteToDebugFile("Footprint has an EP")
-        Tt = parms["Tt"] # pkgDimsEpLengthMax
-        Wt = parms["Wt"] # pkgDimsEpWidthMax
-        Ft = parms["Ft"] # pkgDimsEpChamfer
-        Rt = parms["Rt"] # pkgDimsEpCornerRad
+    docName = parms["docName"]
+
+    # Tell our caller what we are about to build, in case we abort part way through
+    # Keep any iniFileName that our caller put in result, since that is what it matches results on.
+    result.setdefault("iniFileName", parms["iniFileName"])
+    result["newModelName"] = parms["newModelName"]
+    result["docName"] = docName
+
+    # Build the model from document objects, unless the ini files ask for in-memory shapes
+    FC3DM_SetInMemoryShapes(parms.get("inMemoryShapes", 0) != 0,
+                            parms.get("deferredShapes", 1) != 0,
+                            parms.get("graphThreads", 1))
+
+    # A previous build of this very model may still be exporting
+    if (FC3DM_IsExportPending(docName)):
+        FC3DM_ReapExportJobs(App, Gui,
+                             True)
+
+    # Create new document
+    App.newDocument(docName)
+    FC3DM_ActivateDocument(App, Gui,
+                           docName)
+
+    ## Start creating the component model.
+    pinNames = list()
+
+    # Create chip resistor body, terminations, and overmold
+    if (isChipResistor):
+        FC3DM_CreateChipResistor(App, Gui,
+                                 parms, pinNames,
+                                 docName)
+        stageTime = FC3DM_RecordStageTime(timings, "createChipResistor", stageTime)
 
-    print("Hello from FC3DM_CreateIcPins()!")
+    else:
+        # Call CreateIcBody() to create the plastic molded IC body
+        FC3DM_CreateIcBody(App, Gui,
+                           parms,
+                           docName)
+        stageTime = FC3DM_RecordStageTime(timings, "createIcBody", stageTime)
+
+        # Create all IC gullwing pins
+        FC3DM_CreateIcPins(App, Gui,
+                           parms, pinNames,
+                           docName)
+        stageTime = FC3DM_RecordStageTime(timings, "createIcPins", stageTime)
+
+    # Evaluate all the shapes that we have built up so far, in one pass
+    FC3DM_EvaluateObjects(App, Gui,
+                          docName)
+    stageTime = FC3DM_RecordStageTime(timings, "evaluateObjects", stageTime)
+
+    # Describe all objects in this component to a logfile.
+    FC3DM_DescribeObjectsToLogFile(App, Gui,
+                                   parms, pinNames,
+                                   docName)
+    stageTime = FC3DM_RecordStageTime(timings, "describeObjectsToLogFile", stageTime)
+
+    # See if we are to export pins as instances of shared template pins, rather than
+    # fusing everything together.  This needs in-memory shapes and App::Link.
+    instancedPins = False
+    if (parms.get("instancedPins", 0) != 0):
+        if ( (inMemoryShapes) and ("App::Link" in App.getDocument(docName).supportedTypes()) ):
+            instancedPins = True
+        else:
+            FC3DM_WriteToDebugFile("Warning:  instancedPins needs in-memory shapes and App::Link.  Fusing pins instead.", logWarning)
+
+    # Export body, pin1Mark, and pins as separate objects, with the pins as instances
+    if (instancedPins):
+
+        FC3DM_SetObjectColor(App, Gui, docName, bodyName, parms["colorBody"])
+        FC3DM_SetObjectColor(App, Gui, docName, pin1MarkName, parms["colorPin1Mark"])
+        for pin in pinNames:
+            FC3DM_SetObjectColor(App, Gui, docName, pin, parms["colorPins"])
+
+        # Hash the finished geometry, so that callers can cheaply tell whether it changed
+        objNameList = [bodyName, pin1MarkName] + pinNames
+        shapes = []
+        for objName in objNameList:
+            shapes.append(FC3DM_GetObjectShape(App, Gui, docName, objName))
+        compound = Part.makeCompound(shapes)
+        result["geometryHash"] = FC3DM_ComputeShapeHash(compound)
+        result["faceCount"] = len(compound.Faces)
+
+        FC3DM_InstancePins(App, Gui,
+                           docName, pinNames)
+        stageTime = FC3DM_RecordStageTime(timings, "instancePins", stageTime)
+
+    # Else fuse all objects together & retain proper coloring
+    else:
+        objNameList = list(pinNames)
+        objNameList.append(bodyName)
+        objNameList.append(pin1MarkName)
+        fusionName = docName
+        FC3DM_FuseSetOfObjects(App, Gui,
+                               parms,
+                               docName, objNameList, fusionName)
+
+        # Zoom in
+        App.ActiveDocument.recompute()
+        FC3DM_ViewFit(App, Gui)
+        stageTime = FC3DM_RecordStageTime(timings, "fuseSetOfObjects", stageTime)
+
+        # Hash the finished geometry, so that callers can cheaply tell whether it changed
+        result["geometryHash"] = FC3DM_ComputeGeometryHash(App, Gui,
+                                                           docName, fusionName)
+        result["faceCount"] = len(FC3DM_GetObjectShape(App, Gui, docName, fusionName).Faces)
+        objNameList = [fusionName]
+
+    ## Save file to native format and export to STEP.  This also stores the model
+    # in the model cache, and writes its manifest for FC3DM_preflight.py.
+    FC3DM_SaveAndExport(App, Gui,
+                        docName,
+                        parms,
+                        objNameList,
+                        result,
+                        modelCacheDir)
+    stageTime = FC3DM_RecordStageTime(timings, "saveAndExport", stageTime)
 
-    ## Call the appropriate function to create the prototype IC pin
-    # Handle Gullwing ICs        
-    if ( (footprintType == "SOP") or (footprintType == "SOIC") or (footprintType == "SOT") or (footprintType == "QFP") ):
+    # Report the files that we generated
+    result["newModelPathNameExt"] = parms["newModelPathNameExt"]
+    result["newStepPathNameExt"] = parms["newStepPathNameExt"]
+    result["logFilePathNameExt"] = parms["logFilePathNameExt"]
+    result["fingerprint"] = parms["fingerprint"]
 
-        # Call CreateIcPin() to create template east side Gullwing IC pin
-        FC3DM_CreateIcPinGullwing(App, Gui,
-                                  parms,
-                                  docName)
+    # Write out the trace, if any
+    FC3DM_StopTrace()
 
-    # Handle QFN ICs        
-    elif (footprintType == "QFN"):
+    # Save and close debug file.
+    FC3DM_CloseDebugFile()
 
-        # Call CreateIcPinQfn() to create template east side and north side QFN IC pins
-        FC3DM_CreateIcPinQfn(App, Gui,
-                             parms,
-                             docName)
+    return 0
 
-    # Else unsupported!
-    else:
-        print("Unsupported footprintType " + footprintType)
-        FC3DM_WriteToDebugFile("Abort message: Footprint type is unsupported!")
-        FC3DM_MyExit(-1)
 
-    FC3DM_WriteToDebugFile("Back from creating template IC pin")
-    print("Back from creating template IC pin.")
+###################################################################
+# FC3DM_GenerateIcModelsInBatch()
+#	Function to create the 3D models for a list of component-specific
+# ini files, all within this one FreeCAD process.
+#
+# The list may also name bundles, or ranges of their records (see
+# FC3DM_SplitBundleSource()).  Their records are streamed, one at a time,
+# straight into the generator.
+# Each model's document is closed when we are done with it.  One result
+# dict per model is appended to results (see FC3DM_GenerateIcModelSafely()).
+###################################################################
+def FC3DM_GenerateIcModelsInBatch(App, Gui,
+                                  scriptPath, iniFileNames,
+                                  results):
+
+    # Without a GUI, write each model's STEP file while we build the next one
+    if (Gui == None):
+        FC3DM_StartExportThread()
+
+    # Loop over all the ini files that we were given
+    for iniFileName in iniFileNames:
+
+        # See if this is a bundle
+        bundle = FC3DM_SplitBundleSource(iniFileName)
+        if (bundle == None):
+            result = {}
+            FC3DM_GenerateIcModelSafely(App, Gui,
+                                        scriptPath, iniFileName,
+                                        result)
+            results.append(result)
+            continue
+
+        # Build a model from each of its records.  A relative bundle name is relative to scriptPath.
+        (bundleFileName, firstRecordNum, lastRecordNum) = bundle
+        bundlePath = bundleFileName
+        if (not os.path.isabs(bundlePath)):
+            bundlePath = os.path.join(scriptPath, bundlePath)
 
+        try:
+            for (recordNum, record) in FC3DM_ReadBundle(bundlePath, firstRecordNum, lastRecordNum):
+                result = {}
+                FC3DM_GenerateIcModelSafely(App, Gui,
+                                            scriptPath, bundleFileName + "#" + str(recordNum),
+                                            result, record)
+                results.append(result)
 
-    # Configure active document
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+        # We can't read (the rest of) this bundle
+        except (IOError, FC3DM_IniError) as e:
+            results.append({"iniFileName" : iniFileName,
+                            "rc" : -1,
+                            "seconds" : 0.0,
+                            "message" : "Can't read bundle:  " + str(e).replace("\n", " ")})
 
-    # Loop over all the entries in the parms array
-    for parm in parms:
+    # end loop over all the ini files
 
-        print("Examining parm " + parm + ".")
+    # Wait for the last STEP files to be written
+    FC3DM_StopExportThread(App, Gui)
 
-        # See if this parm is a pin definition
-        if parm.startswith("Pin"):
+    return 0
 
-            # Add this pin to the pinNames list.
-            print("Found pin named " + parm + ".")
-            pinNames.append(parm)
 
-    # end loop over all the entries in the parms array
+###################################################################
+# FC3DM_GenerateIcModelSafely()
+#	Function to call FC3DM_GenerateIcModel() for one ini file, without
+# letting a failure take down our long-lived FreeCAD process.
+#
+# A failure (or FC3DM_MyExit() abort) while building the model is
+# recorded in result, with "rc", "seconds", and "message" filled in.
+# The model's document is closed when we are done with it.
+# Returns the rc.
+###################################################################
+def FC3DM_GenerateIcModelSafely(App, Gui,
+                                scriptPath, iniFileName,
+                                result, record=None):
 
-    # Sort the list of pinNames, using our custom pin name sort function.
-    pinNames.sort(FC3DM_SortPinNames)
+    print("About to generate model for ini file :" + iniFileName + ":")
 
-    print("pinNames is:")
-    print(pinNames)
+    # Start the clock for this model
+    result["iniFileName"] = iniFileName
+    startTime = time.time()
 
-    FC3DM_WriteToDebugFile("Examining pin types")
-    # Loop over all the pin names.
-    for pin in pinNames:
+    # Attempt to create this model.
+    try:
+        FC3DM_GenerateIcModel(App, Gui,
+                              scriptPath, iniFileName,
+                              result, record)
+        result["rc"] = 0
+        result["message"] = "OK"
 
-        # Split the pin definition string on ',' chars.
-        # Format is "type, side, x, y"
-        lis = []
-        lis = parms[pin].rsplit(",")
+    # FC3DM_MyExit() was called to abort this model.  The reason is in the debug file.
+    except SystemExit as e:
+        result["rc"] = e.code
+        result["message"] = "Aborted.  See debug file for details."
 
-        # Sanity check that we have exactly 4 fields in the list
-        if (len(lis) != 4):
-            print("Expected to find 4 fields in pin description.  Actually saw " + str(len(lis)) + "!")
-            FC3DM_WriteToDebugFile("Abort message: Expected to find 4 fields in pin description.  Actually saw " + str(len(lis)) + "!")
-            FC3DM_MyExit(-1)
+    # Else something we didn't anticipate went wrong.
+    except Exception as e:
+        result["rc"] = -1
+        result["message"] = "Exception: " + str(e).replace("\n", " ")
+        traceback.print_exc()
 
-        print("Found pin named " + pin + ", lis is:")
-        print(lis)
+    # Record how long this model took, and how much memory this process has needed so far
+    result["seconds"] = time.time() - startTime
+    peakRssBytes = FC3DM_GetPeakRssBytes()
+    if (peakRssBytes != None):
+        result["peakRssBytes"] = peakRssBytes
 
-        ## Examine pin type
-        if ( (lis[0] == "Gullwing") or (lis[0] == "QFN") ):
+    # Close this model's document, whether or not we succeeded.  If it is still
+    # being exported, it is closed once it has been (see FC3DM_ReapExportJobs()).
+    if ( ("docName" in result) and (not FC3DM_IsExportPending(result["docName"])) ):
+        FC3DM_CloseDocument(App, Gui,
+                            result["docName"])
 
-            ## Get pin x coordinate
-            x = float(lis[2])
+    # Close the documents of models that have since been exported
+    FC3DM_ReapExportJobs(App, Gui,
+                         False)
 
-            ## Get pin y coordinate
-            y = float(lis[3])
+    print("Done with ini file :" + iniFileName + ":, rc is " + str(result["rc"]) + ", " + result["message"])
 
-            ## Examine pin side
-            # Look for an east side pin.
-            if (lis[1] == "East"):
-                FC3DM_WriteToDebugFile("Found east pin")
-                # Our template pin was created on the east side, so no rotation required.
-                rotDeg = 0.0
+    return result["rc"]
 
-                # Currently we're ignoring this datum from the ini file.
-                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
-                x = 0.0
 
-                ## Copy template pin to the commanded location
-                FC3DM_CopyObject(App, Gui,
-                                 x, y, rotDeg,
-                                 docName,
-                                 pinTemplateEast,
-                                 pin)
-                
-            # Else see if this is a west side pin.
-            elif (lis[1] == "West"):
+###################################################################
+# FC3DM_RecordStageTime()
+#	Function to record the wall clock time since stageStartTime under
+# stageName in the timings dict.  Returns the current time, which is
+# the start time of the next stage.
+###################################################################
+def FC3DM_RecordStageTime(timings, stageName, stageStartTime):
 
-                FC3DM_WriteToDebugFile("Found west pin")
-                # Our template pin was created on the east side, so rotate 180 degrees
-                rotDeg = 180.0
+    now = time.time()
+    timings[stageName] = now - stageStartTime
+    FC3DM_AddTraceSpan(stageName, "stage", stageStartTime, now)
 
-                # Currently we're ignoring this datum from the ini file.
-                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
-                x = 0.0
+    return now
 
-                ## Copy template pin to the commanded location
-                FC3DM_CopyObject(App, Gui,
-                                 x, y, rotDeg,
-                                 docName,
-                                 pinTemplateEast,
-                                 pin)
-                
-            # Else see if this is a north side pin.
-            elif (lis[1] == "North"):
 
-                FC3DM_WriteToDebugFile("Found north pin")
-                # Our template pin was created on the north side, so no rotation
-                rotDeg = 0.0
+###################################################################
+# FC3DM_GetPeakRssBytes()
+#	Function to get the peak resident set size (peak working set, on
+# Windows) of this process, in bytes.  Returns None if we can't tell.
+###################################################################
+def FC3DM_GetPeakRssBytes():
 
-                # Currently we're ignoring this datum from the ini file.
-                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
-                y = 0.0
+    # Unix.  ru_maxrss is in kB on Linux, but in bytes on Mac OS X.
+    try:
+        import resource
+        maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if (sys.platform == "darwin"):
+            return maxRss
+        return maxRss * 1024
+    except ImportError:
+        pass
+
+    # Windows
+    try:
+        import ctypes
+        import ctypes.wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", ctypes.wintypes.DWORD),
+                        ("PageFaultCount", ctypes.wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if (ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                     ctypes.byref(counters), counters.cb)):
+            return counters.PeakWorkingSetSize
+    except Exception:
+        pass
+
+    return None
 
-                ## Copy template pin to the commanded location
-                FC3DM_CopyObject(App, Gui,
-                                 x, y, rotDeg,
-                                 docName,
-                                 pinTemplateNorth,
-                                 pin)
-                
-            # Else see if this is a south side pin.
-            elif (lis[1] == "South"):
 
-                FC3DM_WriteToDebugFile("Found south pin")
-                # Our template pin was created on the south side, so rotate 180 degrees!
-                rotDeg = 180.0
+###################################################################
+# FC3DM_WriteBatchReport()
+#	Function to write one status line per model to a batch report file.
+###################################################################
+def FC3DM_WriteBatchReport(reportFilePath,
+                           results):
 
-                # Currently we're ignoring this datum from the ini file.
-                # TODO:  Revisit this for QFNs, QFPs, BGAs, etc.!
-                y = 0.0
+    ## Open the report file
+    fileP = open(reportFilePath, 'w')
 
-                ## Copy template pin to the commanded location
-                FC3DM_CopyObject(App, Gui,
-                                 x, y, rotDeg,
-                                 docName,
-                                 pinTemplateNorth,
-                                 pin)
-                
-            # Else unsupported!
-            else:
-                print("Unsupported pin side " + lis[1])
-                FC3DM_WriteToDebugFile("Abort message: Pin side was not north, south, east or west. Current pin side is unsupported")
-                FC3DM_MyExit(-1)
+    # Write one line per model.  Format is "rc seconds iniFileName message".
+    numFailed = 0
+    for result in results:
 
-            ## For certain package types, we need to cut the pin out of the body
-            if (lis[0] == "QFN"):
-                FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
-                                                   docName, bodyName, pin)
+        if (result["rc"] != 0):
+            numFailed = numFailed + 1
 
-        # endif is gullwing or QFN
+        fileP.write("%4s %8.2f %s %s\n" % (str(result["rc"]), result["seconds"], result["iniFileName"], result["message"]))
 
-        # Handle EP pin type
-        elif (lis[1] == "Ep"):
+    # Write a summary line
+    fileP.write("Generated " + str(len(results) - numFailed) + " of " + str(len(results)) + " models.\n")
 
-            ## Get pin x & y coordinates
-            x = float(lis[2])
-            y = float(lis[3])
+    # Close the report file
+    fileP.close()
 
-            # Set the name of the EP to whatever was used in the ini file
-            epName = pin
-			# If there are different types of EPs, handle them as defined in the ini file
-            if (lis[0].startswith("Type")):
+    return numFailed
 
-                # Pull the length and width of the split EP from parms
-                # Note: There should never be situations where parms["Tt"] and parms["TypeEP?_Tt"] are used. Currently no check for this. 
-                Tt = parms[lis[0] + "_Tt"]
-                Wt = parms[lis[0] + "_Wt"]
 
-                # Set the pin type to whatever was used in the ini file
-                pinType = lis[0]
-			
-			# Otherwise, proceed as usual (using Tt, Wt, Ft, and Rt) as defined in the ini file
-            else:
+###################################################################
+# FC3DM_WriteBatchResults()
+#	Function to write the per-model result dicts to a JSON result file,
+# for the benefit of FC3DM_parallel.py.
+###################################################################
+def FC3DM_WriteBatchResults(resultFilePath,
+                            results):
 
-                # Set the pin type to whatever was used in the ini file
-                pinType = lis[0]
-                
-            # Call FC3DM_CreateIcPinEp() to create EP pin from scratch
-            FC3DM_CreateIcPinEp(App, Gui, 
-								parms,
-                                Tt, Wt, x, y,
-                                epName,
-                                pinType,
-                                docName)
+    ## Open the result file
+    fileP = open(resultFilePath, 'w')
 
-            # Cut the body with the EP pin and keep both
-            FC3DM_CutObjectWithToolAndKeepTool(App, Gui,
-                                               docName, bodyName, epName)
+    # Dump all results
+    json.dump(results, fileP, indent=1, sort_keys=True)
 
+    # Close the result file
+    fileP.close()
 
-        # Else unknown pin type.  Abort
-        else:
-            print("Unsupported pin type " + lis[0])
-            FC3DM_WriteToDebugFile("Abort message: Pin type is unsupported")
-            FC3DM_MyExit(-1)
+    return 0
 
 
-    # end loop over all the pin names.
+###################################################################
+# FC3DM_SetWorkDir()
+#	Function to give this FreeCAD process its own work directory.
+# When set, our debug file and python.rc go there rather than next to
+# the model and into the macros directory.  This is what allows several
+# FreeCAD processes to generate models at the same time.
+###################################################################
+def FC3DM_SetWorkDir(workDir):
 
-    # Remove the pin template object(s)
-    App.getDocument(docName).removeObject(pinTemplateEast)
+    # Store to global variable
+    global workDirUtils
+    workDirUtils = workDir
 
-    if ( (footprintType == "QFN") or (footprintType == "QFP") ):
-        App.getDocument(docName).removeObject(pinTemplateNorth)
+    # Make sure that it exists
+    if ( (workDir != "") and (not os.path.isdir(workDir)) ):
+        os.makedirs(workDir)
 
     return 0
 
 
 ###################################################################
-# FC3DM_CopyObject()
-#	Function to copy a FreeCAD object, then translate in x,y
-# and rotate in z.
+# FC3DM_GetTracedShapes()
+#	Function to get the shapes of objects, for the trace.  Objects that
+# don't exist yet, or that are in memory but not evaluated yet, are skipped.
+# We don't evaluate them here, since that would change what we're timing.
 ###################################################################
-def FC3DM_CopyObject(App, Gui,
-                     x, y, rotDeg,
-                     docName,
-                     objName,
-                     newObjName):
-    
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
+def FC3DM_GetTracedShapes(App, Gui,
+                          docName, objNames):
 
-    # Copy the object
-    newTermShape = FreeCAD.getDocument(docName).getObject(objName).Shape.copy()
-    newTermObj = App.activeDocument().addObject("Part::Feature",newObjName)
-    newTermObj.Shape = newTermShape
+    shapes = []
+    for objName in objNames:
 
-    # Translate the copy in x,y and rotate about the z axis as needed.
-    FC3DM_TranslateObjectAndRotateAboutZ(App, Gui,
-                                         docName, newObjName,
-                                         x, y, rotDeg)
+        # See if this object lives in memory
+        if ((docName, objName) in objectNodes):
+            values = FC3DM_GetObjectGraph(docName)["values"]
+            if (objectNodes[(docName, objName)] in values):
+                shapes.append(values[objectNodes[(docName, objName)]])
 
-    # Copy the original object's color to the new object
-    Color = Gui.getDocument(docName).getObject(objName).ShapeColor
-    Gui.getDocument(docName).getObject(newObjName).ShapeColor = Color
-    
-    return 0
+        elif (docName in App.listDocuments()):
+            obj = App.getDocument(docName).getObject(objName)
+            if ( (obj != None) and (hasattr(obj, "Shape")) ):
+                shapes.append(obj.Shape)
+
+    return shapes
 
 
 ###################################################################
-# FC3DM_SaveAndExport()
-#	Function to save a FreeCAD native CAD file, as well as export
-# the specified objects to a STEP file.
+# FC3DM_TraceObjects()
+#	Function to make a getShapes function for FC3DM_TraceFunction(),
+# for a function that takes App, Gui, and docName at position docArg.
+# getNames(args) gives the names of the objects to count before the call,
+# and getNamesAfter(args), if given, those to count after it.
 ###################################################################
-def FC3DM_SaveAndExport(App, Gui,
-                        docName,
-                        parms,
-                        objNameList):
+def FC3DM_TraceObjects(docArg, getNames,
+                       getNamesAfter=None):
 
-    FC3DM_WriteToDebugFile("Hello from FC3DM_SaveAndExport()")
+    def getShapes(args, result):
+        if ( (result != None) and (getNamesAfter != None) ):
+            return FC3DM_GetTracedShapes(args[0], args[1], args[docArg], getNamesAfter(args))
+        return FC3DM_GetTracedShapes(args[0], args[1], args[docArg], getNames(args))
 
-    # Extract relevant parameter values from parms associative array
-    # TODO:  Currently no error checking!
-    newModelPathNameExt = parms["newModelPathNameExt"]
-    newStepPathNameExt = parms["newStepPathNameExt"]
+    return getShapes
 
-    ## Save to disk in native format
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    App.getDocument(docName).FileName = newModelPathNameExt
-    App.getDocument(docName).Label = docName
-    Gui.SendMsgToActiveView("Save")
-    App.getDocument(docName).save()
-    
-    ## Export to STEP
-    App.ActiveDocument=None
-    Gui.ActiveDocument=None
-    App.setActiveDocument(docName)
-    App.ActiveDocument=App.getDocument(docName)
-    Gui.ActiveDocument=Gui.getDocument(docName)
-    App.getDocument(docName).save()
 
-    # Create list of objects, starting with object names
-    objs=[]
-    for i in objNameList:
-        
-        objs.append(FreeCAD.getDocument(docName).getObject(i))
+###################################################################
+# FC3DM_TraceFunctions()
+#	Function to wrap our slow functions, so that they are recorded in
+# the trace when we are tracing.  See FC3DM_trace.py.
+###################################################################
+def FC3DM_TraceFunctions():
+
+    module = sys.modules[__name__]
+
+    # Stages of building a model
+    FC3DM_TraceFunction(module, "FC3DM_CreateIcBody", "stage",
+                        FC3DM_TraceObjects(3, lambda args: [args[2]["bodyName"]]))
+    FC3DM_TraceFunction(module, "FC3DM_CreateIcPins", "stage",
+                        FC3DM_TraceObjects(4, lambda args: args[3]))
+    FC3DM_TraceFunction(module, "FC3DM_EvaluateObjects", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_DescribeObjectsToLogFile", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_FuseSetOfObjects", "stage",
+                        FC3DM_TraceObjects(3, lambda args: args[4], lambda args: [args[5]]))
+    FC3DM_TraceFunction(module, "FC3DM_InstancePins", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_SaveAndExport", "stage",
+                        FC3DM_TraceObjects(2, lambda args: args[4]))
+    FC3DM_TraceFunction(module, "FC3DM_MaterializeObjects", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_PrepareStepExport", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_RunExportJob", "stage")
+    FC3DM_TraceFunction(module, "FC3DM_WriteStepFile", "stage")
+
+    # Cut, fillet, and fuse helpers, which all change the object at args[3]
+    for funcName in ["FC3DM_FinishObjectEdges", "FC3DM_FuseObjects",
+                     "FC3DM_CutWithSpecifiedObject", "FC3DM_CutWithFilletedBox",
+                     "FC3DM_CutObjectWithToolAndKeepTool", "FC3DM_CutObjectWithToolsAndKeepTools"]:
+        FC3DM_TraceFunction(module, funcName, "helper",
+                            FC3DM_TraceObjects(2, lambda args: [args[3]]))
+
+    # In-memory operations, which are actually done when the graph is evaluated
+    FC3DM_TraceFunction(FC3DM_graph, "FC3DM_EvaluateGraphNode", "graph",
+                        FC3DM_TraceGraphNode, lambda args: args[1]["nodes"][args[2]]["op"])
 
-    # Do export to STEP
-    import ImportGui
-    ImportGui.export(objs,newStepPathNameExt)
-    del objs
-    
     return 0
 
 
+###################################################################
+# FC3DM_TraceGraphNode()
+#	Function to get the shapes of a graph node evaluation for the trace:
+# its inputs before, and its result after.
+###################################################################
+def FC3DM_TraceGraphNode(args, result):
+
+    if (result != None):
+        return [result]
+
+    graph = args[1]
+    shapes = []
+    for inputId in graph["nodes"][args[2]]["inputs"]:
+        shapes.append(graph["values"][inputId])
+
+    return shapes
+
+
 ###################################################################
 # FC3DM_MyExit()
 #	Function to write our return code to "rc file" and then exit.
 ###################################################################
 def FC3DM_MyExit(rc):    
 
-    ## Open the rc file
-    fileP = open(scriptPathUtils + '\\python.rc', 'w')
+    # Write out any trace and buffered debug messages
+    FC3DM_StopTrace()
+    FC3DM_CloseDebugFile()
+
+    ## Open the rc file.  Use our private work directory if we have one.
+    if (workDirUtils != ""):
+        fileP = open(os.path.join(workDirUtils, 'python.rc'), 'w')
+    else:
+        fileP = open(os.path.join(scriptPathUtils, 'python.rc'), 'w')
 
     # Write return code to file
     fileP.write(str(rc))
@@ -2283,3 +4221,6 @@ def FC3DM_MyExit(rc):
 
     return 0
 
+
+# Wrap our slow functions for tracing.  This costs almost nothing when we're not tracing.
+FC3DM_TraceFunctions()
@@ -0,0 +1,110 @@
+#================================================================================================
+#
+#	@file			test_FC3DM_bundle.py
+#
+#	@brief			Unit tests for reading bundles of FC3DM models, without needing FreeCAD.
+#
+#	@details		Run from this directory as:  python -m unittest test_FC3DM_bundle
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#
+#	See also included file SPI_License.txt.
+#================================================================================================
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from FC3DM_ini import *
+
+
+class FC3DM_SplitBundleSourceTests(unittest.TestCase):
+
+    def test_ini_file(self):
+        self.assertEqual(FC3DM_SplitBundleSource("foo.ini"), None)
+        self.assertEqual(FC3DM_SplitBundleSource("..\\Resistor_chip\\foo.ini"), None)
+
+    def test_whole_bundle(self):
+        self.assertEqual(FC3DM_SplitBundleSource("lib.jsonl"), ("lib.jsonl", 1, None))
+        self.assertEqual(FC3DM_SplitBundleSource("lib.CSV"), ("lib.CSV", 1, None))
+
+    def test_one_record(self):
+        self.assertEqual(FC3DM_SplitBundleSource("lib.jsonl#12"), ("lib.jsonl", 12, 12))
+
+    def test_range(self):
+        self.assertEqual(FC3DM_SplitBundleSource("lib.jsonl#1-100"), ("lib.jsonl", 1, 100))
+        self.assertEqual(FC3DM_SplitBundleSource("dir/lib.csv#3-4"), ("dir/lib.csv", 3, 4))
+
+    def test_bad_range(self):
+        for source in ["lib.jsonl#", "lib.jsonl#a", "lib.jsonl#1-", "lib.jsonl#-3", "lib.jsonl#1-b",
+                       "lib.jsonl#0", "lib.jsonl#3-1"]:
+            self.assertRaises(FC3DM_IniError, FC3DM_SplitBundleSource, source)
+
+
+class FC3DM_ReadBundleTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, True)
+
+    def writeBundle(self, fileName, text):
+        bundleFileName = os.path.join(self.tempDir, fileName)
+        fileP = open(bundleFileName, "w")
+        fileP.write(text)
+        fileP.close()
+        return bundleFileName
+
+    def writeJsonlBundle(self):
+        return self.writeBundle("lib.jsonl",
+                                '# Models\n{"newModelName" : "A"}\n\n{"newModelName" : "B"}\n'
+                                '# More models\n{"newModelName" : "C"}\n{"newModelName" : "D"}\n')
+
+    def getNames(self, bundleFileName, firstRecordNum=1, lastRecordNum=None):
+        return [(recordNum, FC3DM_ParseBundleRecord(record)["newModelName"])
+                for (recordNum, record) in FC3DM_ReadBundle(bundleFileName, firstRecordNum, lastRecordNum)]
+
+    def test_jsonl_skips_blanks_and_comments(self):
+        self.assertEqual(self.getNames(self.writeJsonlBundle()), [(1, "A"), (2, "B"), (3, "C"), (4, "D")])
+
+    def test_jsonl_ranges(self):
+        bundleFileName = self.writeJsonlBundle()
+        self.assertEqual(self.getNames(bundleFileName, 2, 3), [(2, "B"), (3, "C")])
+        self.assertEqual(self.getNames(bundleFileName, 4, 4), [(4, "D")])
+        self.assertEqual(self.getNames(bundleFileName, 3), [(3, "C"), (4, "D")])
+        self.assertEqual(self.getNames(bundleFileName, 5), [])
+
+    def test_csv_ranges(self):
+        bundleFileName = self.writeBundle("lib.csv",
+                                          "newModelName,L,Pin1\nA,6.4,\"Gullwing,West,-3.3,2.925\"\n,,\nB,5,\nC,4.9,\n")
+        self.assertEqual(self.getNames(bundleFileName), [(1, "A"), (2, "B"), (3, "C")])
+        self.assertEqual(self.getNames(bundleFileName, 2, 2), [(2, "B")])
+
+        records = list(FC3DM_ReadBundle(bundleFileName, 1, 1))
+        self.assertEqual(FC3DM_ParseBundleRecord(records[0][1]),
+                         {"newModelName" : "A", "L" : 6.4, "Pin1" : "Gullwing,West,-3.3,2.925"})
+
+    def test_bad_record_says_where(self):
+        bundleFileName = self.writeBundle("lib.jsonl", '{"newModelName" : "A"}\n{"L" : "long"}\n')
+        records = list(FC3DM_ReadBundle(bundleFileName))
+        self.assertEqual(len(records), 2)
+        try:
+            FC3DM_ParseBundleRecord(records[1][1])
+            self.fail("Expected FC3DM_IniError")
+        except FC3DM_IniError as e:
+            self.assertTrue("record 2" in str(e))
+
+    def test_missing_bundle(self):
+        self.assertRaises(FC3DM_IniError, list, FC3DM_ReadBundle(os.path.join(self.tempDir, "missing.jsonl")))
+
+    def test_expand_model_sources(self):
+        bundleFileName = self.writeJsonlBundle()
+        self.assertEqual(FC3DM_ExpandModelSources(["a.ini", bundleFileName + "#2-3", bundleFileName + "#4"]),
+                         ["a.ini", bundleFileName + "#2", bundleFileName + "#3", bundleFileName + "#4"])
+        self.assertEqual(len(FC3DM_ExpandModelSources([bundleFileName])), 4)
+
+
+if (__name__ == "__main__"):
+    unittest.main()
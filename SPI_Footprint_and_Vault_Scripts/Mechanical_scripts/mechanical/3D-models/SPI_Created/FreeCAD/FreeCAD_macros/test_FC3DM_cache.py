@@ -0,0 +1,273 @@
+#================================================================================================
+#
+#	@file			test_FC3DM_cache.py
+#
+#	@brief			Unit tests for the FC3DM model cache, without needing FreeCAD.
+#
+#	@details		Run from this directory as:  python -m unittest test_FC3DM_cache
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#
+#	See also included file SPI_License.txt.
+#================================================================================================
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from FC3DM_ini import *
+from FC3DM_cache import *
+
+# Component-specific ini file of a small gullwing model
+testIniText = """newModelPathRel = "models/"
+newModelName = "SOP65P640X120-4N"
+stepSuffix = "_TRT1"
+stepExt = ".step"
+bodyName = "Body"
+pinName = "Pin"
+pin1MarkName = "Pin1Mark"
+L = 6.4
+T = 0.6
+W = 0.3
+A = 5.0
+B = 4.4
+H = 1.2
+K = 0.05
+Tp = 0.15
+Fr = 0.1
+Hpe = 0.2
+maDeg = 12
+Hpph = 0.5
+Hppl = 0.5
+Frbody = 0.05
+P1markOffset = 0.5
+P1markRadius = 0.2
+P1markIndent = 0.01
+markHeight = 0.01
+Pin1 = Gullwing,West,-2.9,0.975
+Pin2 = Gullwing,West,-2.9,-0.975
+Pin3 = Gullwing,East,2.9,-0.975
+Pin4 = Gullwing,East,2.9,0.975
+"""
+
+
+###################################################################
+# FC3DM_MakeTestScriptDir()
+#	Function to make a script directory under tempDir, with the generator
+# code, a global ini file, and the component-specific ini file of a
+# small gullwing model.  Returns its path.
+###################################################################
+def FC3DM_MakeTestScriptDir(tempDir, name):
+
+    macrosPath = os.path.dirname(os.path.abspath(__file__))
+    scriptPath = os.path.join(tempDir, name, "FreeCAD_macros")
+    os.makedirs(os.path.join(tempDir, name, "parts"))
+    os.makedirs(scriptPath)
+
+    for fileName in modelCacheGeneratorFiles:
+        shutil.copyfile(os.path.join(macrosPath, fileName), os.path.join(scriptPath, fileName))
+
+    fileP = open(os.path.join(scriptPath, "FC3DM_global.ini"), "w")
+    fileP.write('iniFileName = "../parts/test.ini"\nmodelCacheDir = "cache"\ngraphThreads = 2\n')
+    fileP.close()
+
+    fileP = open(os.path.join(tempDir, name, "parts", "test.ini"), "w")
+    fileP.write(testIniText)
+    fileP.close()
+
+    return scriptPath
+
+
+###################################################################
+# FC3DM_ReadTestParms()
+#	Function to read the parms of the test model in scriptPath, from the
+# directory cwd, with overrides (see FC3DM_ParseParmOverrides()).
+###################################################################
+def FC3DM_ReadTestParms(scriptPath, cwd, overrides=""):
+
+    oldCwd = os.getcwd()
+    oldOverrides = os.environ.pop("FC3DM_PARMS", None)
+    os.environ["FC3DM_PARMS"] = overrides
+    try:
+        os.chdir(cwd)
+        parms = {}
+        FC3DM_ParseIniFiles(scriptPath, parms, verbose=False)
+    finally:
+        os.chdir(oldCwd)
+        del os.environ["FC3DM_PARMS"]
+        if (oldOverrides != None):
+            os.environ["FC3DM_PARMS"] = oldOverrides
+
+    return parms
+
+
+class FC3DM_ModelCacheKeyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.scriptPath = FC3DM_MakeTestScriptDir(self.tempDir, "tree")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, True)
+
+    def getKey(self, cwd=None, overrides="", scriptPath=None):
+        if (scriptPath == None):
+            scriptPath = self.scriptPath
+        if (cwd == None):
+            cwd = scriptPath
+        return FC3DM_ComputeModelCacheKey(scriptPath, FC3DM_ReadTestParms(scriptPath, cwd, overrides))
+
+    def test_key_does_not_depend_on_cwd(self):
+        self.assertEqual(self.getKey(self.scriptPath), self.getKey(self.tempDir))
+        self.assertEqual(self.getKey(self.scriptPath), self.getKey(os.path.dirname(self.scriptPath)))
+
+    def test_key_does_not_depend_on_where_the_tree_is(self):
+        movedScriptPath = FC3DM_MakeTestScriptDir(self.tempDir, "moved")
+        self.assertEqual(self.getKey(), self.getKey(scriptPath=movedScriptPath))
+
+    def test_key_lines_have_no_paths(self):
+        lines = FC3DM_GetModelCacheKeyLines(FC3DM_ReadTestParms(self.scriptPath, self.scriptPath))
+        for line in lines:
+            self.assertFalse(self.tempDir in line, line)
+            self.assertFalse("test.ini" in line, line)
+
+    def test_key_ignores_build_speed_and_revision(self):
+        key = self.getKey()
+        self.assertEqual(key, self.getKey(overrides="graphThreads = 8; debugLevel = \"Verbose\""))
+        self.assertEqual(key, self.getKey(overrides="stepSuffix = \"_TRT2\""))
+        self.assertEqual(key, self.getKey(overrides="L = 6.40"))
+
+    def test_key_depends_on_model(self):
+        key = self.getKey()
+        self.assertNotEqual(key, self.getKey(overrides="L = 6.5"))
+        self.assertNotEqual(key, self.getKey(overrides="colorBody = (0.2,0.2,0.2)"))
+        self.assertNotEqual(key, self.getKey(overrides="stepSuffix = \"_TRL1\""))
+
+    def test_key_depends_on_output_options(self):
+        key = self.getKey()
+        self.assertNotEqual(key, self.getKey(overrides="compressStep = 1"))
+        self.assertNotEqual(key, self.getKey(overrides="instancedPins = 1"))
+
+    def test_key_depends_on_body_builder(self):
+        key = self.getKey()
+        self.assertEqual(key, self.getKey(overrides="bodyBuilder = \"cuts\""))
+        self.assertNotEqual(key, self.getKey(overrides="bodyBuilder = \"loft\""))
+
+    def test_key_depends_on_pin_builder(self):
+        key = self.getKey()
+        self.assertEqual(key, self.getKey(overrides="pinBuilder = \"cuts\""))
+        self.assertNotEqual(key, self.getKey(overrides="pinBuilder = \"sweep\""))
+
+
+class FC3DM_ModelCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.cacheDir = os.path.join(self.tempDir, "cache")
+        self.modelDir = os.path.join(self.tempDir, "models")
+        os.makedirs(self.modelDir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, True)
+
+    def makeParms(self, newModelName, stepExt=".step"):
+        modelPath = os.path.join(self.modelDir, newModelName)
+        return {"newModelName" : newModelName,
+                "newModelPathNameExt" : modelPath + ".FCStd",
+                "newStepPathNameExt" : modelPath + "_TRT1" + stepExt,
+                "logFilePathNameExt" : modelPath + ".log",
+                "fingerprintFilePathNameExt" : modelPath + ".fingerprint"}
+
+    def buildModel(self, parms, text):
+        for (parmName, fileName) in modelCacheFiles:
+            fileP = open(parms[parmName], "w")
+            fileP.write(text + " " + fileName + "\n")
+            fileP.close()
+
+    def removeModel(self, parms):
+        for (parmName, fileName) in modelCacheFiles:
+            os.remove(parms[parmName])
+
+    def storeModel(self, key, newModelName, lastUsed):
+        parms = self.makeParms(newModelName)
+        self.buildModel(parms, newModelName)
+        FC3DM_StoreInModelCache(self.cacheDir, key, parms, {"fingerprint" : newModelName})
+        self.removeModel(parms)
+        entryFile = os.path.join(FC3DM_GetModelCacheEntryDir(self.cacheDir, key), "entry.json")
+        os.utime(entryFile, (lastUsed, lastUsed))
+
+    def test_store_and_fetch(self):
+        parms = self.makeParms("A")
+        self.buildModel(parms, "model A")
+        FC3DM_StoreInModelCache(self.cacheDir, "aa01", parms, {"fingerprint" : "abc"})
+        self.removeModel(parms)
+
+        self.assertEqual(FC3DM_FetchFromModelCache(self.cacheDir, "aa01", parms), {"fingerprint" : "abc"})
+        for (parmName, fileName) in modelCacheFiles:
+            fileP = open(parms[parmName], "r")
+            self.assertEqual(fileP.read(), "model A " + fileName + "\n")
+            fileP.close()
+
+    def test_miss(self):
+        self.assertEqual(FC3DM_FetchFromModelCache(self.cacheDir, "bb01", self.makeParms("A")), None)
+
+    def test_compressed_step_is_not_plain_step(self):
+        parms = self.makeParms("A")
+        self.buildModel(parms, "model A")
+        FC3DM_StoreInModelCache(self.cacheDir, "aa01", parms, {})
+
+        self.assertEqual(FC3DM_FetchFromModelCache(self.cacheDir, "aa01", self.makeParms("A", ".stpZ")), None)
+
+    def test_incomplete_entry_is_a_miss(self):
+        self.storeModel("aa01", "A", time.time())
+        os.remove(os.path.join(FC3DM_GetModelCacheEntryDir(self.cacheDir, "aa01"), "model.log"))
+
+        self.assertEqual(FC3DM_FetchFromModelCache(self.cacheDir, "aa01", self.makeParms("A")), None)
+
+    def test_prune_removes_least_recently_used(self):
+        now = time.time()
+        self.storeModel("aa01", "A", now - 300)
+        self.storeModel("bb01", "B", now - 200)
+        self.storeModel("cc01", "C", now - 100)
+
+        # Using A makes B the least recently used
+        self.assertNotEqual(FC3DM_FetchFromModelCache(self.cacheDir, "aa01", self.makeParms("A")), None)
+        self.assertEqual([entry["key"] for entry in FC3DM_ListModelCache(self.cacheDir)], ["bb01", "cc01", "aa01"])
+
+        totalBytes = sum([entry["bytes"] for entry in FC3DM_ListModelCache(self.cacheDir)])
+        self.assertEqual(FC3DM_PruneModelCache(self.cacheDir, totalBytes - 1), 1)
+        self.assertEqual([entry["key"] for entry in FC3DM_ListModelCache(self.cacheDir)], ["cc01", "aa01"])
+
+        self.assertEqual(FC3DM_PruneModelCache(self.cacheDir, 0), 2)
+        self.assertEqual(FC3DM_ListModelCache(self.cacheDir), [])
+
+    def test_prune_removes_stale_temporary_dirs(self):
+        os.makedirs(os.path.join(self.cacheDir, "tmp-1-1"))
+        os.makedirs(os.path.join(self.cacheDir, "tmp-1-2"))
+        os.utime(os.path.join(self.cacheDir, "tmp-1-1"), (time.time() - 7200, time.time() - 7200))
+
+        FC3DM_PruneModelCache(self.cacheDir, modelCacheDefaultMaxBytes)
+        self.assertEqual(sorted(os.listdir(self.cacheDir)), ["tmp-1-2"])
+
+    def test_verify(self):
+        self.storeModel("aa01", "A", time.time())
+        self.storeModel("bb01", "B", time.time())
+        self.assertEqual(FC3DM_VerifyModelCache(self.cacheDir, False), [])
+
+        # Same size, different contents
+        bEntryDir = FC3DM_GetModelCacheEntryDir(self.cacheDir, "bb01")
+        fileP = open(os.path.join(bEntryDir, "model.log"), "w")
+        fileP.write("B model.Log\n")
+        fileP.close()
+
+        self.assertEqual(FC3DM_VerifyModelCache(self.cacheDir, False), [bEntryDir])
+        self.assertTrue(os.path.isdir(bEntryDir))
+        self.assertEqual(FC3DM_VerifyModelCache(self.cacheDir, True), [bEntryDir])
+        self.assertFalse(os.path.isdir(bEntryDir))
+        self.assertEqual(FC3DM_VerifyModelCache(self.cacheDir, False), [])
+
+
+if (__name__ == "__main__"):
+    unittest.main()
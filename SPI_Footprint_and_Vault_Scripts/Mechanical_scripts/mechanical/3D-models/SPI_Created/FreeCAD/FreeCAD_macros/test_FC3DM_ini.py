@@ -0,0 +1,170 @@
+#================================================================================================
+#
+#	@file			test_FC3DM_ini.py
+#
+#	@brief			Unit tests for reading and checking FC3DM ini files, without needing FreeCAD.
+#
+#	@details		Run from this directory as:  python -m unittest test_FC3DM_ini
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#
+#	See also included file SPI_License.txt.
+#================================================================================================
+
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+
+from FC3DM_ini import *
+
+
+###################################################################
+# FC3DM_MakeGullwingParms()
+#	Function to make the parms of a small, valid gullwing model.
+###################################################################
+def FC3DM_MakeGullwingParms():
+
+    parms = {"iniFileName" : "test.ini", "newModelPathRel" : "models/",
+             "newModelName" : "SOP65P640X120-4N", "stepSuffix" : "_TRT1", "stepExt" : ".step",
+             "bodyName" : "Body", "pinName" : "Pin", "pin1MarkName" : "Pin1Mark"}
+    for name in iniFamilySchemas["gullwing"]["parms"]:
+        if (name not in parms):
+            parms[name] = 0.5
+    parms["Pin1"] = "Gullwing,West,-2.9,0.975"
+    parms["Pin2"] = "Gullwing,West,-2.9,-0.975"
+    parms["Pin3"] = "Gullwing,East,2.9,-0.975"
+    parms["Pin4"] = "Gullwing,East,2.9,0.975"
+
+    return parms
+
+
+class FC3DM_ParseIniValueTests(unittest.TestCase):
+
+    def test_typed_values(self):
+        self.assertEqual(FC3DM_ParseIniValue("L", "6.4", "test"), 6.4)
+        self.assertEqual(FC3DM_ParseIniValue("graphThreads", "4", "test"), 4)
+        self.assertEqual(FC3DM_ParseIniValue("bodyName", '"Body"', "test"), "Body")
+        self.assertEqual(FC3DM_ParseIniValue("colorBody", "(0.1,0.1,0.1)", "test"), (0.1, 0.1, 0.1))
+        self.assertEqual(FC3DM_ParseIniValue("batchIniFileNames", '["a.ini", "b.ini"]', "test"), ["a.ini", "b.ini"])
+
+    def test_unterminated_path(self):
+        self.assertEqual(FC3DM_ParseIniValue("newModelPath", '"C:\\models\\', "test"), "C:\\models\\")
+
+    def test_pin_rows(self):
+        self.assertEqual(FC3DM_ParseIniValue("Pin1", "Gullwing,West,-3.3,2.925", "test"), "Gullwing,West,-3.3,2.925")
+        self.assertEqual(FC3DM_ParseIniValue("Pin21", '"EP,Ep,0,0"', "test"), "EP,Ep,0,0")
+        self.assertRaises(FC3DM_IniError, FC3DM_ParseIniValue, "Pin1", "Gullwing,Up,0,0", "test")
+        self.assertRaises(FC3DM_IniError, FC3DM_ParseIniValue, "Pin1", "Gullwing,West,0", "test")
+
+    def test_bad_values(self):
+        self.assertRaises(FC3DM_IniError, FC3DM_ParseIniValue, "L", "six", "test")
+        self.assertRaises(FC3DM_IniError, FC3DM_ParseIniValue, "bodyName", '"Body', "test")
+
+    def test_error_says_where(self):
+        try:
+            FC3DM_ParseIniValue("L", '"6.4"', "foo.ini line 12")
+            self.fail("Expected FC3DM_IniError")
+        except FC3DM_IniError as e:
+            self.assertTrue(str(e).startswith("foo.ini line 12:"))
+
+
+class FC3DM_CheckParmTypeTests(unittest.TestCase):
+
+    def test_good_types(self):
+        for (name, parsed) in [("L", 1), ("L", 1.5), ("trace", 0), ("bodyName", "Body"),
+                               ("colorPins", (0.8, 0.8, 0.75)), ("batchIniFileNames", []),
+                               ("someUnknownParm", [1, "two"])]:
+            self.assertEqual(FC3DM_CheckParmType(name, parsed, repr(parsed), "test"), 0)
+
+    def test_bad_types(self):
+        for (name, parsed) in [("L", "1"), ("L", True), ("trace", 1.0), ("trace", False),
+                               ("bodyName", 1), ("colorPins", (0.8, 0.8)),
+                               ("colorPins", (0.8, 0.8, 2)), ("batchIniFileNames", ["a", 1])]:
+            self.assertRaises(FC3DM_IniError, FC3DM_CheckParmType, name, parsed, repr(parsed), "test")
+
+
+class FC3DM_PinNameSortKeyTests(unittest.TestCase):
+
+    def test_numbered_pins(self):
+        names = ["Pin10", "Pin2", "Pin1", "Pin21"]
+        self.assertEqual(sorted(names, key=FC3DM_PinNameSortKey), ["Pin1", "Pin2", "Pin10", "Pin21"])
+
+    def test_matches_compare_function(self):
+        lines = ["Pin10=a", "Pin2=b", "PinEP=c", "Pin1=d", "L=6.4", "newModelName=x", "Pin_A=e",
+                 "Pin3", "Pin", "A=1", "Z=2", "pinName=Pin"]
+        self.assertEqual(sorted(lines, key=FC3DM_PinNameSortKey),
+                         sorted(lines, key=functools.cmp_to_key(FC3DM_SortPinNames)))
+
+
+class FC3DM_ValidateParmsTests(unittest.TestCase):
+
+    def test_good_gullwing(self):
+        parms = FC3DM_MakeGullwingParms()
+        self.assertEqual(FC3DM_ValidateParms(parms), 0)
+        self.assertEqual(parms["pinTable"]["names"], ["Pin1", "Pin2", "Pin3", "Pin4"])
+        self.assertEqual(list(parms["pinTable"]["x"]), [-2.9, -2.9, 2.9, 2.9])
+
+    def test_missing_common_parm(self):
+        parms = FC3DM_MakeGullwingParms()
+        del parms["stepExt"]
+        self.assertRaises(FC3DM_IniError, FC3DM_ValidateParms, parms)
+
+    def test_missing_family_parm(self):
+        parms = FC3DM_MakeGullwingParms()
+        del parms["Hpe"]
+        self.assertRaises(FC3DM_IniError, FC3DM_ValidateParms, parms)
+
+    def test_ep_needs_ep_parms(self):
+        parms = FC3DM_MakeGullwingParms()
+        parms["Pin5"] = "EP,Ep,0,0"
+        self.assertRaises(FC3DM_IniError, FC3DM_ValidateParms, parms)
+        parms.update({"Tt" : 1.0, "Wt" : 1.0, "Ft" : 0.1, "Rt" : 0.1})
+        self.assertEqual(FC3DM_ValidateParms(parms), 0)
+
+    def test_unsupported_footprint(self):
+        parms = FC3DM_MakeGullwingParms()
+        parms["newModelName"] = "BGA100"
+        self.assertRaises(FC3DM_IniError, FC3DM_ValidateParms, parms)
+
+    def test_no_pin_rows(self):
+        parms = FC3DM_MakeGullwingParms()
+        for name in ["Pin1", "Pin2", "Pin3", "Pin4"]:
+            del parms[name]
+        self.assertRaises(FC3DM_IniError, FC3DM_ValidateParms, parms)
+
+
+class FC3DM_LoadIniFileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.iniFileName = os.path.join(self.tempDir, "test.ini")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir, True)
+
+    def writeIniFile(self, text):
+        fileP = open(self.iniFileName, "w")
+        fileP.write(text)
+        fileP.close()
+
+    def test_comments_and_values(self):
+        self.writeIniFile('# A comment\nL = 6.4  # Body length\nbodyName = "Body"\n\nPin1=Gullwing,West,-3.3,2.925\n')
+        self.assertEqual(FC3DM_LoadIniFile(self.iniFileName),
+                         [("L", 6.4), ("bodyName", "Body"), ("Pin1", "Gullwing,West,-3.3,2.925")])
+
+    def test_bad_line_says_where(self):
+        self.writeIniFile('L = 6.4\nW = "wide"\n')
+        try:
+            FC3DM_LoadIniFile(self.iniFileName)
+            self.fail("Expected FC3DM_IniError")
+        except FC3DM_IniError as e:
+            self.assertTrue("line 2" in str(e))
+
+    def test_missing_file(self):
+        self.assertRaises(FC3DM_IniError, FC3DM_LoadIniFile, os.path.join(self.tempDir, "missing.ini"))
+
+
+if (__name__ == "__main__"):
+    unittest.main()
@@ -0,0 +1,122 @@
+#================================================================================================
+#
+#	@file			test_FC3DM_vertexes.py
+#
+#	@brief			Unit tests for extracting the vertexes of shapes, with and without NumPy.
+#
+#	@details		FC3DM_utils.py needs FreeCAD, so run these with FreeCAD's python, from this
+#					directory, as:  python -m unittest test_FC3DM_vertexes
+#					Elsewhere they are skipped.  The shapes here are plain python stand-ins.
+#
+#	@copyright      Copyright (c) 2012 Sierra Photonics, Inc.  All rights reserved.
+#
+#	See also included file SPI_License.txt.
+#================================================================================================
+
+import random
+import unittest
+
+# FC3DM_utils.py is python 2 code, so python 3 can't even compile it
+try:
+    import FC3DM_utils
+except (ImportError, SyntaxError):
+    FC3DM_utils = None
+
+
+###################################################################
+# FakePoint, FakeVertex, FakeFace, FakeShape
+#	Stand-ins for the parts of FreeCAD shapes that we extract vertexes from.
+###################################################################
+class FakePoint(object):
+    def __init__(self, x, y, z):
+        (self.x, self.y, self.z) = (x, y, z)
+
+class FakeVertex(object):
+    def __init__(self, x, y, z):
+        self.Point = FakePoint(x, y, z)
+
+class FakeFace(object):
+    def __init__(self, corners):
+        self.Vertexes = [FakeVertex(x, y, z) for (x, y, z) in corners]
+
+class FakeShape(object):
+    def __init__(self, faces):
+        self.Faces = [FakeFace(corners) for corners in faces]
+
+
+###################################################################
+# FC3DM_MakeFakeBox()
+#	Function to make the faces of a box from (0,0,0) to (x,y,z), with
+# float noise well under 1 nm on each corner, in random order.
+###################################################################
+def FC3DM_MakeFakeBox(x, y, z, rand):
+
+    faces = [[(0,0,0), (x,0,0), (x,y,0), (0,y,0)],
+             [(0,0,z), (x,0,z), (x,y,z), (0,y,z)],
+             [(0,0,0), (x,0,0), (x,0,z), (0,0,z)],
+             [(0,y,0), (x,y,0), (x,y,z), (0,y,z)],
+             [(0,0,0), (0,y,0), (0,y,z), (0,0,z)],
+             [(x,0,0), (x,y,0), (x,y,z), (x,0,z)]]
+
+    noisyFaces = []
+    for corners in faces:
+        corners = [tuple([c + rand.uniform(-1e-8, 1e-8) for c in corner]) for corner in corners]
+        rand.shuffle(corners)
+        noisyFaces.append(corners)
+    rand.shuffle(noisyFaces)
+
+    return noisyFaces
+
+
+@unittest.skipIf(FC3DM_utils == None, "needs FreeCAD's python")
+class FC3DM_ExtractShapeVertexesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.rand = random.Random(1)
+
+    def checkBothWays(self, shape):
+        slow = FC3DM_utils.FC3DM_ExtractShapeVertexesSlowly(shape)
+        if (FC3DM_utils.numpy != None):
+            self.assertEqual(FC3DM_utils.FC3DM_ExtractShapeVertexes(shape), slow)
+        return slow
+
+    def test_box(self):
+        (points, faceLines) = self.checkBothWays(FakeShape(FC3DM_MakeFakeBox(2.0, 1.0, 0.5, self.rand)))
+        self.assertEqual(len(points), 8)
+        self.assertEqual(points[0], (0, 0, 0))
+        self.assertEqual(points[-1], (2000000, 1000000, 500000))
+        self.assertEqual(len(faceLines), 6)
+        self.assertEqual(faceLines[0], "0 1 2 3")
+
+    def test_order_does_not_matter(self):
+        faces = FC3DM_MakeFakeBox(1.27, 0.65, 0.2, self.rand)
+        first = self.checkBothWays(FakeShape(faces))
+        for i in range(5):
+            faces = [list(corners) for corners in faces]
+            for corners in faces:
+                self.rand.shuffle(corners)
+            self.rand.shuffle(faces)
+            self.assertEqual(self.checkBothWays(FakeShape(faces)), first)
+
+    def test_repeated_vertexes_and_empty_faces(self):
+        # A seam lists a vertex twice.  A sphere face has no vertexes at all.
+        (points, faceLines) = self.checkBothWays(FakeShape([[(0,0,0), (1,0,0), (0,0,0), (0,1,0)], [],
+                                                            [(1,0,0), (0,1,0), (0,0,1)], []]))
+        self.assertEqual(len(points), 4)
+        self.assertEqual(faceLines, ["", "", "0 2 3", "1 2 3"])
+
+    def test_negative_and_half_nm_coordinates(self):
+        faces = []
+        for i in range(50):
+            faces.append([(self.rand.randint(-5000, 5000) * 0.5e-6,
+                           self.rand.randint(-5000, 5000) * 0.5e-6,
+                           -self.rand.random()) for j in range(3)])
+        self.checkBothWays(FakeShape(faces))
+
+    def test_no_vertexes(self):
+        self.assertEqual(self.checkBothWays(FakeShape([])), ([], []))
+        self.assertEqual(self.checkBothWays(FakeShape([[], []])), ([], ["", ""]))
+
+
+if (__name__ == "__main__"):
+    unittest.main()